@@ -2,6 +2,7 @@ import json
 import os
 from azure.ai.agents import AgentsClient
 from azure.ai.agents.models import OpenApiTool, OpenApiManagedAuthDetails, OpenApiManagedSecurityScheme
+from azure.ai.agents.models import ResponseFormatJsonSchema, ResponseFormatJsonSchemaType
 from utils import bind_parameters, get_azure_credential
 
 config = {}
@@ -21,6 +22,75 @@ config['translator_resource_id'] = os.environ.get("TRANSLATOR_RESOURCE_ID")
 config['translator_region'] = os.environ.get("TRANSLATOR_REGION")
 config['translator_resource_id'] = os.environ.get("TRANSLATOR_RESOURCE_ID")
 
+# JSON schemas of the agent responses, enforced with structured outputs so the orchestrator
+# does not have to retry the group chat on malformed replies
+BOOLEAN_STRING_SCHEMA = {"type": "string", "enum": ["True", "False"]}
+
+TRIAGE_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "type": {"type": "string", "enum": ["clu_result", "cqa_result"]},
+        "response": {"type": "object", "description": "The full, unmodified CLU or CQA API response."},
+        "terminated": BOOLEAN_STRING_SCHEMA
+    },
+    "required": ["type", "response", "terminated"]
+}
+
+HEAD_SUPPORT_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "target_agent": {"type": "string", "enum": ["OrderStatusAgent", "OrderCancelAgent", "OrderRefundAgent"]},
+        "intent": {"type": "string"},
+        "entities": {"type": "array", "items": {"type": "object"}},
+        "terminated": BOOLEAN_STRING_SCHEMA
+    },
+    "required": ["target_agent", "intent", "entities", "terminated"],
+    "additionalProperties": False
+}
+
+CUSTOM_AGENT_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "response": {"type": "string"},
+        "terminated": BOOLEAN_STRING_SCHEMA,
+        "need_more_info": BOOLEAN_STRING_SCHEMA
+    },
+    "required": ["response", "terminated", "need_more_info"],
+    "additionalProperties": False
+}
+
+# Mode 1 fills current_question and target_language, mode 2 fills final_answer, need_more_info and source_language
+TRANSLATION_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "origin_language": {"type": "string"},
+        "source_language": {"type": "string"},
+        "target_language": {"type": "string"},
+        "response": {
+            "type": "object",
+            "properties": {
+                "current_question": {"type": "string"},
+                "final_answer": {"type": "string"},
+                "need_more_info": BOOLEAN_STRING_SCHEMA
+            },
+            "additionalProperties": False
+        }
+    },
+    "required": ["origin_language", "response"],
+    "additionalProperties": False
+}
+
+
+def create_response_format(name, schema):
+    return ResponseFormatJsonSchemaType(
+        json_schema=ResponseFormatJsonSchema(
+            name=name,
+            description=f"{name} JSON response format",
+            schema=schema
+        )
+    )
+
+
 # Create agent client
 agents_client = AgentsClient(
     endpoint=PROJECT_ENDPOINT,
@@ -175,6 +245,7 @@ with agents_client:
         instructions=TRIAGE_AGENT_INSTRUCTIONS,
         tools=clu_api_tool.definitions + cqa_api_tool.definitions,
         temperature=0.2,
+        response_format=create_response_format("triage_response", TRIAGE_RESPONSE_SCHEMA),
         )
 
     # 2) Create the head support agent which takes in CLU intents and entities and routes the request to the appropriate support agent
@@ -198,6 +269,7 @@ with agents_client:
         model=MODEL_NAME,
         name=HEAD_SUPPORT_AGENT_NAME,
         instructions=HEAD_SUPPORT_AGENT_INSTRUCTIONS,
+        response_format=create_response_format("head_support_response", HEAD_SUPPORT_RESPONSE_SCHEMA),
     )
 
     # 3) Create the custom agents for handling specific intents (our examples are OrderStatus, OrderCancel, and OrderRefund). Plugin tools will be added to these agents when we turn them into Semantic Kernel agents.
@@ -212,6 +284,7 @@ with agents_client:
         model=MODEL_NAME,
         name=ORDER_STATUS_AGENT_NAME,
         instructions=ORDER_STATUS_AGENT_INSTRUCTIONS,
+        response_format=create_response_format("order_status_response", CUSTOM_AGENT_RESPONSE_SCHEMA),
     )
 
     ORDER_CANCEL_AGENT_NAME = "OrderCancelAgent"
@@ -225,6 +298,7 @@ with agents_client:
         model=MODEL_NAME,
         name=ORDER_CANCEL_AGENT_NAME,
         instructions=ORDER_CANCEL_AGENT_INSTRUCTIONS,
+        response_format=create_response_format("order_cancel_response", CUSTOM_AGENT_RESPONSE_SCHEMA),
     )
 
     ORDER_REFUND_AGENT_NAME = "OrderRefundAgent"
@@ -238,6 +312,7 @@ with agents_client:
         model=MODEL_NAME,
         name=ORDER_REFUND_AGENT_NAME,
         instructions=ORDER_REFUND_AGENT_INSTRUCTIONS,
+        response_format=create_response_format("order_refund_response", CUSTOM_AGENT_RESPONSE_SCHEMA),
     )
 
     # 4) Create the translation agent
@@ -312,6 +387,7 @@ with agents_client:
         name=TRANSLATION_AGENT_NAME,
         instructions=TRANSLATION_AGENT_INSTRUCTIONS,
         tools=translation_api_tool.definitions,
+        response_format=create_response_format("translation_response", TRANSLATION_RESPONSE_SCHEMA),
     )
 
     # Output the agent IDs in a JSON format to be captured as env variables
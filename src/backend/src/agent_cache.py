@@ -0,0 +1,100 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import json
+import hashlib
+import logging
+from azure.ai.agents.models import Agent as AgentDefinition
+
+"""
+On-disk cache of Foundry agent definitions.
+
+Definitions are keyed by agent ID and stored with a content hash (version), so a restarted
+app can build its agents from disk right away and refresh them from Foundry in the background.
+"""
+
+_logger = logging.getLogger(__name__)
+
+
+def get_definition_version(definition: AgentDefinition) -> str:
+    """
+    Content hash of an agent definition.
+    """
+    content = json.dumps(definition.as_dict(), sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+class AgentDefinitionCache():
+    """
+    JSON file of agent ID -> {version, definition}.
+    """
+
+    def __init__(
+        self,
+        path: str
+    ):
+        self.path = path
+        self.entries = self.load()
+
+    def load(self) -> dict:
+        """
+        Load cached definitions, ignoring a missing or corrupt cache file.
+        """
+        if not os.path.exists(self.path):
+            return {}
+
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            _logger.warning(f"Ignoring unreadable agent cache {self.path}: {e}")
+            return {}
+
+    def get(
+        self,
+        agent_id: str
+    ) -> tuple[AgentDefinition, str]:
+        """
+        Get the cached definition and version of an agent, or (None, None).
+        """
+        entry = self.entries.get(agent_id)
+        if not entry:
+            return None, None
+
+        try:
+            return AgentDefinition(entry["definition"]), entry["version"]
+        except Exception as e:
+            _logger.warning(f"Ignoring cached definition of agent {agent_id}: {e}")
+            return None, None
+
+    def put(
+        self,
+        definition: AgentDefinition
+    ) -> bool:
+        """
+        Cache a definition. Returns True if it differs from the cached version.
+        """
+        version = get_definition_version(definition)
+        changed = self.entries.get(definition.id, {}).get("version") != version
+        self.entries[definition.id] = {
+            "version": version,
+            "definition": json.loads(json.dumps(definition.as_dict(), default=str))
+        }
+        return changed
+
+    def save(self) -> None:
+        """
+        Atomically write the cache file.
+        """
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(temp_path, self.path)
+
+        except Exception as e:
+            _logger.warning(f"Could not write agent cache {self.path}: {e}")
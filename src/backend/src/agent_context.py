@@ -0,0 +1,333 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import json
+import logging
+from typing import AsyncIterable, Callable
+from semantic_kernel.agents import Agent, AgentResponseItem, AgentThread
+from semantic_kernel.agents.chat_completion.chat_completion_agent import ChatHistoryAgentThread
+from semantic_kernel.contents import AuthorRole, ChatMessageContent
+from agent_envelopes import CUSTOM_AGENTS, get_envelope
+
+"""
+Per-agent context policies for the group chat.
+
+Group chat agents otherwise receive the full accumulated chat history, including the raw
+CLU/CQA payloads of earlier hops. A context policy selects (and compacts) only the messages
+an agent needs, and a token cap trims whatever is left, so prompt tokens stay flat per hop.
+"""
+
+_logger = logging.getLogger(__name__)
+
+# FILTERED applies the per-agent policies, FULL forwards the whole history (for comparison)
+CONTEXT_POLICY = os.environ.get("SK_CONTEXT_POLICY", "FILTERED").upper()
+AGENT_CONTEXT_TOKENS = int(os.environ.get("SK_AGENT_CONTEXT_TOKENS", "2000"))
+
+# Per-message overhead of the chat format (role, name, separators)
+MESSAGE_TOKEN_OVERHEAD = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of text (~4 characters per token for English text).
+    """
+    return (len(text) + 3) // 4
+
+
+def count_tokens(messages: list[ChatMessageContent]) -> int:
+    """
+    Estimate the prompt tokens of a list of chat messages.
+    """
+    return sum(estimate_tokens(str(message.content or "")) + MESSAGE_TOKEN_OVERHEAD for message in messages)
+
+
+def is_transfer_notice(message: ChatMessageContent) -> bool:
+    """
+    Check if a message is a group chat "Transferred to <agent>" notice.
+    """
+    return message.role == AuthorRole.USER and str(message.content).startswith("Transferred to")
+
+
+def compact_message(message: ChatMessageContent, content: dict) -> ChatMessageContent:
+    """
+    Copy of message with compact JSON content.
+    """
+    return ChatMessageContent(
+        role=message.role,
+        name=message.name,
+        content=json.dumps(content, separators=(",", ":"), ensure_ascii=False)
+    )
+
+
+def compact_triage_message(message: ChatMessageContent) -> ChatMessageContent:
+    """
+    Reduce a TriageAgent message to its top CLU intent and entities, or its top CQA answer,
+    keeping the envelope shape the downstream agents are instructed to read.
+    """
+    envelope = get_envelope(message)
+    if envelope is None:
+        return message
+
+    try:
+        if envelope.type == "cqa_result":
+            response = {"answers": [envelope.answer]}
+        else:
+            conversation = envelope.response["result"]["conversations"][0]
+            response = {
+                "kind": envelope.response.get("kind", "ConversationalAIResult"),
+                "result": {
+                    "conversations": [{
+                        "intents": conversation["intents"][:1],
+                        "entities": conversation.get("entities", [])
+                    }]
+                }
+            }
+    except (KeyError, IndexError, TypeError):
+        return message
+
+    return compact_message(message, {"type": envelope.type, "response": response, "terminated": envelope.terminated})
+
+
+def find_last(history: list[ChatMessageContent], name: str) -> ChatMessageContent:
+    """
+    Latest well-formed message of an agent.
+    """
+    for message in reversed(history):
+        if message.name == name and get_envelope(message) is not None:
+            return message
+    return None
+
+
+def get_question_messages(history: list[ChatMessageContent]) -> list[ChatMessageContent]:
+    """
+    The (translated) user question: the initial TranslationAgent message, or the user messages.
+    """
+    for message in history:
+        envelope = get_envelope(message) if message.name == "TranslationAgent" else None
+        if envelope and envelope.response.current_question is not None:
+            return [compact_message(message, envelope.model_dump(exclude_none=True))]
+
+    return [m for m in history if m.role == AuthorRole.USER and not is_transfer_notice(m)]
+
+
+def translation_context(history: list[ChatMessageContent]) -> list[ChatMessageContent]:
+    """
+    TranslationAgent sees the user message to translate, or only the final answer and the target language.
+    """
+    origin_language = None
+    for message in history:
+        envelope = get_envelope(message) if message.name == "TranslationAgent" else None
+        if envelope:
+            origin_language = envelope.origin_language
+            break
+
+    for message in reversed(history):
+        envelope = get_envelope(message)
+        if message.name in CUSTOM_AGENTS and envelope:
+            answer, need_more_info = envelope.response, envelope.need_more_info
+        elif message.name == "TriageAgent" and envelope and envelope.type == "cqa_result":
+            answer, need_more_info = envelope.answer.get("answer"), "False"
+        else:
+            continue
+
+        content = {"response": answer, "terminated": "True", "need_more_info": need_more_info}
+        if origin_language:
+            content["origin_language"] = origin_language
+        return [compact_message(message, content)]
+
+    return [m for m in history if m.role == AuthorRole.USER and not is_transfer_notice(m)]
+
+
+def triage_context(history: list[ChatMessageContent]) -> list[ChatMessageContent]:
+    """
+    TriageAgent sees only the translated question.
+    """
+    return get_question_messages(history)
+
+
+def head_support_context(history: list[ChatMessageContent]) -> list[ChatMessageContent]:
+    """
+    HeadSupportAgent sees only the compacted CLU result.
+    """
+    triage_message = find_last(history, "TriageAgent")
+    return [compact_triage_message(triage_message)] if triage_message else []
+
+
+def custom_agent_context(history: list[ChatMessageContent]) -> list[ChatMessageContent]:
+    """
+    Custom agents see the question and the compacted triage (and head support) results.
+    """
+    messages = get_question_messages(history)
+
+    triage_message = find_last(history, "TriageAgent")
+    if triage_message:
+        messages.append(compact_triage_message(triage_message))
+
+    head_support_message = find_last(history, "HeadSupportAgent")
+    if head_support_message:
+        messages.append(compact_message(head_support_message, get_envelope(head_support_message).model_dump(exclude_none=True)))
+    return messages
+
+
+def full_context(history: list[ChatMessageContent]) -> list[ChatMessageContent]:
+    return list(history)
+
+
+def get_context_policy(name: str, policy: str = CONTEXT_POLICY) -> Callable[[list[ChatMessageContent]], list[ChatMessageContent]]:
+    """
+    Get the context policy of an agent.
+    """
+    if policy != "FILTERED":
+        return full_context
+    if name == "TranslationAgent":
+        return translation_context
+    if name == "TriageAgent":
+        return triage_context
+    if name == "HeadSupportAgent":
+        return head_support_context
+    if name in CUSTOM_AGENTS:
+        return custom_agent_context
+    return lambda history: [m for m in history if not is_transfer_notice(m)]
+
+
+def cap_tokens(messages: list[ChatMessageContent], max_tokens: int) -> list[ChatMessageContent]:
+    """
+    History reducer dropping the oldest messages until the context fits max_tokens.
+    The latest message is always kept.
+    """
+    messages = list(messages)
+    while len(messages) > 1 and count_tokens(messages) > max_tokens:
+        messages.pop(0)
+    return messages
+
+
+class ContextStats():
+    """
+    Prompt token statistics with and without context policies.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.agents = dict()
+
+    def record(
+        self,
+        name: str,
+        tokens_before: int,
+        tokens_after: int
+    ) -> None:
+        stats = self.agents.setdefault(name, {"invocations": 0, "tokens_before": 0, "tokens_after": 0})
+        stats["invocations"] += 1
+        stats["tokens_before"] += tokens_before
+        stats["tokens_after"] += tokens_after
+
+    def as_dict(self) -> dict:
+        tokens_before = sum(stats["tokens_before"] for stats in self.agents.values())
+        tokens_after = sum(stats["tokens_after"] for stats in self.agents.values())
+        requests = max(1, self.requests)
+        return {
+            "requests": self.requests,
+            "tokens_per_request_before": round(tokens_before / requests, 1),
+            "tokens_per_request_after": round(tokens_after / requests, 1),
+            "agents": self.agents
+        }
+
+
+class ContextFilteredAgent(Agent):
+    """
+    Group chat member forwarding only its context policy's messages to the wrapped agent.
+
+    The group chat thread of this agent keeps the full history seen by the agent; every
+    invocation of the wrapped agent starts from a fresh thread holding the selected context,
+    which is deleted after the response (a Foundry thread for AzureAIAgent).
+    """
+    agent: Agent
+    context_policy: Callable[[list[ChatMessageContent]], list[ChatMessageContent]]
+    max_tokens: int = AGENT_CONTEXT_TOKENS
+    stats: ContextStats
+
+    async def select_context(self, messages, thread: AgentThread | None) -> tuple[list[ChatMessageContent], AgentThread]:
+        """
+        Add the new messages to the group chat thread and select the context for the wrapped agent.
+        """
+        thread = await self._ensure_thread_exists_with_messages(
+            messages=messages,
+            thread=thread,
+            construct_thread=lambda: ChatHistoryAgentThread(),
+            expected_type=ChatHistoryAgentThread
+        )
+        history = [message async for message in thread.get_messages()]
+
+        context = self.context_policy(history) or [m for m in history if not is_transfer_notice(m)]
+        context = cap_tokens(context, self.max_tokens)
+
+        self.stats.record(self.name, count_tokens(history), count_tokens(context))
+        return context, thread
+
+    async def delete_thread(self, thread: AgentThread | None) -> None:
+        """
+        Delete a thread of the wrapped agent, so per-hop threads do not accumulate in the service.
+        """
+        if thread is None:
+            return
+        try:
+            await thread.delete()
+        except Exception as e:
+            _logger.warning(f"Failed to delete {self.name} thread {thread.id}: {e}")
+
+    async def get_response(self, messages=None, *, thread=None, **kwargs) -> AgentResponseItem[ChatMessageContent]:
+        context, thread = await self.select_context(messages, thread)
+        response = await self.agent.get_response(messages=context, **kwargs)
+        await self.delete_thread(response.thread)
+        await thread.on_new_message(response.message)
+        return AgentResponseItem(message=response.message, thread=thread)
+
+    async def invoke(self, messages=None, *, thread=None, **kwargs) -> AsyncIterable[AgentResponseItem[ChatMessageContent]]:
+        context, thread = await self.select_context(messages, thread)
+        agent_thread = None
+        try:
+            async for response in self.agent.invoke(messages=context, **kwargs):
+                agent_thread = response.thread
+                await thread.on_new_message(response.message)
+                yield AgentResponseItem(message=response.message, thread=thread)
+        finally:
+            await self.delete_thread(agent_thread)
+
+    async def invoke_stream(self, messages=None, *, thread=None, **kwargs) -> AsyncIterable[AgentResponseItem]:
+        context, thread = await self.select_context(messages, thread)
+        chunks = []
+        agent_thread = None
+        try:
+            async for response in self.agent.invoke_stream(messages=context, **kwargs):
+                agent_thread = response.thread
+                chunks.append(response.message)
+                yield AgentResponseItem(message=response.message, thread=thread)
+        finally:
+            await self.delete_thread(agent_thread)
+
+        if chunks:
+            message = sum(chunks[1:], chunks[0])
+            await thread.on_new_message(ChatMessageContent(role=message.role, name=message.name, content=message.content))
+
+
+def apply_context_policies(
+    agents: list[Agent],
+    stats: ContextStats,
+    policy: str = CONTEXT_POLICY,
+    max_tokens: int = AGENT_CONTEXT_TOKENS
+) -> list[Agent]:
+    """
+    Wrap group chat agents with their context policies.
+    """
+    return [
+        ContextFilteredAgent(
+            id=agent.id,
+            name=agent.name,
+            description=agent.description,
+            agent=agent,
+            context_policy=get_context_policy(agent.name, policy),
+            max_tokens=max_tokens,
+            stats=stats
+        )
+        for agent in agents
+    ]
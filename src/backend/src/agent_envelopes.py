@@ -0,0 +1,139 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import logging
+from functools import lru_cache
+from typing import Literal
+from pydantic import BaseModel, ConfigDict, ValidationError, model_validator
+
+"""
+Typed envelopes of the group chat agent responses.
+
+Each agent message is parsed and validated once; routing, termination, checkpointing
+and logging all read the cached envelope instead of re-parsing the message content.
+The shapes mirror the response formats the agents are created with in agent_setup.py.
+"""
+
+_logger = logging.getLogger(__name__)
+
+ENVELOPE_CACHE_SIZE = 1024
+
+CUSTOM_AGENTS = ["OrderStatusAgent", "OrderRefundAgent", "OrderCancelAgent"]
+
+
+class Envelope(BaseModel):
+    """
+    Base agent response envelope. Envelopes are shared through the cache and must not be mutated.
+    """
+    model_config = ConfigDict(frozen=True)
+
+
+class TranslationResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    current_question: str | None = None
+    final_answer: str | None = None
+    need_more_info: str | bool | None = None
+
+
+class TranslationEnvelope(Envelope):
+    """
+    TranslationAgent output: the translated question (mode 1) or the translated final answer (mode 2).
+    """
+    origin_language: str | None = None
+    source_language: str | None = None
+    target_language: str | None = None
+    response: TranslationResponse
+
+    @model_validator(mode="after")
+    def check_mode(self):
+        if self.response.current_question is None and self.response.final_answer is None:
+            raise ValueError("Translation response has neither current_question nor final_answer")
+        return self
+
+
+class TriageEnvelope(Envelope):
+    """
+    TriageAgent output wrapping the raw CLU or CQA API response.
+    """
+    type: Literal["clu_result", "cqa_result"]
+    response: dict
+    terminated: str | bool = "False"
+
+    @property
+    def intent(self) -> str:
+        """
+        Top CLU intent.
+        """
+        return self.response["result"]["conversations"][0]["intents"][0]["name"]
+
+    @property
+    def answer(self) -> dict:
+        """
+        Top CQA answer.
+        """
+        return self.response["answers"][0]
+
+
+class HeadSupportEnvelope(Envelope):
+    """
+    HeadSupportAgent output selecting the custom agent.
+    """
+    target_agent: str
+    intent: str | None = None
+    entities: list = []
+    terminated: str | bool = "False"
+
+
+class CustomAgentEnvelope(Envelope):
+    """
+    Custom agent output with the (English) final answer.
+    """
+    response: str
+    terminated: str | bool = "True"
+    need_more_info: str | bool = "False"
+
+
+def get_envelope_type(name: str) -> type[Envelope]:
+    """
+    Get the envelope type of an agent, or None for messages without an envelope (user messages).
+    """
+    if name == "TranslationAgent":
+        return TranslationEnvelope
+    if name == "TriageAgent":
+        return TriageEnvelope
+    if name == "HeadSupportAgent":
+        return HeadSupportEnvelope
+    if name in CUSTOM_AGENTS:
+        return CustomAgentEnvelope
+    return None
+
+
+@lru_cache(maxsize=ENVELOPE_CACHE_SIZE)
+def parse_envelope(name: str, content: str) -> Envelope:
+    """
+    Parse and validate agent message content, or return None if it is not a well-formed envelope.
+    """
+    envelope_type = get_envelope_type(name)
+    if envelope_type is None or not content:
+        return None
+
+    # Salvage replies wrapped in a markdown code block instead of retrying the stage
+    content = content.strip()
+    if content.startswith("```"):
+        content = content.strip("`").removeprefix("json").strip()
+
+    try:
+        return envelope_type.model_validate_json(content)
+    except ValidationError as e:
+        _logger.warning(f"Malformed {name} response: {e.error_count()} validation error(s)")
+        return None
+
+
+def get_envelope(message) -> Envelope:
+    """
+    Get the cached envelope of a chat message.
+    """
+    if message is None:
+        return None
+    return parse_envelope(message.name, str(message.content) if message.content else "")
+
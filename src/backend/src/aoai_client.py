@@ -7,8 +7,13 @@ from openai import AzureOpenAI
 from azure.core.credentials import TokenCredential
 from azure.identity import get_bearer_token_provider
 from azure.search.documents import SearchClient
-from azure.search.documents.models import VectorizableTextQuery
 from utils import get_azure_credential
+from deployment_pool import DeploymentPool, get_default_deployment_pool
+from rate_limiter import PRIORITY_NORMAL, estimate_request_tokens, get_rate_limiter
+from embedding_service import EmbeddingService
+from rag_context import RagContextAssembler
+from retrieval_cache import RetrievalCache
+from search_backend import AzureSearchBackend, LocalSearchBackend
 
 def get_prompt(
     prompt: str,
@@ -45,7 +50,13 @@ class AOAIClient(AzureOpenAI):
         functions: dict[str, Callable] = None,
         return_functions: bool = False,
         use_rag: bool = False,
-        search_client: SearchClient = None
+        search_client: SearchClient = None,
+        search_backend: AzureSearchBackend | LocalSearchBackend = None,
+        embedding_service: EmbeddingService = None,
+        context_assembler: RagContextAssembler = None,
+        retrieval_cache: RetrievalCache = None,
+        deployment_pool: DeploymentPool = None,
+        priority: int = PRIORITY_NORMAL
     ) -> None:
         self.logger = logging.getLogger(self.__class__.__name__)
         if not azure_credential:
@@ -55,7 +66,8 @@ class AOAIClient(AzureOpenAI):
             self,
             api_version=api_version,
             azure_ad_token_provider=token_provider,
-            azure_endpoint=endpoint
+            azure_endpoint=endpoint,
+            max_retries=0  # Retries are handled by the shared rate limiter
         )
 
         # Function-calling:
@@ -67,6 +79,22 @@ class AOAIClient(AzureOpenAI):
         # RAG:
         self.use_rag = use_rag
         self.search_client = search_client
+        # Client-side query vectorization (the search service vectorizes queries otherwise):
+        self.embedding_service = embedding_service
+        # Retrieval backend (Azure AI Search through search_client unless given):
+        if search_backend is None and search_client is not None:
+            search_backend = AzureSearchBackend(search_client, embedding_service)
+        self.search_backend = search_backend
+        # Merge, deduplicate and budget the sources of RAG prompts:
+        self.context_assembler = context_assembler
+        # Search results cached until their TTL or a new index version:
+        self.retrieval_cache = retrieval_cache
+
+        # Multi-deployment load balancing (shared by all clients when AOAI_DEPLOYMENTS is set):
+        self.deployment_pool = deployment_pool or get_default_deployment_pool()
+
+        # Client-side rate limiting (lower priority values are served first):
+        self.priority = priority
 
         # General:
         self.deployment = self.model_name = deployment
@@ -78,27 +106,46 @@ class AOAIClient(AzureOpenAI):
             # Prepend system message:
             self.messages = [{"role": "system", "content": system_message}]
 
+    def create_chat_completion(
+        self,
+        **kwargs
+    ):
+        """
+        Create a chat completion on the deployment pool, or on this client's deployment.
+        """
+        if self.deployment_pool:
+            return self.deployment_pool.chat_completion(priority=self.priority, **kwargs)
+
+        return get_rate_limiter(self.deployment).call(
+            lambda: self.chat.completions.create(
+                model=self.deployment,
+                **kwargs
+            ),
+            tokens=estimate_request_tokens(kwargs.get("messages", []), kwargs.get("max_tokens")),
+            priority=self.priority
+        )
+
     def call_functions(
         self,
+        messages: list,
         language: str,
         id: str
     ) -> list:
         """
-        AOAI function calling.
+        AOAI function calling on the messages of one call (tool calls and results are appended to them).
 
         Returns function-call responses.
         """
         # Call chat API with function-calling enabled:
-        response = self.chat.completions.create(
-            model=self.deployment,
-            messages=self.messages,
+        response = self.create_chat_completion(
+            messages=messages,
             tools=self.tools,
             tool_choice="auto",
         )
 
         # Process model's response:
         response_message = response.choices[0].message
-        self.messages.append(response_message)
+        messages.append(response_message)
         self.logger.info(f"Model response: {response_message}")
 
         # Handle function calls:
@@ -120,7 +167,7 @@ class AOAIClient(AzureOpenAI):
 
                 function_responses.append(func_response)
                 self.logger.info(f"Function response: {str(func_response)}")
-                self.messages.append({
+                messages.append({
                     "tool_call_id": tool_call.id,
                     "role": "tool",
                     "name": function_name,
@@ -131,28 +178,48 @@ class AOAIClient(AzureOpenAI):
 
         return function_responses
 
-    def generate_rag_prompt(
+    def search(
         self,
         query: str
+    ) -> list[dict]:
+        """
+        Retrieve RAG sources for query with the search backend.
+        """
+        if self.retrieval_cache:
+            params = {
+                "backend": self.search_backend.name,
+                "k_nearest_neighbors": 50,
+                "top": 5,
+                "vectorizer": "client" if self.embedding_service else "service"
+            }
+            return self.retrieval_cache.get_or_search(query, params, lambda: self.search_index(query))
+        return self.search_index(query)
+
+    def search_index(
+        self,
+        query: str
+    ) -> list[dict]:
+        """
+        Query the search backend (bypassing the retrieval cache).
+        """
+        self.logger.info(f"Calling {self.search_backend.name} search backend")
+        return self.search_backend.search(query, top=5, k_nearest_neighbors=50)
+
+    def generate_rag_prompt(
+        self,
+        query: str,
+        documents: list[dict] = None
     ) -> str:
         """
-        Generates RAG grounding prompt given query and search client.
+        Generates RAG grounding prompt given query and search client (or already retrieved documents).
         """
-        self.logger.info("Calling search client")
-        vector_query = VectorizableTextQuery(
-            text=query,
-            k_nearest_neighbors=50,
-            fields="text_vector"
-        )
-        search_results = self.search_client.search(
-            search_text=query,
-            vector_queries=[vector_query],
-            select=["title", "chunk"],
-            top=5
-        )
+        if documents is None:
+            documents = self.search(query)
+        if self.context_assembler:
+            documents = self.context_assembler.assemble(documents)
 
         sources_formatted = "=================\n".join(
-            [f'TITLE: {doc["title"]}, CONTENT: {doc["chunk"]}' for doc in search_results]
+            [f'TITLE: {doc["title"]}, CONTENT: {doc["chunk"]}' for doc in documents]
         )
 
         prompt = RAG_GROUNDING_PROMPT.format(
@@ -166,28 +233,29 @@ class AOAIClient(AzureOpenAI):
         self,
         message: str,
         language: str = None,
-        id: str = None
+        id: str = None,
+        documents: list[dict] = None
     ) -> str:
         """
         AOAI chat completion.
+        Each call sends the system message and this message only: clients are shared by concurrent
+        requests, so no history is kept between calls.
         """
         # Add user message:
-        prompt = self.generate_rag_prompt(message) if self.use_rag else message
-        self.messages.append({"role": "user", "content": prompt})
+        prompt = self.generate_rag_prompt(message, documents) if self.use_rag else message
+        messages = list(self.messages) + [{"role": "user", "content": prompt}]
 
         if self.function_calling:
-            function_results = self.call_functions(language=language, id=id)
+            function_results = self.call_functions(messages, language=language, id=id)
             if self.return_functions:
                 # Return function-call results directly:
                 return function_results
 
         # Call chat API:
-        response = self.chat.completions.create(
-            model=self.deployment,
-            messages=self.messages
+        response = self.create_chat_completion(
+            messages=messages
         )
         response_message = response.choices[0].message
         self.logger.info(f"Model response: {response_message}")
-        self.messages.append(response_message)
 
         return response_message.content
@@ -0,0 +1,122 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import re
+import glob
+import hashlib
+
+"""
+Local document chunking.
+
+Mirrors the split skill of infra/scripts/search/index_setup.py (pages mode, 2000 characters,
+500 overlap): text is split at sentence boundaries into pages of at most max_length characters,
+and each page starts with up to overlap characters of trailing sentences of the previous page.
+Pages are substrings of the document, so overlapping pages can be merged back exactly.
+Chunk ids include a hash of the page content, so unchanged pages keep their ids across runs.
+"""
+
+MAXIMUM_PAGE_LENGTH = 2000
+PAGE_OVERLAP_LENGTH = 500
+
+SENTENCE_END_REGEX = re.compile(r"[.!?]+\s+|\n\s*")
+
+
+def split_sentences(
+    text: str,
+    max_length: int = MAXIMUM_PAGE_LENGTH
+) -> list[str]:
+    """
+    Split text into sentences (keeping trailing whitespace) of at most max_length characters.
+    """
+    sentences = []
+    start = 0
+    for match in SENTENCE_END_REGEX.finditer(text):
+        sentences.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text):
+        sentences.append(text[start:])
+
+    # Split sentences longer than a page at word boundaries:
+    pieces = []
+    for sentence in sentences:
+        while len(sentence) > max_length:
+            cut = sentence.rfind(" ", 0, max_length) + 1 or max_length
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:]
+        if sentence:
+            pieces.append(sentence)
+    return pieces
+
+
+def split_pages(
+    text: str,
+    max_length: int = MAXIMUM_PAGE_LENGTH,
+    overlap: int = PAGE_OVERLAP_LENGTH
+) -> list[str]:
+    """
+    Split text into overlapping pages.
+    """
+    pieces = split_sentences(text, max_length)
+    pages = []
+    i = 0
+    while i < len(pieces):
+        j = i
+        length = 0
+        while j < len(pieces) and length + len(pieces[j]) <= max_length:
+            length += len(pieces[j])
+            j += 1
+
+        page = "".join(pieces[i:j]).strip()
+        if page:
+            pages.append(page)
+        if j == len(pieces):
+            break
+
+        # Start the next page with the trailing sentences that fit in the overlap:
+        k = j
+        overlap_length = 0
+        while k - 1 > i and overlap_length + len(pieces[k - 1]) <= overlap:
+            k -= 1
+            overlap_length += len(pieces[k])
+        i = k
+    return pages
+
+
+def get_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def chunk_document(
+    title: str,
+    content: str,
+    max_length: int = MAXIMUM_PAGE_LENGTH,
+    overlap: int = PAGE_OVERLAP_LENGTH
+) -> list[dict]:
+    """
+    Chunks of a document, with the fields of the search index (repeated pages are indexed once).
+    """
+    parent_id = get_hash(title)
+    chunks = {}
+    for page in split_pages(content, max_length, overlap):
+        chunk_id = f"{parent_id}_{get_hash(page)}"
+        chunks.setdefault(chunk_id, {
+            "parent_id": parent_id,
+            "chunk_id": chunk_id,
+            "title": title,
+            "chunk": page
+        })
+    return list(chunks.values())
+
+
+def load_documents(
+    directory: str,
+    pattern: str = "*.md"
+) -> list[dict]:
+    """
+    Load the documents of a directory as {"title", "content"} (title is the file name, like metadata_storage_name).
+    """
+    documents = []
+    for path in sorted(glob.glob(os.path.join(directory, pattern))):
+        with open(path, "r", encoding="utf-8") as f:
+            documents.append({"title": os.path.basename(path), "content": f.read()})
+    return documents
@@ -40,3 +40,18 @@ def OrderStatus(entities: list[dict]) -> str:
         return "Please specify order ID in order to check order status."
 
     return f"Order {order_id} has shipped."
+
+
+def default_hook(entities: list[dict]) -> str:
+    return "Sorry, I am unable to help with that request."
+
+
+# Intent -> hook mapping, used to build the hook registry at startup:
+HOOKS = {
+    "CancelOrder": CancelOrder,
+    "RefundStatus": RefundStatus,
+    "OrderStatus": OrderStatus
+}
+
+# Optional per-intent timeouts (seconds), e.g. for hooks calling external order systems:
+HOOK_TIMEOUTS = {}
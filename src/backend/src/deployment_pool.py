@@ -0,0 +1,322 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Callable
+from openai import AzureOpenAI, APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+from azure.core.credentials import TokenCredential
+from azure.identity import get_bearer_token_provider
+from utils import get_azure_credential
+from rate_limiter import PRIORITY_NORMAL, estimate_request_tokens, get_rate_limiter, get_retry_after
+
+"""
+Load balancing of Azure OpenAI calls over multiple endpoints/deployments.
+
+Deployments are picked with smooth weighted round-robin. Each configured weight is scaled by the
+quota headroom reported in the x-ratelimit-remaining-* response headers, deployments answering
+429 or 5xx are failed over and put on cooldown, so throughput scales with the deployments provisioned.
+
+Configure with AOAI_DEPLOYMENTS, a JSON list of {"endpoint", "deployment", "weight"} objects.
+"""
+
+_logger = logging.getLogger(__name__)
+
+AOAI_DEPLOYMENTS = os.environ.get("AOAI_DEPLOYMENTS")
+RATE_LIMIT_COOLDOWN = float(os.environ.get("AOAI_RATE_LIMIT_COOLDOWN", "10"))
+ERROR_COOLDOWN = float(os.environ.get("AOAI_ERROR_COOLDOWN", "5"))
+MAX_ERROR_COOLDOWN = 60.0
+
+# Lowest weight factor of a deployment that is close to its quota
+MIN_HEADROOM = 0.05
+
+
+class Deployment():
+    """
+    One endpoint/deployment with its quota and health bookkeeping.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        deployment: str,
+        weight: float = 1.0,
+        client: Any = None
+    ):
+        self.endpoint = endpoint
+        self.deployment = deployment
+        self.weight = weight
+        self.client = client
+
+        # Smooth weighted round-robin state:
+        self.current_weight = 0.0
+
+        # Quota headroom from the rate limit headers (max seen remaining is used as the limit):
+        self.remaining_requests = None
+        self.remaining_tokens = None
+        self.max_remaining_requests = None
+        self.max_remaining_tokens = None
+
+        # Health:
+        self.cooldown_until = 0.0
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.failures = 0
+        self.rate_limited = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.endpoint}/{self.deployment}"
+
+    def is_healthy(
+        self,
+        now: float
+    ) -> bool:
+        return now >= self.cooldown_until
+
+    def get_headroom(self) -> float:
+        """
+        Fraction of the request and token quota left, from the latest rate limit headers.
+        """
+        headroom = 1.0
+        if self.remaining_requests is not None and self.max_remaining_requests:
+            headroom = min(headroom, self.remaining_requests / self.max_remaining_requests)
+        if self.remaining_tokens is not None and self.max_remaining_tokens:
+            headroom = min(headroom, self.remaining_tokens / self.max_remaining_tokens)
+        return max(MIN_HEADROOM, headroom)
+
+    def get_effective_weight(self) -> float:
+        return self.weight * self.get_headroom()
+
+    def update_rate_limits(
+        self,
+        headers: dict
+    ) -> None:
+        """
+        Record the x-ratelimit-remaining-* response headers.
+        """
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        if remaining_requests is not None:
+            self.remaining_requests = int(remaining_requests)
+            self.max_remaining_requests = max(self.max_remaining_requests or 0, self.remaining_requests)
+
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        if remaining_tokens is not None:
+            self.remaining_tokens = int(remaining_tokens)
+            self.max_remaining_tokens = max(self.max_remaining_tokens or 0, self.remaining_tokens)
+
+    def as_dict(
+        self,
+        now: float
+    ) -> dict:
+        return {
+            "deployment": self.name,
+            "weight": self.weight,
+            "healthy": self.is_healthy(now),
+            "cooldown_seconds": round(max(0.0, self.cooldown_until - now), 2),
+            "headroom": round(self.get_headroom(), 3),
+            "remaining_requests": self.remaining_requests,
+            "remaining_tokens": self.remaining_tokens,
+            "requests": self.requests,
+            "failures": self.failures,
+            "rate_limited": self.rate_limited
+        }
+
+
+class DeploymentPool():
+    """
+    Weighted round-robin pool of Azure OpenAI deployments with failover.
+    """
+
+    def __init__(
+        self,
+        deployments: list[Deployment],
+        rate_limit_cooldown: float = RATE_LIMIT_COOLDOWN,
+        error_cooldown: float = ERROR_COOLDOWN
+    ):
+        if not deployments:
+            raise ValueError("Deployment pool requires at least one deployment")
+
+        self.deployments = deployments
+        self.rate_limit_cooldown = rate_limit_cooldown
+        self.error_cooldown = error_cooldown
+        self.lock = threading.Lock()
+
+    def select(
+        self,
+        exclude: set = None
+    ) -> Deployment:
+        """
+        Pick the next deployment by smooth weighted round-robin over the healthy deployments.
+        If every deployment is cooling down, pick the one that recovers first.
+        """
+        exclude = exclude or set()
+        now = time.monotonic()
+
+        with self.lock:
+            candidates = [d for d in self.deployments if d not in exclude]
+            if not candidates:
+                return None
+
+            healthy = [d for d in candidates if d.is_healthy(now)]
+            if not healthy:
+                return min(candidates, key=lambda d: d.cooldown_until)
+
+            total = 0.0
+            for deployment in healthy:
+                weight = deployment.get_effective_weight()
+                deployment.current_weight += weight
+                total += weight
+
+            selected = max(healthy, key=lambda d: d.current_weight)
+            selected.current_weight -= total
+            selected.requests += 1
+            return selected
+
+    def record_success(
+        self,
+        deployment: Deployment,
+        headers: dict
+    ) -> None:
+        with self.lock:
+            deployment.consecutive_failures = 0
+            deployment.update_rate_limits(headers)
+
+    def record_failure(
+        self,
+        deployment: Deployment,
+        error: Exception
+    ) -> None:
+        """
+        Put a failing deployment on cooldown: retry-after for 429s, exponential backoff otherwise.
+        """
+        with self.lock:
+            deployment.failures += 1
+            deployment.consecutive_failures += 1
+
+            if isinstance(error, RateLimitError):
+                deployment.rate_limited += 1
+                cooldown = get_retry_after(error, self.rate_limit_cooldown)
+                get_rate_limiter(deployment.name).pause(cooldown)
+            else:
+                cooldown = min(MAX_ERROR_COOLDOWN, self.error_cooldown * 2 ** (deployment.consecutive_failures - 1))
+
+            deployment.cooldown_until = time.monotonic() + cooldown
+            _logger.warning(f"Deployment {deployment.name} failed ({type(error).__name__}), cooling down for {cooldown:.1f}s")
+
+    def call(
+        self,
+        request: Callable[[Deployment], Any],
+        tokens: int = 0,
+        priority: int = PRIORITY_NORMAL
+    ) -> Any:
+        """
+        Call request(deployment) -> raw response on the selected deployment, failing over on 429, 5xx and connection errors.
+        Each call waits for the deployment's rate limiter. Returns the parsed response.
+        """
+        tried = set()
+        last_error = None
+
+        while True:
+            deployment = self.select(exclude=tried)
+            if deployment is None:
+                raise last_error
+            tried.add(deployment)
+
+            limiter = get_rate_limiter(deployment.name)
+            limiter.acquire(tokens, priority)
+            try:
+                raw_response = request(deployment)
+            except (RateLimitError, APIConnectionError, APITimeoutError) as e:
+                self.record_failure(deployment, e)
+                last_error = e
+                continue
+            except APIStatusError as e:
+                if e.status_code < 500:
+                    raise
+                self.record_failure(deployment, e)
+                last_error = e
+                continue
+
+            self.record_success(deployment, raw_response.headers)
+            response = raw_response.parse()
+            limiter.record_usage(tokens, getattr(getattr(response, "usage", None), "total_tokens", None))
+            return response
+
+    def chat_completion(
+        self,
+        priority: int = PRIORITY_NORMAL,
+        **kwargs
+    ) -> Any:
+        """
+        Create a chat completion on the pool.
+        """
+        return self.call(
+            lambda deployment: deployment.client.chat.completions.with_raw_response.create(
+                model=deployment.deployment,
+                **kwargs
+            ),
+            tokens=estimate_request_tokens(kwargs.get("messages", []), kwargs.get("max_tokens")),
+            priority=priority
+        )
+
+    def get_health(self) -> list[dict]:
+        now = time.monotonic()
+        with self.lock:
+            return [deployment.as_dict(now) for deployment in self.deployments]
+
+
+def create_deployment_pool(
+    config: list[dict],
+    api_version: str = "2023-12-01-preview",
+    scope: str = "https://cognitiveservices.azure.com/.default",
+    azure_credential: TokenCredential = None
+) -> DeploymentPool:
+    """
+    Create a deployment pool from a list of {"endpoint", "deployment", "weight"} objects.
+    Deployments on the same endpoint share one client.
+    """
+    if not azure_credential:
+        azure_credential = get_azure_credential()
+    token_provider = get_bearer_token_provider(azure_credential, scope)
+
+    clients = dict()
+    deployments = []
+    for entry in config:
+        endpoint = entry["endpoint"]
+        if endpoint not in clients:
+            clients[endpoint] = AzureOpenAI(
+                api_version=api_version,
+                azure_ad_token_provider=token_provider,
+                azure_endpoint=endpoint,
+                max_retries=0  # Failover is handled by the pool
+            )
+        deployments.append(Deployment(
+            endpoint=endpoint,
+            deployment=entry["deployment"],
+            weight=float(entry.get("weight", 1)),
+            client=clients[endpoint]
+        ))
+
+    return DeploymentPool(deployments)
+
+
+default_pool = None
+default_pool_lock = threading.Lock()
+
+
+def get_default_deployment_pool() -> DeploymentPool:
+    """
+    Deployment pool shared by all AOAI clients of the process, or None if AOAI_DEPLOYMENTS is not set.
+    """
+    global default_pool
+    if not AOAI_DEPLOYMENTS:
+        return None
+
+    with default_pool_lock:
+        if default_pool is None:
+            default_pool = create_deployment_pool(json.loads(AOAI_DEPLOYMENTS))
+            _logger.info(f"AOAI deployment pool: {[d.name for d in default_pool.deployments]}")
+    return default_pool
@@ -0,0 +1,239 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import re
+import time
+import logging
+from collections import OrderedDict
+from typing import Callable
+
+"""
+Server-side dialog state for multi-turn slot filling.
+
+When an intent is missing required entities (slots), the pending intent is stored per session.
+A follow-up turn that only supplies the missing values (e.g. "My order number is 12345") is then
+resolved with local entity extraction, without running the full orchestration pipeline again.
+Any other turn (e.g. "What is the status of order 12345?") clears the pending intent and goes
+through the full pipeline, even if it contains a slot value.
+"""
+
+_logger = logging.getLogger(__name__)
+
+DIALOG_STATE_TTL = float(os.environ.get("DIALOG_STATE_TTL", "600"))
+DIALOG_STATE_MAX_SESSIONS = int(os.environ.get("DIALOG_STATE_MAX_SESSIONS", "10000"))
+
+# Required slots per intent:
+INTENT_SLOTS = {
+    "OrderStatus": ["OrderId"],
+    "CancelOrder": ["OrderId"],
+    "RefundStatus": ["OrderId"]
+}
+
+ORDER_ID_REGEX = re.compile(r"\b\d{3,}\b")
+WORD_REGEX = re.compile(r"\w+", re.UNICODE)
+
+# Words a reply that only supplies slot values may contain besides the values:
+SLOT_FILLER_WORDS = {
+    "a", "and", "id", "is", "it", "it's", "its", "my", "no", "nr", "num", "number", "ok", "okay",
+    "order", "s", "sure", "that", "the", "this", "here", "yes", "yeah", "sorry", "please", "thanks",
+    "of", "mine", "was", "i", "think", "oh", "right", "thank", "you", "one"
+}
+
+
+def extract_order_id(text: str) -> str:
+    """
+    Extract an order number from text.
+    """
+    match = ORDER_ID_REGEX.search(text)
+    return match.group() if match else None
+
+
+# Local slot extractors: slot -> text -> value
+SLOT_EXTRACTORS = {
+    "OrderId": extract_order_id
+}
+
+
+def is_slot_only(
+    text: str,
+    values: list[str]
+) -> bool:
+    """
+    Whether text contains nothing but the slot values and filler words.
+    """
+    for value in values:
+        text = text.replace(value, " ")
+    return all(word in SLOT_FILLER_WORDS for word in WORD_REGEX.findall(text.lower()))
+
+
+def get_missing_slots(
+    intent: str,
+    entities: list[dict]
+) -> list[str]:
+    """
+    Required slots of intent that are not among the recognized entities.
+    """
+    categories = {entity.get("category") or entity.get("name") for entity in entities}
+    return [slot for slot in INTENT_SLOTS.get(intent, []) if slot not in categories]
+
+
+def create_slot_entity(
+    slot: str,
+    value: str
+) -> dict:
+    """
+    Entity in the CLU result shape (with the triage agent's "name" key).
+    """
+    return {
+        "category": slot,
+        "name": slot,
+        "text": value,
+        "confidenceScore": 1.0
+    }
+
+
+class DialogState():
+    """
+    Pending intent of a session, waiting for missing slots.
+    """
+
+    def __init__(
+        self,
+        intent: str,
+        missing_slots: list[str],
+        entities: list[dict] = None,
+        language: str = None
+    ):
+        self.intent = intent
+        self.missing_slots = missing_slots
+        self.entities = entities or []
+        self.language = language
+        self.updated_at = time.monotonic()
+
+    def fill(
+        self,
+        text: str,
+        extractors: dict[str, Callable[[str], str]] = SLOT_EXTRACTORS
+    ) -> list[dict]:
+        """
+        Fill the missing slots from text. Returns the complete entities, or None if a slot is still missing
+        or text says more than the slot values (a new request that must be routed).
+        """
+        entities = list(self.entities)
+        values = []
+        for slot in self.missing_slots:
+            extractor = extractors.get(slot)
+            value = extractor(text) if extractor else None
+            if value is None:
+                return None
+            values.append(value)
+            entities.append(create_slot_entity(slot, value))
+
+        if not is_slot_only(text, values):
+            return None
+        return entities
+
+
+class DialogStateStore():
+    """
+    In-memory, TTL-bounded dialog states keyed by session ID.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DIALOG_STATE_TTL,
+        max_sessions: int = DIALOG_STATE_MAX_SESSIONS
+    ):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.states = OrderedDict()
+
+    def get(
+        self,
+        session_id: str
+    ) -> DialogState:
+        """
+        Get the pending dialog state of a session, if not expired.
+        """
+        if not session_id:
+            return None
+
+        state = self.states.get(session_id)
+        if state is None:
+            return None
+
+        if time.monotonic() - state.updated_at > self.ttl:
+            del self.states[session_id]
+            return None
+        return state
+
+    def set_pending(
+        self,
+        session_id: str,
+        intent: str,
+        entities: list[dict],
+        language: str = None
+    ) -> DialogState:
+        """
+        Remember the intent of a session if it is missing required slots; clear the session otherwise.
+        """
+        if not session_id:
+            return None
+
+        missing_slots = get_missing_slots(intent, entities)
+        if not missing_slots:
+            self.clear(session_id)
+            return None
+
+        state = DialogState(intent, missing_slots, entities, language)
+        self.states[session_id] = state
+        self.states.move_to_end(session_id)
+        while len(self.states) > self.max_sessions:
+            self.states.popitem(last=False)
+
+        _logger.info(f"Session {session_id} waiting for {missing_slots} of intent {intent}")
+        return state
+
+    def set_first_pending(
+        self,
+        session_id: str,
+        intents: list[tuple[str, list[dict]]],
+        language: str = None
+    ) -> DialogState:
+        """
+        Remember the first of a message's intents that is missing required slots; clear the session if none is.
+        Later utterances of the message (complete or not) do not replace it, as the follow-up answers the first
+        question asked.
+        """
+        for intent, entities in intents:
+            if get_missing_slots(intent, entities):
+                return self.set_pending(session_id, intent, entities, language)
+
+        self.clear(session_id)
+        return None
+
+    def clear(
+        self,
+        session_id: str
+    ) -> None:
+        self.states.pop(session_id, None)
+
+    def resolve(
+        self,
+        session_id: str,
+        text: str
+    ) -> tuple[str, list[dict]]:
+        """
+        Resolve a follow-up turn of a session locally.
+        Returns the pending intent and complete entities, or None if the turn does not only fill the
+        missing slots (the pending intent is then dropped, and the turn must be routed).
+        """
+        state = self.get(session_id)
+        if state is None:
+            return None
+
+        entities = state.fill(text)
+        self.clear(session_id)
+        if entities is None:
+            return None
+        return state.intent, entities
@@ -0,0 +1,249 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import re
+import math
+import hashlib
+import logging
+import threading
+from array import array
+from collections import OrderedDict
+from openai import AzureOpenAI
+from azure.core.credentials import TokenCredential
+from azure.identity import get_bearer_token_provider
+from rate_limiter import PRIORITY_HIGH, get_rate_limiter
+from utils import get_azure_credential
+
+"""
+Embedding service with an LRU cache and batched embedding requests.
+
+Cached vectors are stored as float32 arrays (6 KB for 1536 dimensions instead of ~48 KB as a
+list of Python floats), and returned as lists of floats.
+
+Queries are embedded client-side (instead of by the search service vectorizer), so one vector
+per query can be reused by search, a semantic cache or an embedding router. LocalEmbedder is a
+deterministic, dependency-free embedder for tests and offline runs.
+"""
+
+_logger = logging.getLogger(__name__)
+
+EMBEDDING_DEPLOYMENT_NAME = os.environ.get("EMBEDDING_DEPLOYMENT_NAME")
+EMBEDDING_MODEL_NAME = os.environ.get("EMBEDDING_MODEL_NAME", "")
+EMBEDDING_MODEL_DIMENSIONS = int(os.environ.get("EMBEDDING_MODEL_DIMENSIONS", "1536"))
+# AOAI embeds with the embedding deployment, LOCAL with LocalEmbedder, SERVICE leaves vectorization to the search service
+EMBEDDING_MODE = os.environ.get("EMBEDDING_MODE", "AOAI" if EMBEDDING_DEPLOYMENT_NAME else "SERVICE").upper()
+EMBEDDING_CACHE_SIZE = int(os.environ.get("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", "64"))
+
+TOKEN_REGEX = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize(vector: list[float]) -> list[float]:
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector] if norm else vector
+
+
+def accepts_dimensions(model_name: str) -> bool:
+    """
+    Only text-embedding-3 models accept a dimensions parameter; other models embed at their native size.
+    """
+    return model_name.startswith("text-embedding-3")
+
+
+def cosine_similarity(
+    a: list[float],
+    b: list[float]
+) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class AzureOpenAIEmbedder():
+    """
+    Embedder calling an Azure OpenAI embedding deployment.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        deployment: str,
+        dimensions: int = EMBEDDING_MODEL_DIMENSIONS,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        api_version: str = "2024-06-01",
+        scope: str = "https://cognitiveservices.azure.com/.default",
+        azure_credential: TokenCredential = None
+    ):
+        if not azure_credential:
+            azure_credential = get_azure_credential()
+        self.client = AzureOpenAI(
+            api_version=api_version,
+            azure_ad_token_provider=get_bearer_token_provider(azure_credential, scope),
+            azure_endpoint=endpoint,
+            max_retries=0  # Retries are handled by the shared rate limiter
+        )
+        self.deployment = deployment
+        self.dimensions = dimensions
+        self.extra_args = {"dimensions": dimensions} if accepts_dimensions(model_name) else {}
+
+    def embed_batch(
+        self,
+        texts: list[str]
+    ) -> list[list[float]]:
+        response = get_rate_limiter(self.deployment).call(
+            lambda: self.client.embeddings.create(
+                model=self.deployment,
+                input=texts,
+                **self.extra_args
+            ),
+            tokens=sum((len(text) + 3) // 4 for text in texts),
+            priority=PRIORITY_HIGH
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+class LocalEmbedder():
+    """
+    Deterministic feature-hashing embedder of words and character trigrams.
+    """
+
+    def __init__(
+        self,
+        dimensions: int = 256
+    ):
+        self.dimensions = dimensions
+
+    def get_features(
+        self,
+        text: str
+    ) -> list[str]:
+        words = TOKEN_REGEX.findall(text.lower())
+        trigrams = [word[i:i + 3] for word in (f"#{w}#" for w in words) for i in range(len(word) - 2)]
+        return words + trigrams
+
+    def embed_text(
+        self,
+        text: str
+    ) -> list[float]:
+        vector = [0.0] * self.dimensions
+        for feature in self.get_features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[index] += sign
+        return normalize(vector)
+
+    def embed_batch(
+        self,
+        texts: list[str]
+    ) -> list[list[float]]:
+        return [self.embed_text(text) for text in texts]
+
+
+class EmbeddingService():
+    """
+    LRU-cached, batched embeddings.
+    """
+
+    def __init__(
+        self,
+        embedder: AzureOpenAIEmbedder | LocalEmbedder,
+        cache_size: int = EMBEDDING_CACHE_SIZE,
+        batch_size: int = EMBEDDING_BATCH_SIZE
+    ):
+        self.embedder = embedder
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+        # Stats:
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0
+
+    @property
+    def dimensions(self) -> int:
+        return self.embedder.dimensions
+
+    def get_cached(
+        self,
+        text: str
+    ) -> array:
+        with self.lock:
+            vector = self.cache.get(text)
+            if vector is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.cache.move_to_end(text)
+            return vector
+
+    def put(
+        self,
+        text: str,
+        vector: array
+    ) -> None:
+        with self.lock:
+            self.cache[text] = vector
+            self.cache.move_to_end(text)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def embed(
+        self,
+        text: str
+    ) -> list[float]:
+        """
+        Embed one text.
+        """
+        return self.embed_batch([text])[0]
+
+    def embed_batch(
+        self,
+        texts: list[str]
+    ) -> list[list[float]]:
+        """
+        Embed texts, requesting only the uncached (distinct) texts in batches.
+        """
+        texts = [text.strip() for text in texts]
+        vectors = {text: self.get_cached(text) for text in dict.fromkeys(texts)}
+
+        missing = [text for text, vector in vectors.items() if vector is None]
+        for i in range(0, len(missing), self.batch_size):
+            batch = missing[i:i + self.batch_size]
+            with self.lock:
+                self.requests += 1
+            for text, vector in zip(batch, self.embedder.embed_batch(batch)):
+                vectors[text] = array("f", vector)
+                self.put(text, vectors[text])
+
+        return [vectors[text].tolist() for text in texts]
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.cache),
+                "cache_bytes": sum(vector.itemsize * len(vector) for vector in self.cache.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "embedding_requests": self.requests
+            }
+
+
+def create_embedding_service(
+    mode: str = EMBEDDING_MODE
+) -> EmbeddingService:
+    """
+    Create the embedding service for EMBEDDING_MODE, or None if the search service vectorizes queries.
+    """
+    if mode == "AOAI":
+        return EmbeddingService(AzureOpenAIEmbedder(
+            endpoint=os.environ.get("AOAI_ENDPOINT"),
+            deployment=EMBEDDING_DEPLOYMENT_NAME
+        ))
+    if mode == "LOCAL":
+        return EmbeddingService(LocalEmbedder(dimensions=EMBEDDING_MODEL_DIMENSIONS))
+    return None
@@ -0,0 +1,148 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError, wait
+from typing import Any, Callable
+from utils import get_percentile
+
+"""
+Hedged fallback for slow routers.
+
+If the router has not answered within a percentile of its recent latencies, the fallback is
+started concurrently and the first confident answer wins. A confident routing result arriving
+before the fallback finishes still wins. The losing call is cancelled if it has not started yet;
+a call already running is left to finish and its result is ignored.
+"""
+
+_logger = logging.getLogger(__name__)
+
+# PERCENTILE hedges at ROUTER_HEDGE_PERCENTILE of recent router latencies, NEVER disables hedging
+ROUTER_HEDGE_POLICY = os.environ.get("ROUTER_HEDGE_POLICY", "PERCENTILE").upper()
+ROUTER_HEDGE_PERCENTILE = float(os.environ.get("ROUTER_HEDGE_PERCENTILE", "95"))
+ROUTER_HEDGE_WINDOW = int(os.environ.get("ROUTER_HEDGE_WINDOW", "200"))
+# Hedge delay until enough latencies are recorded, and lower bound of the delay:
+ROUTER_HEDGE_INITIAL_DELAY = float(os.environ.get("ROUTER_HEDGE_INITIAL_DELAY", "3"))
+ROUTER_HEDGE_MIN_DELAY = float(os.environ.get("ROUTER_HEDGE_MIN_DELAY", "0.5"))
+ROUTER_HEDGE_MAX_WORKERS = int(os.environ.get("ROUTER_HEDGE_MAX_WORKERS", "16"))
+
+# Router latencies needed before the percentile is used
+MIN_LATENCY_SAMPLES = 20
+
+
+class RouterHedge():
+    """
+    Runs the router with a hedged fallback after a percentile latency.
+    """
+
+    def __init__(
+        self,
+        percentile: float = ROUTER_HEDGE_PERCENTILE,
+        window: int = ROUTER_HEDGE_WINDOW,
+        initial_delay: float = ROUTER_HEDGE_INITIAL_DELAY,
+        min_delay: float = ROUTER_HEDGE_MIN_DELAY,
+        max_workers: int = ROUTER_HEDGE_MAX_WORKERS
+    ):
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.latencies = deque(maxlen=window)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.lock = threading.Lock()
+
+        # Stats:
+        self.requests = 0
+        self.hedged = 0
+        self.router_won = 0
+        self.fallback_won = 0
+
+    def record_latency(
+        self,
+        seconds: float
+    ) -> None:
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def get_delay(self) -> float:
+        """
+        Seconds to wait for the router before hedging.
+        """
+        with self.lock:
+            latencies = list(self.latencies)
+        if len(latencies) < MIN_LATENCY_SAMPLES:
+            return self.initial_delay
+        return max(self.min_delay, get_percentile(latencies, self.percentile))
+
+    def run(
+        self,
+        route: Callable[[], dict],
+        fallback: Callable[[], Any],
+        is_confident: Callable[[dict], bool]
+    ) -> tuple[dict, Any]:
+        """
+        Run route(), and fallback() too if the router is slow.
+        Returns (routing result, fallback result); the fallback result is None unless the fallback won.
+        """
+        start = time.perf_counter()
+        router_future = self.executor.submit(route)
+        # Slow routers that lose the race still count towards the percentile:
+        router_future.add_done_callback(lambda _: self.record_latency(time.perf_counter() - start))
+
+        with self.lock:
+            self.requests += 1
+
+        delay = self.get_delay()
+        try:
+            return router_future.result(timeout=delay), None
+        except TimeoutError:
+            pass
+
+        _logger.info(f"Router exceeded {delay:.2f}s, starting hedged fallback")
+        with self.lock:
+            self.hedged += 1
+        fallback_future = self.executor.submit(fallback)
+
+        routing_result = None
+        pending = {router_future, fallback_future}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            if router_future in done:
+                try:
+                    routing_result = router_future.result()
+                except Exception as e:
+                    _logger.warning(f"Hedged router failed: {e}")
+                if is_confident(routing_result):
+                    fallback_future.cancel()
+                    with self.lock:
+                        self.router_won += 1
+                    return routing_result, None
+
+            if fallback_future in done:
+                if fallback_future.exception() is None:
+                    router_future.cancel()
+                    with self.lock:
+                        self.fallback_won += 1
+                    return routing_result, fallback_future.result()
+                if router_future not in pending:
+                    raise fallback_future.exception()
+
+        return routing_result, None
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            latencies = list(self.latencies)
+            stats = {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "router_won": self.router_won,
+                "fallback_won": self.fallback_won
+            }
+        stats["hedge_delay_seconds"] = round(self.get_delay(), 3)
+        if latencies:
+            stats["router_p50_seconds"] = round(get_percentile(latencies, 50), 3)
+            stats["router_p99_seconds"] = round(get_percentile(latencies, 99), 3)
+        return stats
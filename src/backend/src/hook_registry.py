@@ -0,0 +1,199 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import time
+import asyncio
+import inspect
+import logging
+from types import ModuleType
+from typing import Callable
+
+"""
+CLU intent hook registry.
+
+Maps recognized CLU intents to hook callables (sync or async) once at startup,
+and dispatches them with per-hook timeouts and a default handler.
+"""
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_HOOK_TIMEOUT = float(os.environ.get("CLU_HOOK_TIMEOUT", "10"))
+
+
+class HookStats():
+    """
+    Per-intent dispatch statistics.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.defaulted = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record(
+        self,
+        latency: float
+    ) -> None:
+        """
+        Record a completed dispatch.
+        """
+        self.calls += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "defaulted": self.defaulted,
+            "avg_latency_ms": round(1000 * self.total_latency / self.calls, 2) if self.calls else 0.0,
+            "max_latency_ms": round(1000 * self.max_latency, 2)
+        }
+
+
+class HookRegistry():
+    """
+    Intent -> hook dispatch table.
+
+    Sync hooks run in a worker thread so that hooks calling external order
+    systems do not block the event loop; async hooks are awaited directly.
+    """
+
+    def __init__(
+        self,
+        default_hook: Callable[[list[dict]], str] = None,
+        default_timeout: float = DEFAULT_HOOK_TIMEOUT
+    ):
+        self.default_hook = default_hook
+        self.default_timeout = default_timeout
+        self.hooks = dict()
+        self.timeouts = dict()
+        self.stats = dict()
+
+    def register(
+        self,
+        intent: str,
+        hook: Callable[[list[dict]], str],
+        timeout: float = None
+    ) -> None:
+        """
+        Register hook for intent.
+        """
+        if not callable(hook):
+            raise TypeError(f"Hook for intent {intent} is not callable")
+
+        self.hooks[intent] = hook
+        if timeout is not None:
+            self.timeouts[intent] = timeout
+
+    def get_timeout(
+        self,
+        intent: str
+    ) -> float:
+        return self.timeouts.get(intent, self.default_timeout)
+
+    async def call(
+        self,
+        hook: Callable[[list[dict]], str],
+        entities: list[dict],
+        timeout: float
+    ) -> str:
+        """
+        Call a sync or async hook, bounded by timeout.
+        """
+        if inspect.iscoroutinefunction(hook):
+            call = hook(entities)
+        else:
+            call = asyncio.to_thread(hook, entities)
+        return await asyncio.wait_for(call, timeout=timeout)
+
+    async def dispatch(
+        self,
+        intent: str,
+        entities: list[dict]
+    ) -> str:
+        """
+        Dispatch intent to its registered hook.
+
+        Unknown intents, hook errors and timeouts are handled by the default hook.
+        """
+        stats = self.stats.setdefault(intent, HookStats())
+        hook = self.hooks.get(intent)
+        start = time.perf_counter()
+
+        try:
+            if hook is None:
+                _logger.warning(f"No hook registered for intent: {intent}")
+                stats.defaulted += 1
+                return await self.call_default(intent, entities)
+
+            try:
+                return await self.call(hook, entities, self.get_timeout(intent))
+
+            except asyncio.TimeoutError:
+                _logger.error(f"Hook for intent {intent} timed out")
+                stats.timeouts += 1
+
+            except Exception as e:
+                _logger.error(f"Hook for intent {intent} failed: {e}")
+                stats.errors += 1
+
+            stats.defaulted += 1
+            return await self.call_default(intent, entities)
+
+        finally:
+            stats.record(time.perf_counter() - start)
+
+    async def call_default(
+        self,
+        intent: str,
+        entities: list[dict]
+    ) -> str:
+        """
+        Call default hook.
+        """
+        if self.default_hook is None:
+            return None
+
+        try:
+            return await self.call(self.default_hook, entities, self.default_timeout)
+        except Exception as e:
+            _logger.error(f"Default hook failed for intent {intent}: {e}")
+            return None
+
+    def get_stats(self) -> dict:
+        """
+        Get dispatch statistics per intent.
+        """
+        return {
+            intent: stats.as_dict() for intent, stats in self.stats.items()
+        }
+
+
+def create_hook_registry(
+    module: ModuleType
+) -> HookRegistry:
+    """
+    Create hook registry from a hooks module.
+
+    The module exposes a HOOKS mapping of intent -> callable, and optionally
+    HOOK_TIMEOUTS (intent -> seconds) and a default_hook callable.
+    """
+    registry = HookRegistry(
+        default_hook=getattr(module, "default_hook", None)
+    )
+
+    timeouts = getattr(module, "HOOK_TIMEOUTS", {})
+    for intent, hook in module.HOOKS.items():
+        registry.register(
+            intent=intent,
+            hook=hook,
+            timeout=timeouts.get(intent)
+        )
+
+    _logger.info(f"Registered hooks for intents: {list(registry.hooks)}")
+    return registry
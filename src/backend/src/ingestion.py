@@ -0,0 +1,144 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from azure.search.documents import SearchClient
+from chunking import MAXIMUM_PAGE_LENGTH, PAGE_OVERLAP_LENGTH, chunk_document, load_documents
+from embedding_service import EmbeddingService, create_embedding_service
+from retrieval_cache import RetrievalCache
+from utils import get_azure_credential
+
+"""
+Incremental push-mode ingestion into the search index.
+
+Documents are chunked locally (like the index_setup.py split skill) into chunks whose ids hash
+their content. Chunk ids already in the index are unchanged and skipped; only new or changed
+chunks are embedded (in batches) and uploaded in parallel batches, and chunks no longer produced
+by any document are deleted (only if every upload succeeded, so no content is lost). This replaces
+the blob indexer, which should not also run on the index. A pipeline given a retrieval cache
+clears it whenever it uploads or deletes chunks; caches of other processes are cleared when the
+document count changes (see retrieval_cache.py).
+
+Usage:
+cd src/backend/src/
+python ingestion.py ../../../infra/data/product_info
+"""
+
+_logger = logging.getLogger(__name__)
+
+INGESTION_BATCH_SIZE = int(os.environ.get("INGESTION_BATCH_SIZE", "100"))
+INGESTION_MAX_WORKERS = int(os.environ.get("INGESTION_MAX_WORKERS", "4"))
+
+
+class IngestionPipeline():
+    """
+    Synchronizes the search index with a set of documents.
+    """
+
+    def __init__(
+        self,
+        search_client: SearchClient,
+        embedding_service: EmbeddingService,
+        max_length: int = MAXIMUM_PAGE_LENGTH,
+        overlap: int = PAGE_OVERLAP_LENGTH,
+        batch_size: int = INGESTION_BATCH_SIZE,
+        max_workers: int = INGESTION_MAX_WORKERS,
+        retrieval_cache: RetrievalCache = None
+    ):
+        self.search_client = search_client
+        self.embedding_service = embedding_service
+        self.max_length = max_length
+        self.overlap = overlap
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.retrieval_cache = retrieval_cache
+
+    def get_indexed_ids(self) -> set[str]:
+        results = self.search_client.search(search_text="*", select=["chunk_id"])
+        return {doc["chunk_id"] for doc in results}
+
+    def get_batches(
+        self,
+        items: list
+    ) -> list[list]:
+        return [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+
+    def run_batches(
+        self,
+        action,
+        batches: list[list]
+    ) -> int:
+        """
+        Run action(batch) on batches in parallel, returning the number of failed items.
+        """
+        failed = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for results in executor.map(action, batches):
+                failed += sum(1 for result in results if not result.succeeded)
+        return failed
+
+    def run(
+        self,
+        documents: list[dict]
+    ) -> dict:
+        """
+        Ingest documents ({"title", "content"}), returning what changed.
+        """
+        start = time.perf_counter()
+        chunks = {
+            chunk["chunk_id"]: chunk
+            for document in documents
+            for chunk in chunk_document(document["title"], document["content"], self.max_length, self.overlap)
+        }
+        indexed_ids = self.get_indexed_ids()
+
+        new_chunks = [chunk for chunk_id, chunk in chunks.items() if chunk_id not in indexed_ids]
+        orphan_ids = [chunk_id for chunk_id in indexed_ids if chunk_id not in chunks]
+        _logger.info(f"{len(chunks)} chunks: {len(new_chunks)} new or changed, {len(orphan_ids)} orphaned")
+
+        vectors = self.embedding_service.embed_batch([chunk["chunk"] for chunk in new_chunks])
+        uploads = [{**chunk, "text_vector": vector} for chunk, vector in zip(new_chunks, vectors)]
+
+        failed = self.run_batches(
+            lambda batch: self.search_client.upload_documents(documents=batch),
+            self.get_batches(uploads)
+        )
+        if failed:
+            # Keep the old versions of chunks that may not have been replaced; the next run retries both:
+            _logger.warning(f"{failed} uploads failed, not deleting {len(orphan_ids)} orphaned chunks")
+            orphan_ids = []
+
+        failed += self.run_batches(
+            lambda batch: self.search_client.delete_documents(documents=[{"chunk_id": i} for i in batch]),
+            self.get_batches(orphan_ids)
+        )
+        if failed:
+            _logger.warning(f"{failed} index actions failed")
+        if self.retrieval_cache and (uploads or orphan_ids):
+            self.retrieval_cache.clear()
+
+        return {
+            "documents": len(documents),
+            "chunks": len(chunks),
+            "unchanged": len(chunks) - len(new_chunks),
+            "uploaded": len(uploads),
+            "deleted": len(orphan_ids),
+            "failed": failed,
+            "seconds": round(time.perf_counter() - start, 3)
+        }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    search_client = SearchClient(
+        endpoint=os.environ.get("SEARCH_ENDPOINT"),
+        index_name=os.environ.get("SEARCH_INDEX_NAME"),
+        credential=get_azure_credential()
+    )
+    # Chunks are embedded with the embedding deployment of the index vectorizer:
+    pipeline = IngestionPipeline(search_client, create_embedding_service("AOAI"))
+    print(pipeline.run(load_documents(sys.argv[1])))
@@ -0,0 +1,114 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import re
+import logging
+from functools import lru_cache
+from azure.ai.textanalytics import TextAnalyticsClient
+from utils import get_azure_credential
+
+"""
+Language detection with a local English heuristic and a cached Azure AI Language fallback.
+"""
+
+_logger = logging.getLogger(__name__)
+
+# Common English function words; a message made of ASCII words that contains
+# enough of these is treated as English without a service call.
+ENGLISH_WORDS = {
+    "a", "an", "the", "i", "my", "me", "you", "your", "we", "our", "it", "is", "are", "was", "were",
+    "be", "been", "am", "do", "does", "did", "have", "has", "had", "can", "could", "would", "will",
+    "what", "when", "where", "why", "how", "which", "who", "want", "need", "please", "and", "or",
+    "of", "to", "for", "on", "in", "with", "at", "from", "about", "this", "that", "not", "thanks", "thank"
+}
+
+# Domain words shared with other languages (e.g. Dutch "Wat is de status van mijn order"):
+# they are neither English nor foreign evidence.
+NEUTRAL_WORDS = {
+    "order", "orders", "status", "cancel", "refund", "return", "policy", "number", "hello", "hi", "ok", "okay"
+}
+
+# Common function words of other Latin-script languages (nl, de, es, fr, it, pt); a message
+# containing any of them is left to the service.
+FOREIGN_WORDS = {
+    "de", "het", "een", "van", "mijn", "wat", "ik", "niet", "wil", "waar", "hoe", "ben", "bestelling",
+    "der", "das", "ist", "und", "ich", "mein", "meine", "nicht", "wo", "bitte", "ein", "eine", "mit",
+    "el", "la", "los", "las", "es", "y", "mi", "que", "por", "para", "quiero", "pedido", "donde", "un", "una",
+    "le", "les", "et", "est", "je", "mon", "ma", "ou", "du", "des", "pour", "veux", "commande",
+    "il", "di", "che", "non", "voglio", "mio", "ordine", "um", "uma", "meu", "minha", "nao", "estado"
+}
+
+WORD_REGEX = re.compile(r"[^\W\d_]+", re.UNICODE)
+LOCAL_ENGLISH_THRESHOLD = float(os.environ.get("LOCAL_ENGLISH_THRESHOLD", "0.5"))
+LOCAL_ENGLISH_MIN_WORDS = int(os.environ.get("LOCAL_ENGLISH_MIN_WORDS", "3"))
+
+
+def detect_english_locally(
+    text: str,
+    threshold: float = LOCAL_ENGLISH_THRESHOLD,
+    min_words: int = LOCAL_ENGLISH_MIN_WORDS
+) -> bool:
+    """
+    Return True when text is confidently English based on function-word coverage.
+    Short, mixed or borderline messages return False, so they are confirmed by the service.
+    """
+    words = WORD_REGEX.findall(text.lower())
+    if len(words) < min_words or any(not word.isascii() or word in FOREIGN_WORDS for word in words):
+        return False
+
+    words = [word for word in words if word not in NEUTRAL_WORDS]
+    hits = sum(1 for word in words if word in ENGLISH_WORDS)
+    return hits > 0 and hits / len(words) >= threshold
+
+
+class LanguageDetector():
+    """
+    Local-first language detector.
+
+    Falls back to an LRU-cached Azure AI Language call when the local
+    heuristic is not confident and a language endpoint is configured.
+    """
+
+    def __init__(
+        self,
+        endpoint: str = None,
+        cache_size: int = 1024
+    ):
+        endpoint = endpoint or os.environ.get("LANGUAGE_ENDPOINT")
+        self.ta_client = None
+        if endpoint:
+            self.ta_client = TextAnalyticsClient(
+                endpoint=endpoint,
+                credential=get_azure_credential()
+            )
+
+        self.detect_remote = lru_cache(maxsize=cache_size)(self.call_text_analytics)
+
+    def call_text_analytics(
+        self,
+        text: str
+    ) -> str:
+        """
+        Detect language of input text using Azure AI Language.
+        """
+        result = self.ta_client.detect_language(documents=[text])
+        return result[0].primary_language.iso6391_name
+
+    def detect(
+        self,
+        text: str
+    ) -> str:
+        """
+        Detect ISO 639-1 language of text, or None if it cannot be determined.
+        """
+        if detect_english_locally(text):
+            return "en"
+
+        if self.ta_client is None:
+            return None
+
+        try:
+            return self.detect_remote(text)
+        except Exception as e:
+            _logger.error(f"Language detection failed: {e}")
+            return None
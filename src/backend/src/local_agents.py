@@ -0,0 +1,248 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import json
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import AsyncIterable, Callable
+from semantic_kernel.agents import Agent, AgentResponseItem, AgentThread
+from semantic_kernel.agents.chat_completion.chat_completion_agent import ChatHistoryAgentThread
+from semantic_kernel.contents import AuthorRole, ChatMessageContent, StreamingChatMessageContent
+from agent_envelopes import TranslationEnvelope, TriageEnvelope, get_envelope
+from translation_service import TranslationService
+
+"""
+Python-implemented group chat participants.
+
+These agents take the place of Foundry agents whose work does not need an LLM run,
+and answer with the same JSON envelopes the Foundry agents are instructed to return.
+"""
+
+_logger = logging.getLogger(__name__)
+
+
+class LocalAgent(Agent, ABC):
+    """
+    Semantic Kernel agent answering through a python respond() method instead of an LLM run.
+    """
+
+    @abstractmethod
+    async def respond(self, messages: list[ChatMessageContent]) -> str:
+        """
+        Create the agent's response content from the thread messages.
+        """
+
+    async def _invoke(
+        self,
+        messages: str | ChatMessageContent | list[str | ChatMessageContent] | None,
+        thread: AgentThread | None
+    ) -> tuple[ChatMessageContent, AgentThread]:
+        thread = await self._ensure_thread_exists_with_messages(
+            messages=messages,
+            thread=thread,
+            construct_thread=lambda: ChatHistoryAgentThread(),
+            expected_type=ChatHistoryAgentThread
+        )
+        history = [message async for message in thread.get_messages()]
+
+        message = ChatMessageContent(
+            role=AuthorRole.ASSISTANT,
+            name=self.name,
+            content=await self.respond(history)
+        )
+        await thread.on_new_message(message)
+        return message, thread
+
+    async def get_response(self, messages=None, *, thread=None, **kwargs) -> AgentResponseItem[ChatMessageContent]:
+        message, thread = await self._invoke(messages, thread)
+        return AgentResponseItem(message=message, thread=thread)
+
+    async def invoke(
+        self,
+        messages=None,
+        *,
+        thread=None,
+        on_intermediate_message=None,
+        **kwargs
+    ) -> AsyncIterable[AgentResponseItem[ChatMessageContent]]:
+        message, thread = await self._invoke(messages, thread)
+        yield AgentResponseItem(message=message, thread=thread)
+
+    async def invoke_stream(
+        self,
+        messages=None,
+        *,
+        thread=None,
+        on_intermediate_message=None,
+        **kwargs
+    ) -> AsyncIterable[AgentResponseItem[StreamingChatMessageContent]]:
+        message, thread = await self._invoke(messages, thread)
+        yield AgentResponseItem(
+            message=StreamingChatMessageContent(
+                role=message.role,
+                name=message.name,
+                content=message.content,
+                choice_index=0
+            ),
+            thread=thread
+        )
+
+
+def get_current_question(messages: list[ChatMessageContent]) -> str:
+    """
+    Get the (English) current question from the latest TranslationAgent message,
+    or the user message if no translation is available.
+    """
+    for message in reversed(messages):
+        if message.name == "TranslationAgent":
+            try:
+                return json.loads(message.content)["response"]["current_question"]
+            except Exception:
+                continue
+
+    user_messages = [m for m in messages if m.role == AuthorRole.USER and not str(m.content).startswith("Transferred to")]
+    return str(user_messages[0].content) if user_messages else ""
+
+
+def create_clu_envelope(result: dict) -> dict:
+    """
+    Wrap a CLU router result in the TriageAgent clu_result envelope.
+    """
+    entities = [dict(entity, name=entity.get("category")) for entity in result["entities"]]
+    return {
+        "type": "clu_result",
+        "response": {
+            "kind": "ConversationalAIResult",
+            "result": {
+                "conversations": [{
+                    "intents": [{"name": result["intent"], "confidenceScore": result["confidence"]}],
+                    "entities": entities
+                }]
+            }
+        },
+        "terminated": "False"
+    }
+
+
+def create_cqa_envelope(result: dict) -> dict:
+    """
+    Wrap a CQA router result in the TriageAgent cqa_result envelope.
+    """
+    return {
+        "type": "cqa_result",
+        "response": {
+            "answers": [{
+                "answer": result["answer"],
+                "confidenceScore": result["confidence"],
+                "questions": [result["question"]] if result["question"] else []
+            }]
+        },
+        "terminated": "True"
+    }
+
+
+class DirectTriageAgent(LocalAgent):
+    """
+    TriageAgent calling the CLU and CQA runtimes in parallel from python.
+    """
+    clu_router: Callable[[str, str, str], dict]
+    cqa_router: Callable[[str, str, str], dict]
+
+    async def triage(self, question: str) -> dict:
+        """
+        Call both runtimes and return the envelope of the most confident usable result.
+        """
+        if question.startswith("query: "):
+            question = question[len("query: "):]
+
+        clu_result, cqa_result = await asyncio.gather(
+            asyncio.to_thread(self.clu_router, question, "en", "1"),
+            asyncio.to_thread(self.cqa_router, question, "en", "1")
+        )
+
+        candidates = []
+        if "intent" in clu_result:
+            candidates.append((clu_result["error"] is None, clu_result["confidence"], create_clu_envelope(clu_result)))
+        if "answer" in cqa_result:
+            candidates.append((cqa_result["error"] is None, cqa_result["confidence"], create_cqa_envelope(cqa_result)))
+
+        if not candidates:
+            raise ValueError(f"Triage failed: CLU error {clu_result.get('error')}, CQA error {cqa_result.get('error')}")
+
+        # Prefer results that passed their router's checks, then higher confidence:
+        _, _, envelope = max(candidates, key=lambda c: (c[0], c[1]))
+        return envelope
+
+    async def respond(self, messages: list[ChatMessageContent]) -> str:
+        envelope = await self.triage(get_current_question(messages))
+        _logger.info(f"Direct triage result: {envelope['type']}")
+        return json.dumps(envelope)
+
+
+def get_answer_to_translate(messages: list[ChatMessageContent]) -> tuple[str, str, str]:
+    """
+    Get the English final answer, need_more_info flag and user language from the messages after the initial translation.
+    Returns None if there is no answer to translate yet.
+    """
+    origin_language = next(
+        (e.origin_language for e in map(get_envelope, messages) if isinstance(e, TranslationEnvelope)),
+        None
+    )
+
+    for message in reversed(messages):
+        if message.role == AuthorRole.USER and str(message.content).startswith("Transferred to"):
+            continue
+        if message.role == AuthorRole.USER or message.name == "TranslationAgent":
+            return None
+
+        envelope = get_envelope(message)
+        if isinstance(envelope, TriageEnvelope):
+            if envelope.type != "cqa_result":
+                continue
+            return envelope.answer["answer"], "False", origin_language or "en"
+
+        # Custom agent answers, as sent by the agent or by its context policy:
+        try:
+            parsed = json.loads(message.content)
+        except (TypeError, json.JSONDecodeError):
+            continue
+        if isinstance(parsed, dict) and isinstance(parsed.get("response"), str):
+            return parsed["response"], parsed.get("need_more_info", "False"), parsed.get("origin_language", origin_language or "en")
+    return None
+
+
+class DirectTranslationAgent(LocalAgent):
+    """
+    TranslationAgent calling Azure AI Translator from python through the translation cache.
+    """
+    translation_service: TranslationService
+
+    async def respond(self, messages: list[ChatMessageContent]) -> str:
+        answer = get_answer_to_translate(messages)
+
+        # Translate the final answer back to the user's language
+        if answer is not None:
+            final_answer, need_more_info, language = answer
+            translation = await asyncio.to_thread(self.translation_service.translate_answer, final_answer, language)
+            return json.dumps({
+                "origin_language": language,
+                "source_language": "en",
+                "response": {
+                    "final_answer": translation,
+                    "need_more_info": need_more_info
+                }
+            }, ensure_ascii=False)
+
+        # Translate the user message to English
+        question = get_current_question(messages)
+        if question.startswith("query: "):
+            question = question[len("query: "):]
+
+        translation, language = await asyncio.to_thread(self.translation_service.translate_to_english, question)
+        return json.dumps({
+            "origin_language": language or "en",
+            "response": {
+                "current_question": translation
+            },
+            "target_language": "en"
+        }, ensure_ascii=False)
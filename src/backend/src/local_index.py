@@ -0,0 +1,253 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import re
+import json
+import math
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+import numpy as np
+from collections import Counter, defaultdict
+from embedding_service import EmbeddingService
+
+"""
+In-process hybrid search index.
+
+Chunk vectors are stored as float32 or int8 (per-vector scale) in a memory-mapped .npy file and
+scored with a single matrix-vector product. Keyword scores are BM25 over precomputed postings.
+Like Azure AI Search hybrid queries, the vector and keyword rankings are fused with reciprocal
+rank fusion (RRF), and the fused score is returned as the result score.
+"""
+
+_logger = logging.getLogger(__name__)
+
+# BM25 parameters (Azure AI Search defaults):
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Reciprocal rank fusion constant:
+RRF_K = 60
+
+TOKEN_REGEX = re.compile(r"\w+", re.UNICODE)
+
+CHUNKS_FILE = "chunks.json"
+VECTORS_FILE = "vectors.npy"
+SCALES_FILE = "scales.npy"
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_REGEX.findall(text.lower())
+
+
+def quantize(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric int8 quantization with one scale per vector.
+    """
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1.0
+    quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def get_top(
+    scores: np.ndarray,
+    k: int
+) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first.
+    """
+    k = min(k, len(scores))
+    if k == 0:
+        return np.array([], dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class BM25Index():
+    """
+    BM25 keyword index with per-posting weights computed at build time.
+    """
+
+    def __init__(
+        self,
+        texts: list[str],
+        k1: float = BM25_K1,
+        b: float = BM25_B
+    ):
+        self.size = len(texts)
+        term_counts = [Counter(tokenize(text)) for text in texts]
+        lengths = np.array([sum(counts.values()) for counts in term_counts], dtype=np.float32)
+        average_length = float(lengths.mean()) if self.size else 0.0
+
+        postings = defaultdict(lambda: ([], []))
+        for i, counts in enumerate(term_counts):
+            for term, count in counts.items():
+                postings[term][0].append(i)
+                postings[term][1].append(count)
+
+        self.postings = {}
+        for term, (ids, counts) in postings.items():
+            ids = np.array(ids, dtype=np.int64)
+            counts = np.array(counts, dtype=np.float32)
+            idf = math.log(1 + (self.size - len(ids) + 0.5) / (len(ids) + 0.5))
+            norms = k1 * (1 - b + b * lengths[ids] / max(average_length, 1e-9))
+            self.postings[term] = (ids, idf * counts * (k1 + 1) / (counts + norms))
+
+        # Memory of the posting arrays (ids and weights):
+        self.nbytes = sum(ids.nbytes + weights.nbytes for ids, weights in self.postings.values())
+
+    def score(
+        self,
+        query: str
+    ) -> np.ndarray:
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            if term in self.postings:
+                ids, weights = self.postings[term]
+                scores[ids] += weights
+        return scores
+
+
+class LocalSearchIndex():
+    """
+    Hybrid (vector + BM25) index of chunks, with memory-mapped vectors.
+    """
+
+    def __init__(
+        self,
+        chunks: list[dict],
+        vectors: np.ndarray,
+        scales: np.ndarray,
+        embedding_service: EmbeddingService,
+        path: str
+    ):
+        self.chunks = chunks
+        self.vectors = vectors
+        self.scales = scales
+        self.embedding_service = embedding_service
+        self.path = path
+        # Directory removed with the index (set by build when no path is given):
+        self.temporary_directory = None
+        self.keywords = BM25Index([chunk["chunk"] for chunk in chunks])
+        self.version = hashlib.blake2b(
+            "|".join(chunk["chunk_id"] for chunk in chunks).encode("utf-8"), digest_size=8
+        ).hexdigest()
+        self.lock = threading.Lock()
+
+        # Stats:
+        self.queries = 0
+        self.query_time = 0.0
+
+    @classmethod
+    def build(
+        cls,
+        chunks: list[dict],
+        embedding_service: EmbeddingService,
+        quantization: str = "float32",
+        path: str = None
+    ) -> "LocalSearchIndex":
+        """
+        Embed chunks and write their vectors to a memory-mapped file in path.
+        Chunks already carrying a text_vector are not embedded again.
+
+        Without a path, the index is written to a temporary directory that is removed with the index.
+        """
+        temporary_directory = None
+        if path is None:
+            temporary_directory = tempfile.TemporaryDirectory(prefix="local-index-")
+            path = temporary_directory.name
+        os.makedirs(path, exist_ok=True)
+
+        missing = [chunk["chunk"] for chunk in chunks if chunk.get("text_vector") is None]
+        embedded = iter(embedding_service.embed_batch(missing) if missing else [])
+        vectors = np.array(
+            [chunk["text_vector"] if chunk.get("text_vector") is not None else next(embedded) for chunk in chunks],
+            dtype=np.float32
+        ).reshape(len(chunks), embedding_service.dimensions)
+        # Stored vectors are unit length, so cosine similarity is a dot product:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+
+        if quantization == "int8":
+            vectors, scales = quantize(vectors)
+        elif quantization == "float32":
+            scales = np.ones(len(chunks), dtype=np.float32)
+        else:
+            raise ValueError(f"Unknown quantization: {quantization}")
+
+        stored = np.lib.format.open_memmap(os.path.join(path, VECTORS_FILE), mode="w+", dtype=vectors.dtype, shape=vectors.shape)
+        stored[:] = vectors
+        stored.flush()
+        np.save(os.path.join(path, SCALES_FILE), scales)
+        with open(os.path.join(path, CHUNKS_FILE), "w", encoding="utf-8") as f:
+            json.dump([{k: v for k, v in chunk.items() if k != "text_vector"} for chunk in chunks], f)
+
+        _logger.info(f"Built local index of {len(chunks)} chunks ({quantization}) in {path}")
+        index = cls.load(path, embedding_service)
+        index.temporary_directory = temporary_directory
+        return index
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        embedding_service: EmbeddingService
+    ) -> "LocalSearchIndex":
+        """
+        Open an index written by build (vectors are memory-mapped read-only).
+        """
+        with open(os.path.join(path, CHUNKS_FILE), "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+        vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+        scales = np.load(os.path.join(path, SCALES_FILE))
+        return cls(chunks, vectors, scales, embedding_service, path)
+
+    @property
+    def quantization(self) -> str:
+        return "int8" if self.vectors.dtype == np.int8 else "float32"
+
+    def search(
+        self,
+        query: str,
+        top: int = 5,
+        k_nearest_neighbors: int = 50
+    ) -> list[dict]:
+        """
+        Hybrid query: the top k_nearest_neighbors vector and keyword matches fused with RRF.
+        """
+        start = time.perf_counter()
+
+        query_vector = np.asarray(self.embedding_service.embed(query), dtype=np.float32)
+        vector_scores = (self.vectors @ query_vector) * self.scales
+        keyword_scores = self.keywords.score(query)
+
+        fused = defaultdict(float)
+        for rank, i in enumerate(get_top(vector_scores, k_nearest_neighbors)):
+            fused[int(i)] += 1 / (RRF_K + rank + 1)
+        keyword_top = get_top(keyword_scores, k_nearest_neighbors)
+        for rank, i in enumerate(keyword_top[keyword_scores[keyword_top] > 0]):
+            fused[int(i)] += 1 / (RRF_K + rank + 1)
+
+        results = [
+            {**self.chunks[i], "score": score}
+            for i, score in sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top]
+        ]
+
+        with self.lock:
+            self.queries += 1
+            self.query_time += time.perf_counter() - start
+        return results
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "chunks": len(self.chunks),
+                "dimensions": int(self.vectors.shape[1]) if self.vectors.ndim == 2 else 0,
+                "quantization": self.quantization,
+                "vector_bytes": int(self.vectors.nbytes + self.scales.nbytes),
+                "keyword_bytes": int(self.keywords.nbytes),
+                "queries": self.queries,
+                "average_query_ms": round(1000 * self.query_time / self.queries, 3) if self.queries else 0.0
+            }
@@ -0,0 +1,197 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import re
+import hashlib
+import logging
+import threading
+
+"""
+RAG context assembly.
+
+The index is chunked with overlapping pages (2000 characters, 500 overlap), so top search results
+often repeat the same text. Before prompting, chunks of the same document that overlap are merged,
+near-duplicates are removed by word shingle containment, and the remaining sources are packed
+into a token budget in score order.
+"""
+
+_logger = logging.getLogger(__name__)
+
+RAG_CONTEXT_TOKENS = int(os.environ.get("RAG_CONTEXT_TOKENS", "2000"))
+RAG_DEDUP_THRESHOLD = float(os.environ.get("RAG_DEDUP_THRESHOLD", "0.8"))
+
+SHINGLE_SIZE = 5
+# Shortest prefix/suffix overlap considered a chunk boundary overlap:
+MIN_OVERLAP_CHARS = 50
+# Smallest remaining budget worth filling with a truncated source:
+MIN_TRUNCATED_TOKENS = 100
+
+WORD_REGEX = re.compile(r"\w+", re.UNICODE)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of text (~4 characters per token for English text).
+    """
+    return (len(text) + 3) // 4
+
+
+def get_shingles(text: str) -> set[int]:
+    """
+    Hashed word shingles of text.
+    """
+    words = WORD_REGEX.findall(text.lower())
+    shingles = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))]
+    return {int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles}
+
+
+def get_containment(
+    shingles: set[int],
+    other: set[int]
+) -> float:
+    """
+    Share of shingles that also appear in other.
+    """
+    return len(shingles & other) / len(shingles) if shingles else 1.0
+
+
+def merge_overlap(
+    first: str,
+    second: str
+) -> str:
+    """
+    Merge two chunks if one contains the other or the end of first overlaps the start of second.
+    Returns None if they do not overlap.
+    """
+    if second in first:
+        return first
+    if first in second:
+        return second
+
+    # The overlap starts where the head of second appears in the tail of first:
+    head = second[:MIN_OVERLAP_CHARS]
+    start = first.find(head, max(0, len(first) - len(second)))
+    while start != -1:
+        if second.startswith(first[start:]):
+            return first + second[len(first) - start:]
+        start = first.find(head, start + 1)
+    return None
+
+
+def merge_chunks(documents: list[dict]) -> list[dict]:
+    """
+    Merge overlapping chunks of the same parent document, keeping the best score.
+    """
+    merged = [dict(document) for document in documents]
+
+    # Repeat until no pair merges, since a merged chunk can bridge two others:
+    changed = True
+    while changed:
+        changed = False
+        for i, first in enumerate(merged):
+            for j in range(i + 1, len(merged)):
+                second = merged[j]
+                if first.get("parent_id") is None or first.get("parent_id") != second.get("parent_id"):
+                    continue
+
+                chunk = merge_overlap(first["chunk"], second["chunk"]) or merge_overlap(second["chunk"], first["chunk"])
+                if chunk is not None:
+                    first["chunk"] = chunk
+                    first["score"] = max(first.get("score") or 0, second.get("score") or 0)
+                    del merged[j]
+                    changed = True
+                    break
+            if changed:
+                break
+    return merged
+
+
+def remove_near_duplicates(
+    documents: list[dict],
+    threshold: float
+) -> list[dict]:
+    """
+    Drop documents whose shingles are mostly contained in a better-scored document
+    (near-duplicates, or copies of a chunk another source already covers).
+    """
+    kept = []
+    kept_shingles = []
+    for document in documents:
+        shingles = get_shingles(document["chunk"])
+        if any(get_containment(shingles, other) >= threshold for other in kept_shingles):
+            continue
+        kept.append(document)
+        kept_shingles.append(shingles)
+    return kept
+
+
+def truncate(
+    text: str,
+    max_tokens: int
+) -> str:
+    """
+    Truncate text to max_tokens, at a sentence or word boundary when possible.
+    """
+    text = text[:max_tokens * 4]
+    boundary = max(text.rfind(". "), text.rfind("\n"))
+    if boundary > len(text) // 2:
+        return text[:boundary + 1]
+    return text.rsplit(" ", 1)[0]
+
+
+class RagContextAssembler():
+    """
+    Merges, deduplicates and packs search results into a token budget.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = RAG_CONTEXT_TOKENS,
+        dedup_threshold: float = RAG_DEDUP_THRESHOLD
+    ):
+        self.max_tokens = max_tokens
+        self.dedup_threshold = dedup_threshold
+        self.lock = threading.Lock()
+
+        # Stats:
+        self.calls = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    def assemble(
+        self,
+        documents: list[dict]
+    ) -> list[dict]:
+        """
+        Assemble the sources of a RAG prompt from search results (ordered by score).
+        """
+        sources = merge_chunks(documents)
+        sources = sorted(sources, key=lambda d: d.get("score") or 0, reverse=True)
+        sources = remove_near_duplicates(sources, self.dedup_threshold)
+
+        packed = []
+        budget = self.max_tokens
+        for source in sources:
+            tokens = estimate_tokens(source["chunk"])
+            if tokens <= budget:
+                packed.append(source)
+                budget -= tokens
+            elif budget >= MIN_TRUNCATED_TOKENS or not packed:
+                packed.append({**source, "chunk": truncate(source["chunk"], budget)})
+                break
+
+        with self.lock:
+            self.calls += 1
+            self.tokens_before += sum(estimate_tokens(d["chunk"]) for d in documents)
+            self.tokens_after += sum(estimate_tokens(d["chunk"]) for d in packed)
+        return packed
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            calls = max(1, self.calls)
+            return {
+                "calls": self.calls,
+                "max_tokens": self.max_tokens,
+                "source_tokens_per_call_before": round(self.tokens_before / calls, 1),
+                "source_tokens_per_call_after": round(self.tokens_after / calls, 1)
+            }
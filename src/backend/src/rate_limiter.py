@@ -0,0 +1,299 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import json
+import time
+import heapq
+import logging
+import itertools
+import threading
+from typing import Any, Callable
+from openai import APIConnectionError, APIStatusError, RateLimitError
+
+"""
+Client-side rate limiting of Azure OpenAI calls.
+
+Each deployment gets a requests-per-minute and a tokens-per-minute token bucket shared by all
+clients of the process. Calls wait in a priority queue until both buckets can cover them, instead
+of sending requests that would be throttled. A 429 pauses the deployment for its retry-after,
+so every queued caller backs off together instead of retrying blindly.
+"""
+
+_logger = logging.getLogger(__name__)
+
+# Default limits per deployment, 0 disables the bucket:
+AOAI_RPM = int(os.environ.get("AOAI_RPM", "0"))
+AOAI_TPM = int(os.environ.get("AOAI_TPM", "0"))
+# Per-deployment overrides, e.g. {"gpt-4o": {"rpm": 300, "tpm": 50000}}
+AOAI_RATE_LIMITS = json.loads(os.environ.get("AOAI_RATE_LIMITS", "{}"))
+AOAI_MAX_RATE_LIMIT_RETRIES = int(os.environ.get("AOAI_MAX_RATE_LIMIT_RETRIES", "3"))
+AOAI_DEFAULT_RETRY_AFTER = float(os.environ.get("AOAI_DEFAULT_RETRY_AFTER", "5"))
+
+# Expected completion tokens of requests without max_tokens
+DEFAULT_COMPLETION_TOKENS = 500
+
+# Priorities (lower goes first):
+PRIORITY_HIGH = 0        # user-facing extraction and routing
+PRIORITY_NORMAL = 1      # fallback answers
+PRIORITY_BACKGROUND = 2  # background work
+
+
+def get_retry_after(
+    error: APIStatusError,
+    default: float
+) -> float:
+    """
+    Cooldown from the retry-after(-ms) headers of an error response.
+    """
+    headers = error.response.headers if error.response is not None else {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return default
+
+
+def get_message_content(message: Any) -> str:
+    if isinstance(message, dict):
+        content = message.get("content")
+    else:
+        content = getattr(message, "content", None)
+    return content if isinstance(content, str) else json.dumps(content, default=str) if content else ""
+
+
+def estimate_request_tokens(
+    messages: list,
+    max_tokens: int = None
+) -> int:
+    """
+    Estimate the tokens a chat completion counts against the TPM limit: the prompt
+    (~4 characters per token, plus per-message overhead) and the expected completion.
+    """
+    prompt_tokens = sum((len(get_message_content(message)) + 3) // 4 + 4 for message in messages)
+    return prompt_tokens + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+class TokenBucket():
+    """
+    Bucket of capacity per minute, refilled continuously.
+    """
+
+    def __init__(
+        self,
+        capacity: float
+    ):
+        self.capacity = capacity
+        self.available = capacity
+        self.updated_at = time.monotonic()
+
+    def refill(
+        self,
+        now: float
+    ) -> None:
+        self.available = min(self.capacity, self.available + (now - self.updated_at) * self.capacity / 60)
+        self.updated_at = now
+
+    def get_wait_time(
+        self,
+        amount: float
+    ) -> float:
+        """
+        Seconds until amount is available (amounts above the capacity wait for a full bucket).
+        """
+        missing = min(amount, self.capacity) - self.available
+        return max(0.0, missing * 60 / self.capacity)
+
+    def consume(
+        self,
+        amount: float
+    ) -> None:
+        # Allow a negative balance for amounts above the capacity (and usage corrections):
+        self.available -= amount
+
+
+class DeploymentRateLimiter():
+    """
+    RPM/TPM limiter of one deployment with a priority queue of waiting calls.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rpm: int = 0,
+        tpm: int = 0,
+        default_retry_after: float = AOAI_DEFAULT_RETRY_AFTER
+    ):
+        self.name = name
+        self.buckets = {
+            "requests": TokenBucket(rpm) if rpm else None,
+            "tokens": TokenBucket(tpm) if tpm else None
+        }
+        self.default_retry_after = default_retry_after
+        self.paused_until = 0.0
+        self.condition = threading.Condition()
+        self.waiters = []
+        self.sequence = itertools.count()
+
+        # Stats:
+        self.calls = 0
+        self.queued = 0
+        self.wait_time = 0.0
+        self.rate_limited = 0
+
+    def get_wait_time(
+        self,
+        tokens: int,
+        now: float
+    ) -> float:
+        wait_time = max(0.0, self.paused_until - now)
+        for name, amount in [("requests", 1), ("tokens", tokens)]:
+            bucket = self.buckets[name]
+            if bucket:
+                bucket.refill(now)
+                wait_time = max(wait_time, bucket.get_wait_time(amount))
+        return wait_time
+
+    def acquire(
+        self,
+        tokens: int,
+        priority: int = PRIORITY_NORMAL
+    ) -> float:
+        """
+        Wait until the deployment can take a call of tokens, served by priority then arrival.
+        Returns the seconds waited.
+        """
+        start = time.monotonic()
+        with self.condition:
+            entry = (priority, next(self.sequence))
+            heapq.heappush(self.waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait_time = self.get_wait_time(tokens, now)
+                    if self.waiters[0] == entry and wait_time == 0:
+                        break
+                    # Wake up when the buckets refill, or when the head of the queue changes:
+                    self.condition.wait(wait_time if self.waiters[0] == entry else None)
+            finally:
+                self.waiters.remove(entry)
+                heapq.heapify(self.waiters)
+                self.condition.notify_all()
+
+            for name, amount in [("requests", 1), ("tokens", tokens)]:
+                if self.buckets[name]:
+                    self.buckets[name].consume(amount)
+
+            waited = time.monotonic() - start
+            self.calls += 1
+            if waited > 0.001:
+                self.queued += 1
+                self.wait_time += waited
+            return waited
+
+    def record_usage(
+        self,
+        estimated_tokens: int,
+        used_tokens: int
+    ) -> None:
+        """
+        Correct the token bucket by the actual usage of a call.
+        """
+        with self.condition:
+            if self.buckets["tokens"] and used_tokens is not None:
+                self.buckets["tokens"].consume(used_tokens - estimated_tokens)
+                self.condition.notify_all()
+
+    def pause(
+        self,
+        seconds: float
+    ) -> None:
+        """
+        Hold every queued call of the deployment for seconds (after a 429).
+        """
+        with self.condition:
+            self.rate_limited += 1
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.condition.notify_all()
+        _logger.warning(f"Deployment {self.name} throttled, pausing calls for {seconds:.1f}s")
+
+    def call(
+        self,
+        request: Callable[[], Any],
+        tokens: int,
+        priority: int = PRIORITY_NORMAL,
+        max_retries: int = AOAI_MAX_RATE_LIMIT_RETRIES
+    ) -> Any:
+        """
+        Call request() -> response once the limits allow it, retrying 429s after their retry-after
+        and transient (5xx, connection) errors with exponential backoff.
+        """
+        for attempt in range(max_retries + 1):
+            self.acquire(tokens, priority)
+            try:
+                response = request()
+            except RateLimitError as e:
+                self.pause(get_retry_after(e, self.default_retry_after))
+                if attempt == max_retries:
+                    raise
+                continue
+            except (APIConnectionError, APIStatusError) as e:
+                if attempt == max_retries or (isinstance(e, APIStatusError) and e.status_code < 500):
+                    raise
+                time.sleep(min(self.default_retry_after, 0.5 * 2 ** attempt))
+                continue
+
+            usage = getattr(response, "usage", None)
+            self.record_usage(tokens, getattr(usage, "total_tokens", None))
+            return response
+
+    def get_stats(self) -> dict:
+        with self.condition:
+            return {
+                "deployment": self.name,
+                "calls": self.calls,
+                "queued": self.queued,
+                "waiting": len(self.waiters),
+                "avg_wait_seconds": round(self.wait_time / self.queued, 3) if self.queued else 0.0,
+                "rate_limited": self.rate_limited,
+                "available_requests": round(self.buckets["requests"].available, 1) if self.buckets["requests"] else None,
+                "available_tokens": round(self.buckets["tokens"].available) if self.buckets["tokens"] else None
+            }
+
+
+rate_limiters = dict()
+rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    deployment: str
+) -> DeploymentRateLimiter:
+    """
+    Rate limiter shared by all clients of a deployment in the process.
+    Limits come from AOAI_RATE_LIMITS[deployment], or AOAI_RPM/AOAI_TPM.
+    """
+    with rate_limiters_lock:
+        if deployment not in rate_limiters:
+            limits = AOAI_RATE_LIMITS.get(deployment, {})
+            rate_limiters[deployment] = DeploymentRateLimiter(
+                name=deployment,
+                rpm=limits.get("rpm", AOAI_RPM),
+                tpm=limits.get("tpm", AOAI_TPM)
+            )
+        return rate_limiters[deployment]
+
+
+def reset_rate_limiters() -> None:
+    """
+    Drop all shared rate limiters (and their pauses), e.g. between tests.
+    """
+    with rate_limiters_lock:
+        rate_limiters.clear()
+
+
+def get_rate_limiter_stats() -> list[dict]:
+    with rate_limiters_lock:
+        limiters = list(rate_limiters.values())
+    return [limiter.get_stats() for limiter in limiters]
@@ -0,0 +1,204 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import json
+import time
+import argparse
+import itertools
+import tempfile
+from chunking import chunk_document, load_documents
+from embedding_service import (
+    EMBEDDING_MODEL_DIMENSIONS,
+    EMBEDDING_MODEL_NAME,
+    AzureOpenAIEmbedder,
+    EmbeddingService,
+    LocalEmbedder,
+    accepts_dimensions
+)
+from local_index import LocalSearchIndex
+from rag_context import RagContextAssembler
+from utils import get_percentile
+
+"""
+Retrieval benchmark over the product_info corpus.
+
+Sweeps chunk size, overlap, embedding dimensions and vector quantization on the in-process
+index, and reports for each setting recall@k of a labeled query set (a result counts only if it
+is a chunk of the expected document containing the answer), query latency, index memory
+(vectors and BM25 postings), and RAG prompt tokens per fallback after context assembly.
+
+Usage:
+cd src/backend/src/
+python retrieval_benchmark.py --max-lengths 1000 2000 --overlaps 0 500 --dimensions 256 1536
+"""
+
+PRODUCT_INFO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../../infra/data/product_info")
+QUERIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test/data/retrieval_queries.json")
+
+K_VALUES = (1, 3, 5)
+
+
+def load_queries(path: str = QUERIES_PATH) -> list[dict]:
+    """
+    Labeled queries: {"query", "title" (expected document), "answer" (text the source must contain)}.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def is_relevant(
+    result: dict,
+    query: dict
+) -> bool:
+    return result["title"] == query["title"] and query["answer"] in result["chunk"]
+
+
+def get_embedding_service(
+    mode: str,
+    dimensions: int
+) -> EmbeddingService:
+    """
+    LOCAL embeds offline with LocalEmbedder; AOAI uses EMBEDDING_DEPLOYMENT_NAME (text-embedding-3 models for dimensions).
+    """
+    if mode == "AOAI":
+        return EmbeddingService(AzureOpenAIEmbedder(
+            endpoint=os.environ.get("AOAI_ENDPOINT"),
+            deployment=os.environ.get("EMBEDDING_DEPLOYMENT_NAME"),
+            dimensions=dimensions
+        ))
+    return EmbeddingService(LocalEmbedder(dimensions=dimensions))
+
+
+def check_dimensions(
+    mode: str,
+    dimensions: list[int],
+    model_name: str = EMBEDDING_MODEL_NAME,
+    native_dimensions: int = EMBEDDING_MODEL_DIMENSIONS
+) -> None:
+    """
+    Reject dimensions the AOAI embedding model cannot produce (only text-embedding-3 models accept dimensions).
+    """
+    if mode != "AOAI" or accepts_dimensions(model_name):
+        return
+    unsupported = [dimension for dimension in dimensions if dimension != native_dimensions]
+    if unsupported:
+        raise ValueError(
+            f"Embedding model '{model_name}' only produces {native_dimensions} dimensions, cannot benchmark {unsupported}"
+        )
+
+
+def evaluate(
+    index: LocalSearchIndex,
+    queries: list[dict],
+    top: int = max(K_VALUES)
+) -> dict:
+    """
+    Recall@k, query latency and prompt tokens of index over queries.
+    """
+    assembler = RagContextAssembler()
+    hits = {k: 0 for k in K_VALUES}
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        results = index.search(query["query"], top=top)
+        latencies.append(1000 * (time.perf_counter() - start))
+
+        ranks = [rank for rank, result in enumerate(results, 1) if is_relevant(result, query)]
+        for k in K_VALUES:
+            hits[k] += 1 if ranks and ranks[0] <= k else 0
+        assembler.assemble(results)
+
+    stats = index.get_stats()
+    context = assembler.get_stats()
+    return {
+        **{f"recall@{k}": round(hits[k] / len(queries), 3) for k in K_VALUES},
+        "p50_ms": round(get_percentile(latencies, 50), 3),
+        "p95_ms": round(get_percentile(latencies, 95), 3),
+        "chunks": stats["chunks"],
+        "vector_kb": round(stats["vector_bytes"] / 1024, 1),
+        "keyword_kb": round(stats["keyword_bytes"] / 1024, 1),
+        "index_kb": round((stats["vector_bytes"] + stats["keyword_bytes"]) / 1024, 1),
+        "prompt_tokens": context["source_tokens_per_call_after"]
+    }
+
+
+def run_benchmark(
+    documents: list[dict],
+    queries: list[dict],
+    max_lengths: list[int],
+    overlaps: list[int],
+    dimensions: list[int],
+    quantizations: list[str],
+    mode: str = "LOCAL"
+) -> list[dict]:
+    """
+    Evaluate every combination of settings (overlaps not shorter than the page length are skipped).
+    """
+    # Fail before embedding anything rather than midway through the sweep:
+    check_dimensions(mode, dimensions)
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="retrieval-benchmark-") as directory:
+        for max_length, overlap, dimension in itertools.product(max_lengths, overlaps, dimensions):
+            if overlap >= max_length:
+                continue
+
+            chunks = [
+                chunk
+                for document in documents
+                for chunk in chunk_document(document["title"], document["content"], max_length, overlap)
+            ]
+            # Chunks are embedded once per setting and shared by the quantizations:
+            embedding_service = get_embedding_service(mode, dimension)
+            vectors = embedding_service.embed_batch([chunk["chunk"] for chunk in chunks])
+            chunks = [{**chunk, "text_vector": vector} for chunk, vector in zip(chunks, vectors)]
+
+            for quantization in quantizations:
+                path = os.path.join(directory, f"{max_length}-{overlap}-{dimension}-{quantization}")
+                index = LocalSearchIndex.build(chunks, embedding_service, quantization, path)
+                rows.append({
+                    "max_length": max_length,
+                    "overlap": overlap,
+                    "dimensions": dimension,
+                    "quantization": quantization,
+                    **evaluate(index, queries)
+                })
+    return rows
+
+
+def format_report(rows: list[dict]) -> str:
+    """
+    Markdown table of benchmark rows.
+    """
+    if not rows:
+        return ""
+    columns = list(rows[0])
+    lines = [
+        "| " + " | ".join(columns) + " |",
+        "|" + "|".join("---" for _ in columns) + "|"
+    ]
+    lines += ["| " + " | ".join(str(row[column]) for column in columns) + " |" for row in rows]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retrieval benchmark over product_info")
+    parser.add_argument("--data-dir", default=PRODUCT_INFO_DIR)
+    parser.add_argument("--queries", default=QUERIES_PATH)
+    parser.add_argument("--max-lengths", type=int, nargs="+", default=[500, 1000, 2000])
+    parser.add_argument("--overlaps", type=int, nargs="+", default=[0, 250, 500])
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[128, 256, 1536])
+    parser.add_argument("--quantizations", nargs="+", default=["float32", "int8"])
+    parser.add_argument("--mode", default="LOCAL", choices=["LOCAL", "AOAI"])
+    args = parser.parse_args()
+
+    rows = run_benchmark(
+        load_documents(args.data_dir),
+        load_queries(args.queries),
+        args.max_lengths,
+        args.overlaps,
+        args.dimensions,
+        args.quantizations,
+        args.mode
+    )
+    print(format_report(rows))
@@ -0,0 +1,200 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import re
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable
+from azure.search.documents import SearchClient
+from azure.search.documents.indexes import SearchIndexerClient
+from utils import get_azure_credential
+
+"""
+Retrieval result cache.
+
+Search results are cached by normalized query (case, punctuation and whitespace insensitive) and
+search parameters, with a TTL. The cache is cleared when the index version changes: a new run of
+the indexer created by infra/scripts/search/index_setup.py, or a different document count. The
+version is checked by a background thread, never on the request path. Chunks pushed by ingestion.py
+clear the cache of the pipeline's retrieval_cache; other processes only see pushes that change
+the document count, and otherwise serve the old results until they expire (RETRIEVAL_CACHE_TTL).
+"""
+
+_logger = logging.getLogger(__name__)
+
+RETRIEVAL_CACHE_TTL = float(os.environ.get("RETRIEVAL_CACHE_TTL", "3600"))
+RETRIEVAL_CACHE_SIZE = int(os.environ.get("RETRIEVAL_CACHE_SIZE", "5000"))
+# Seconds between index version checks:
+RETRIEVAL_CACHE_VERSION_INTERVAL = float(os.environ.get("RETRIEVAL_CACHE_VERSION_INTERVAL", "60"))
+# Indexer created by index_setup.py:
+SEARCH_INDEXER_NAME = os.environ.get("SEARCH_INDEXER_NAME", f"{os.environ.get('SEARCH_INDEX_NAME')}-idxr")
+
+PUNCTUATION_REGEX = re.compile(r"[^\w\s]", re.UNICODE)
+WHITESPACE_REGEX = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for cache lookups.
+    """
+    return WHITESPACE_REGEX.sub(" ", PUNCTUATION_REGEX.sub(" ", query.lower())).strip()
+
+
+def create_index_version_provider(
+    search_client: SearchClient,
+    endpoint: str = None,
+    indexer_name: str = SEARCH_INDEXER_NAME
+) -> Callable[[], str]:
+    """
+    Index version from the last indexer run and the document count.
+    """
+    endpoint = endpoint or os.environ.get("SEARCH_ENDPOINT")
+    indexer_client = SearchIndexerClient(endpoint=endpoint, credential=get_azure_credential())
+
+    def get_index_version() -> str:
+        last_run = None
+        try:
+            last_result = indexer_client.get_indexer_status(indexer_name).last_result
+            if last_result is not None:
+                last_run = f"{last_result.start_time}|{last_result.end_time}|{last_result.status}"
+        except Exception as e:
+            _logger.warning(f"Could not get status of indexer {indexer_name}: {e}")
+
+        return f"{last_run}|{search_client.get_document_count()}"
+
+    return get_index_version
+
+
+class RetrievalCache():
+    """
+    TTL + LRU cache of search results, invalidated on index version changes.
+
+    The index version is checked every version_interval seconds by a background thread.
+    """
+
+    def __init__(
+        self,
+        get_index_version: Callable[[], str] = None,
+        ttl: float = RETRIEVAL_CACHE_TTL,
+        max_size: int = RETRIEVAL_CACHE_SIZE,
+        version_interval: float = RETRIEVAL_CACHE_VERSION_INTERVAL
+    ):
+        self.get_index_version = get_index_version
+        self.ttl = ttl
+        self.max_size = max_size
+        self.version_interval = version_interval
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.index_version = None
+
+        # Stats:
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        self.stopped = threading.Event()
+        if get_index_version is not None:
+            self.check_index_version()
+            threading.Thread(target=self.refresh_index_version, daemon=True).start()
+
+    @staticmethod
+    def get_key(
+        query: str,
+        params: dict
+    ) -> str:
+        return f"{normalize_query(query)}|{json.dumps(params, sort_keys=True)}"
+
+    def check_index_version(self) -> None:
+        """
+        Clear the cache if the index version changed.
+        """
+        try:
+            version = self.get_index_version()
+        except Exception as e:
+            _logger.warning(f"Could not get index version: {e}")
+            return
+
+        with self.lock:
+            if self.index_version is not None and version != self.index_version:
+                _logger.info(f"Index version changed ({self.index_version} -> {version}), clearing retrieval cache")
+                self.entries.clear()
+                self.invalidations += 1
+            self.index_version = version
+
+    def refresh_index_version(self) -> None:
+        while not self.stopped.wait(self.version_interval):
+            self.check_index_version()
+
+    def clear(self) -> None:
+        """
+        Clear the cache (e.g. after pushing changes to the index).
+        """
+        with self.lock:
+            self.entries.clear()
+            self.invalidations += 1
+
+    def close(self) -> None:
+        self.stopped.set()
+
+    def get(
+        self,
+        query: str,
+        params: dict
+    ) -> list[dict]:
+        key = self.get_key(query, params)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def put(
+        self,
+        query: str,
+        params: dict,
+        documents: list[dict]
+    ) -> None:
+        key = self.get_key(query, params)
+        with self.lock:
+            self.entries[key] = (time.monotonic(), documents)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def get_or_search(
+        self,
+        query: str,
+        params: dict,
+        search: Callable[[], list[dict]]
+    ) -> list[dict]:
+        """
+        Cached search results of query, or the results of search().
+        """
+        documents = self.get(query, params)
+        if documents is None:
+            documents = search()
+            self.put(query, params, documents)
+        # Callers may modify the documents (e.g. when merging chunks):
+        return [dict(document) for document in documents]
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "index_version": self.index_version
+            }
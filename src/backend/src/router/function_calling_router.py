@@ -9,6 +9,7 @@ from azure.core.rest import HttpRequest
 from azure.ai.language.conversations.authoring import ConversationAuthoringClient
 from azure.ai.language.questionanswering.authoring import AuthoringClient
 from aoai_client import AOAIClient, get_prompt
+from rate_limiter import PRIORITY_HIGH
 from router.clu_router import create_clu_router
 from router.cqa_router import create_cqa_router
 from utils import get_azure_credential
@@ -152,7 +153,8 @@ def create_function_calling_router() -> Callable[[str, str, str], dict]:
         function_calling=True,
         tools=get_tools(),
         functions=functions,
-        return_functions=True
+        return_functions=True,
+        priority=PRIORITY_HIGH
     )
 
     def function_calling_router(
@@ -0,0 +1,165 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import json
+import logging
+import pii_redacter
+from json import JSONDecodeError
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from aoai_client import AOAIClient, get_prompt
+from rate_limiter import PRIORITY_HIGH
+from router.clu_router import create_clu_router
+from router.cqa_router import create_cqa_router
+from router.function_calling_router import (
+    create_router_hook,
+    get_clu_intents,
+    get_cqa_questions,
+    get_tools
+)
+
+"""
+Joint extract-and-route router.
+
+A single function-calling completion splits the user message into utterances and tags each
+one with its target (get_clu, get_cqa or get_fallback) and arguments. The tagged CLU/CQA calls
+then run concurrently, so a message takes one LLM round trip instead of 1 + N.
+"""
+
+_logger = logging.getLogger(__name__)
+
+PII_ENABLED = os.environ.get("PII_ENABLED", "false").lower() == "true"
+JOINT_ROUTING_PROMPT = get_prompt("joint_routing.txt")
+JOINT_ROUTER_MAX_WORKERS = int(os.environ.get("JOINT_ROUTER_MAX_WORKERS", "8"))
+
+# Utterances that are neither an action nor a question go to the fallback function:
+FALLBACK_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "get_fallback",
+        "description": "Answers an utterance that is neither a recognized action nor a known question",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "utterance": {
+                    "type": "string",
+                    "description": "The utterance to be answered, e.g. Hello there."
+                }
+            },
+            "required": ["utterance"]
+        }
+    }
+}
+
+
+def parse_tool_calls(
+    tool_calls: list
+) -> list[tuple[str, str]]:
+    """
+    Parse tool calls into (function name, utterance) pairs, in call order.
+    """
+    calls = []
+    for tool_call in tool_calls or []:
+        try:
+            arguments = json.loads(tool_call.function.arguments)
+            # All functions take a single utterance/question parameter:
+            utterance = next(iter(arguments.values()))
+        except (JSONDecodeError, StopIteration) as e:
+            _logger.warning(f"Ignoring malformed tool call {tool_call.function.name}: {e}")
+            continue
+        calls.append((tool_call.function.name, utterance))
+    return calls
+
+
+def create_joint_router(
+    aoai_client: AOAIClient = None,
+    functions: dict[str, Callable[[str, str, str], dict]] = None
+) -> Callable[[str, str, str], list[dict]]:
+    """
+    Create joint extract-and-route router.
+
+    Returns a list of {"utterance", "function", "result"} per utterance, where result is
+    the CLU/CQA routing result, or None for utterances routed to the fallback function.
+    The list is empty when the model made no function call: the prompt's safety rules make it
+    stop replying on harmful or rule-probing input, so the message must be refused.
+    """
+    if functions is None:
+        functions = {
+            "get_clu": create_router_hook(
+                router=create_clu_router()
+            ),
+            "get_cqa": create_router_hook(
+                router=create_cqa_router()
+            )
+        }
+
+    if aoai_client is None:
+        prompt = JOINT_ROUTING_PROMPT.format(
+            intents=", ".join(get_clu_intents()),
+            questions="\n".join(get_cqa_questions())
+        )
+        aoai_client = AOAIClient(
+            endpoint=os.environ['AOAI_ENDPOINT'],
+            deployment=os.environ['AOAI_DEPLOYMENT'],
+            system_message=prompt,
+            tools=get_tools() + [FALLBACK_TOOL],
+            priority=PRIORITY_HIGH
+        )
+
+    # The system prompt is sent with every message; the client's own history is not used,
+    # so concurrent requests do not share state:
+    system_messages = list(aoai_client.messages)
+    executor = ThreadPoolExecutor(max_workers=JOINT_ROUTER_MAX_WORKERS)
+
+    def joint_router(
+        message: str,
+        language: str,
+        id: str
+    ) -> list[dict]:
+        """
+        Joint extract-and-route router function.
+        """
+        if PII_ENABLED:
+            # Redact PII:
+            message = pii_redacter.redact(
+                text=message,
+                id=id,
+                language=language,
+                cache=True
+            )
+
+        response = aoai_client.create_chat_completion(
+            messages=system_messages + [{"role": "user", "content": message}],
+            tools=aoai_client.tools,
+            tool_choice="auto"
+        )
+        calls = parse_tool_calls(response.choices[0].message.tool_calls)
+        _logger.info(f"Joint routing: {calls}")
+
+        if not calls:
+            # The model stopped replying (safety rules): refuse instead of answering with the fallback
+            return []
+
+        if PII_ENABLED:
+            # Reconstruct PII, so the CLU/CQA runtimes see the original entity values:
+            calls = [
+                (name, pii_redacter.reconstruct(text=utterance, id=id, cache=True))
+                for name, utterance in calls
+            ]
+
+        # Run the tagged CLU/CQA calls concurrently:
+        futures = [
+            executor.submit(functions[name], utterance, language, id) if name in functions else None
+            for name, utterance in calls
+        ]
+
+        return [
+            {
+                "utterance": utterance,
+                "function": name,
+                "result": future.result() if future else None
+            }
+            for (name, utterance), future in zip(calls, futures)
+        ]
+
+    return joint_router
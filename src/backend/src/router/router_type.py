@@ -24,3 +24,6 @@ class RouterType(Enum):
 
     # Triage agent to decide CLU or CQA:
     TRIAGE_AGENT = "TRIAGE_AGENT"
+
+    # Single GPT function-calling completion to extract utterances and decide CLU or CQA for each:
+    JOINT_FUNCTION_CALLING = "JOINT_FUNCTION_CALLING"
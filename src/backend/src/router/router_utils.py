@@ -2,11 +2,6 @@
 # Licensed under the MIT License.
 from typing import Callable
 from router.router_type import RouterType
-from router.clu_router import create_clu_router
-from router.cqa_router import create_cqa_router
-from router.function_calling_router import create_function_calling_router
-from router.orchestration_router import create_orchestration_router
-from router.triage_agent_router import create_triage_agent_router
 
 
 def create_router(
@@ -14,17 +9,28 @@ def create_router(
 ) -> Callable[[str, str, str], dict]:
     """
     Create router based on settings.
+
+    Routers are imported on demand: some validate their own configuration at import time
+    (e.g. the triage agent ID), which other router types do not need.
     """
     if router_type == RouterType.BYPASS:
         return lambda x, y, z: None
     if router_type == RouterType.CLU:
+        from router.clu_router import create_clu_router
         return create_clu_router()
     elif router_type == RouterType.CQA:
+        from router.cqa_router import create_cqa_router
         return create_cqa_router()
     elif router_type == RouterType.ORCHESTRATION:
+        from router.orchestration_router import create_orchestration_router
         return create_orchestration_router()
     elif router_type == RouterType.FUNCTION_CALLING:
+        from router.function_calling_router import create_function_calling_router
         return create_function_calling_router()
     elif router_type == RouterType.TRIAGE_AGENT:
+        from router.triage_agent_router import create_triage_agent_router
         return create_triage_agent_router()
+    elif router_type == RouterType.JOINT_FUNCTION_CALLING:
+        from router.joint_router import create_joint_router
+        return create_joint_router()
     raise ValueError("Unsupported router type")
@@ -0,0 +1,122 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from semantic_kernel.agents.runtime import InProcessRuntime
+
+"""
+Pool of long-lived Semantic Kernel runtimes shared by concurrent orchestrations.
+
+Each orchestration invocation registers its actors under a unique topic, so a single
+InProcessRuntime can safely host many concurrent group chats. Runtimes are recycled
+after a number of invocations so that per-invocation actor registrations do not
+accumulate indefinitely.
+"""
+
+_logger = logging.getLogger(__name__)
+
+RUNTIME_POOL_SIZE = int(os.environ.get("SK_RUNTIME_POOL_SIZE", "1"))
+RUNTIME_MAX_USES = int(os.environ.get("SK_RUNTIME_MAX_USES", "500"))
+
+
+class PooledRuntime():
+    """
+    Started runtime with usage bookkeeping.
+    """
+
+    def __init__(self):
+        self.runtime = InProcessRuntime()
+        self.runtime.start()
+        self.uses = 0
+        self.in_flight = 0
+
+
+class RuntimePool():
+    """
+    Runtime pool, created and drained by the FastAPI lifespan.
+    """
+
+    def __init__(
+        self,
+        size: int = RUNTIME_POOL_SIZE,
+        max_uses: int = RUNTIME_MAX_USES
+    ):
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.runtimes = []
+        self.retiring = set()
+        self.closed = False
+
+    def start(self) -> None:
+        """
+        Start pool runtimes.
+        """
+        self.runtimes = [PooledRuntime() for _ in range(self.size)]
+        self.closed = False
+        print(f"[SYSTEM]: Started {self.size} runtime(s).")
+
+    @asynccontextmanager
+    async def acquire(self):
+        """
+        Acquire the least loaded runtime for one orchestration invocation.
+        """
+        if self.closed:
+            raise RuntimeError("Runtime pool is closed.")
+
+        pooled = min(self.runtimes, key=lambda r: r.in_flight)
+        pooled.uses += 1
+        pooled.in_flight += 1
+
+        if self.max_uses and pooled.uses >= self.max_uses:
+            # Swap in a fresh runtime; the old one drains once idle:
+            self.runtimes[self.runtimes.index(pooled)] = PooledRuntime()
+            self.retiring.add(pooled)
+
+        try:
+            yield pooled.runtime
+        finally:
+            pooled.in_flight -= 1
+            if pooled in self.retiring and pooled.in_flight == 0:
+                self.retiring.discard(pooled)
+                asyncio.create_task(self.stop(pooled))
+
+    async def stop(
+        self,
+        pooled: PooledRuntime
+    ) -> None:
+        """
+        Stop runtime once all of its pending messages are processed.
+        """
+        try:
+            await pooled.runtime.stop_when_idle()
+        except Exception as e:
+            print(f"[SHUTDOWN ERROR]: Runtime failed to shut down cleanly: {e}")
+
+    async def drain(
+        self,
+        timeout: float = 30
+    ) -> None:
+        """
+        Stop accepting orchestrations and gracefully drain all runtimes.
+        """
+        self.closed = True
+        pooled_runtimes = self.runtimes + list(self.retiring)
+        self.runtimes = []
+        self.retiring.clear()
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*[self.stop(pooled) for pooled in pooled_runtimes]),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            _logger.warning("Runtime pool drain timed out, stopping runtimes immediately")
+            for pooled in pooled_runtimes:
+                try:
+                    await pooled.runtime.stop()
+                except Exception as e:
+                    print(f"[SHUTDOWN ERROR]: Runtime failed to stop: {e}")
+
+        print("[SYSTEM]: Runtime pool drained.")
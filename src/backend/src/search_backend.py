@@ -0,0 +1,151 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import logging
+from azure.search.documents import SearchClient
+from azure.search.documents.models import VectorizableTextQuery, VectorizedQuery
+from chunking import MAXIMUM_PAGE_LENGTH, PAGE_OVERLAP_LENGTH, chunk_document, load_documents
+from embedding_service import EmbeddingService, LocalEmbedder
+from local_index import LocalSearchIndex
+
+"""
+Retrieval backends.
+
+A backend answers search(query, top, k_nearest_neighbors) with RAG sources
+({"parent_id", "chunk_id", "title", "chunk", "score"}). AZURE queries Azure AI Search; LOCAL
+queries an in-process index of the product_info corpus, for offline runs and load tests.
+"""
+
+_logger = logging.getLogger(__name__)
+
+# AZURE | LOCAL
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "AZURE").upper()
+LOCAL_INDEX_DATA_DIR = os.environ.get(
+    "LOCAL_INDEX_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../../infra/data/product_info")
+)
+# Directory of the memory-mapped index (a temporary directory by default):
+LOCAL_INDEX_PATH = os.environ.get("LOCAL_INDEX_PATH")
+# float32 | int8
+LOCAL_INDEX_QUANTIZATION = os.environ.get("LOCAL_INDEX_QUANTIZATION", "float32").lower()
+
+
+class AzureSearchBackend():
+    """
+    Hybrid queries against the Azure AI Search index.
+    """
+
+    name = "azure"
+
+    def __init__(
+        self,
+        search_client: SearchClient,
+        embedding_service: EmbeddingService = None
+    ):
+        self.search_client = search_client
+        # Client-side query vectorization (the search service vectorizes queries otherwise):
+        self.embedding_service = embedding_service
+
+    def search(
+        self,
+        query: str,
+        top: int = 5,
+        k_nearest_neighbors: int = 50
+    ) -> list[dict]:
+        if self.embedding_service:
+            vector_query = VectorizedQuery(
+                vector=self.embedding_service.embed(query),
+                k_nearest_neighbors=k_nearest_neighbors,
+                fields="text_vector"
+            )
+        else:
+            vector_query = VectorizableTextQuery(
+                text=query,
+                k_nearest_neighbors=k_nearest_neighbors,
+                fields="text_vector"
+            )
+        search_results = self.search_client.search(
+            search_text=query,
+            vector_queries=[vector_query],
+            select=["parent_id", "chunk_id", "title", "chunk"],
+            top=top
+        )
+
+        return [
+            {
+                "parent_id": doc.get("parent_id"),
+                "chunk_id": doc.get("chunk_id"),
+                "title": doc["title"],
+                "chunk": doc["chunk"],
+                "score": doc.get("@search.score")
+            }
+            for doc in search_results
+        ]
+
+
+class LocalSearchBackend():
+    """
+    Hybrid queries against an in-process index.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        index: LocalSearchIndex
+    ):
+        self.index = index
+
+    def search(
+        self,
+        query: str,
+        top: int = 5,
+        k_nearest_neighbors: int = 50
+    ) -> list[dict]:
+        return self.index.search(query, top=top, k_nearest_neighbors=k_nearest_neighbors)
+
+    def get_index_version(self) -> str:
+        return self.index.version
+
+    def get_stats(self) -> dict:
+        return self.index.get_stats()
+
+
+def create_local_search_backend(
+    embedding_service: EmbeddingService = None,
+    data_dir: str = LOCAL_INDEX_DATA_DIR,
+    path: str = LOCAL_INDEX_PATH,
+    quantization: str = LOCAL_INDEX_QUANTIZATION,
+    max_length: int = MAXIMUM_PAGE_LENGTH,
+    overlap: int = PAGE_OVERLAP_LENGTH
+) -> LocalSearchBackend:
+    """
+    Index the documents of data_dir, chunked like index_setup.py.
+    Without an embedding service, chunks and queries are embedded with LocalEmbedder.
+    """
+    documents = load_documents(data_dir)
+    if not documents:
+        # E.g. the container image does not include infra/data: fail at startup instead of retrieving nothing
+        raise ValueError(f"No documents to index in {os.path.abspath(data_dir)}, set LOCAL_INDEX_DATA_DIR")
+
+    embedding_service = embedding_service or EmbeddingService(LocalEmbedder())
+    chunks = [
+        chunk
+        for document in documents
+        for chunk in chunk_document(document["title"], document["content"], max_length, overlap)
+    ]
+    index = LocalSearchIndex.build(chunks, embedding_service, quantization=quantization, path=path)
+    return LocalSearchBackend(index)
+
+
+def create_search_backend(
+    search_client: SearchClient = None,
+    embedding_service: EmbeddingService = None,
+    mode: str = SEARCH_BACKEND
+) -> AzureSearchBackend | LocalSearchBackend:
+    """
+    Create the retrieval backend for SEARCH_BACKEND.
+    """
+    if mode == "LOCAL":
+        return create_local_search_backend(embedding_service)
+    return AzureSearchBackend(search_client, embedding_service)
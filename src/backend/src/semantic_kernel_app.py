@@ -2,21 +2,30 @@
 # Licensed under the MIT License.
 import os
 import json
+import time
+import asyncio
 import logging
+import itertools
 import pii_redacter
 from fastapi import FastAPI, HTTPException
 from fastapi.concurrency import asynccontextmanager
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse, FileResponse
 from pydantic import BaseModel
-from semantic_kernel_orchestrator import SemanticKernelOrchestrator
+from semantic_kernel_orchestrator import SemanticKernelOrchestrator, OrchestratorBusyError
+from runtime_pool import RuntimePool
 from azure.identity.aio import DefaultAzureCredential
 from semantic_kernel.agents import AzureAIAgent
 from utils import get_azure_credential
 from aoai_client import AOAIClient, get_prompt
+from embedding_service import create_embedding_service
+from rag_context import RagContextAssembler
+from retrieval_cache import RetrievalCache, create_index_version_provider
+from search_backend import SEARCH_BACKEND, create_search_backend
+from rate_limiter import PRIORITY_HIGH
 from azure.search.documents import SearchClient
 
-from typing import List
+from typing import List, Optional
 
 # Run locally with `uvicorn app:app --reload --host 127.0.0.1 --port 7000`
 # Comment out for local testing:
@@ -33,6 +42,7 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     message: str
     history: List[ChatMessage]
+    session_id: Optional[str] = None
 
 
 # Environment variables
@@ -83,15 +93,29 @@ search_client = SearchClient(
     endpoint=os.environ.get("SEARCH_ENDPOINT"),
     index_name=os.environ.get("SEARCH_INDEX_NAME"),
     credential=get_azure_credential()
-)
+) if SEARCH_BACKEND == "AZURE" else None
 print("Search client initialized.")
 
 # RAG AOAI client:
+# Query embeddings, shared by search and any semantic cache or embedding router:
+embedding_service = create_embedding_service()
+# Overlapping chunks are merged and sources packed into RAG_CONTEXT_TOKENS:
+context_assembler = RagContextAssembler()
+# Azure AI Search, or an in-process index of the product_info corpus (SEARCH_BACKEND=LOCAL):
+search_backend = create_search_backend(search_client, embedding_service)
+# Search results cached per normalized query, cleared when the indexer runs or the document count changes:
+retrieval_cache = RetrievalCache(
+    create_index_version_provider(search_client) if search_client else search_backend.get_index_version
+)
+
 rag_client = AOAIClient(
     endpoint=os.environ.get("AOAI_ENDPOINT"),
     deployment=os.environ.get("AOAI_DEPLOYMENT"),
     use_rag=True,
-    search_client=search_client
+    search_backend=search_backend,
+    embedding_service=embedding_service,
+    context_assembler=context_assembler,
+    retrieval_cache=retrieval_cache
 )
 print("RAG client initialized.")
 
@@ -100,7 +124,8 @@ extract_prompt = get_prompt("extract_utterances.txt")
 extract_client = AOAIClient(
     endpoint=os.environ.get("AOAI_ENDPOINT"),
     deployment=os.environ.get("AOAI_DEPLOYMENT"),
-    system_message=extract_prompt
+    system_message=extract_prompt,
+    priority=PRIORITY_HIGH
 )
 
 # PII:
@@ -134,12 +159,16 @@ async def orchestrate_chat(
     message: str,
     history: list[ChatMessage],
     orchestrator: SemanticKernelOrchestrator,
-    chat_id: int
+    chat_id: int,
+    session_id: str = None
 ) -> tuple[list[str], bool]:
 
     responses = []
     need_more_info = False
 
+    # End-to-end deadline for the request, covering redaction and language detection
+    deadline = time.monotonic() + orchestrator.request_deadline
+
     # Reshaping system input into proper backend format
     task = f"query: {message}"
 
@@ -161,22 +190,35 @@ async def orchestrate_chat(
         try:
             # Try semantic kernel orchestration first
             orchestrator = app.state.orchestrator
-            response, need_more_info = await orchestrator.process_message(task)
-
-            if isinstance(response, dict) and response.get("error"):
-                # If semantic kernel fails, use fallback
-                print(f"Semantic kernel failed, using fallback for: {message}")
-                response = fallback_function(
-                    message,
-                    "en",  # Assuming English for simplicity, adjust as needed
-                    chat_id
-                )
+            # Follow-ups that only supply a missing order number skip the group chat
+            follow_up = await orchestrator.answer_follow_up(session_id, message)
+            if follow_up is not None:
+                response, need_more_info = follow_up
+            else:
+                language = await orchestrator.detect_language(message)
+                response, need_more_info = await orchestrator.process_message(task, language, deadline, session_id)
+
+                if isinstance(response, dict) and response.get("error"):
+                    # If semantic kernel fails, use fallback (off the event loop, so other chats keep running)
+                    print(f"Semantic kernel failed, using fallback for: {message}")
+                    response = await asyncio.to_thread(
+                        fallback_function,
+                        message,
+                        language or "en",  # Assume English when the language is unknown
+                        chat_id
+                    )
             responses.append(response)
 
+        except OrchestratorBusyError:
+            raise
+
         except Exception as e:
             logging.error(f"Error processing utterance: {e}")
             responses.append("I encountered an error processing part of your message.")
 
+    except OrchestratorBusyError:
+        raise
+
     except Exception as e:
         logging.error(f"Error in message processing: {e}")
         responses = ["I apologize, but I'm having trouble processing your request. Please try again."]
@@ -201,28 +243,52 @@ async def lifespan(app: FastAPI):
 
         async with DefaultAzureCredential(exclude_interactive_browser_credential=False) as creds:
             async with AzureAIAgent.create_client(credential=creds, endpoint=PROJECT_ENDPOINT) as client:
+                # Long-lived runtimes shared by all orchestrations
+                runtime_pool = RuntimePool()
+                runtime_pool.start()
+
                 orchestrator = SemanticKernelOrchestrator(
                     client,
                     MODEL_NAME,
                     PROJECT_ENDPOINT,
                     AGENT_IDS,
                     fallback_function,
-                    3
+                    3,
+                    runtime_pool
                 )
-                await orchestrator.create_agent_group_chat()
+                # Initialize agents in the background (warm start from the local agent cache),
+                # /ready reports when the orchestrator is usable
+                startup_task = asyncio.create_task(orchestrator.create_agent_group_chat())
 
                 # Store in app state
                 app.state.creds = creds
                 app.state.client = client
+                app.state.runtime_pool = runtime_pool
                 app.state.orchestrator = orchestrator
+                app.state.startup_task = startup_task
+
+                try:
+                    # Yield control back to FastAPI lifespan
+                    yield
+                finally:
+                    for task in [startup_task, orchestrator.refresh_task, orchestrator.pretranslate_task]:
+                        if task is not None and not task.done():
+                            task.cancel()
+
+                    # Drain in-flight orchestrations before the client closes
+                    await runtime_pool.drain()
 
-                # Yield control back to FastAPI lifespan
-                yield
+                    # Persist new translations for the next start
+                    if orchestrator.translation_service is not None:
+                        orchestrator.translation_service.cache.save()
 
     except Exception as e:
         logging.error(f"Error during setup: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+# Unique chat IDs for concurrent requests
+chat_ids = itertools.count()
+
 # Create FastAPI app with lifespan
 app = FastAPI(lifespan=lifespan)
 app.mount("/assets", StaticFiles(directory=os.path.join(DIST_DIR, "assets")), name="assets")
@@ -236,14 +302,55 @@ async def serve_frontend():
     return FileResponse(os.path.join(DIST_DIR, "index.html"))
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 once the orchestrator agents are initialized."""
+    orchestrator = app.state.orchestrator
+    startup_task = app.state.startup_task
+    if startup_task.done() and startup_task.exception() is not None:
+        return JSONResponse(
+            content={"ready": False, "error": str(startup_task.exception())},
+            status_code=503
+        )
+
+    return JSONResponse(
+        content={"ready": orchestrator.ready, "agents_source": orchestrator.agents_source},
+        status_code=200 if orchestrator.ready else 503
+    )
+
+
+@app.get("/stats/translation")
+async def translation_stats():
+    """Translation cache statistics."""
+    return JSONResponse(app.state.orchestrator.get_translation_stats())
+
+
+@app.get("/stats/context")
+async def context_stats():
+    """Prompt tokens per request before and after the per-agent context policies."""
+    return JSONResponse(app.state.orchestrator.get_context_stats())
+
+
 # Define the chat endpoint
 @app.post("/chat")
 async def chat_endpoint(request: ChatRequest):
     try:
         # Grab the orchestrator from app state and orchestrate chat message
         orchestrator = app.state.orchestrator
-        # pass in message and history
-        responses, need_more_info = await orchestrate_chat(request.message, request.history, orchestrator, chat_id=0)
+        if not orchestrator.ready:
+            return JSONResponse(
+                content={"error": "The service is starting, please try again shortly."},
+                status_code=503
+            )
+
+        # pass in message and history, with a unique chat ID so concurrent chats keep separate PII mappings
+        responses, need_more_info = await orchestrate_chat(
+            request.message,
+            request.history,
+            orchestrator,
+            chat_id=next(chat_ids),
+            session_id=request.session_id
+        )
         print("[APP]: need_more_info:", need_more_info)
         return JSONResponse(
             content={
@@ -251,6 +358,13 @@ async def chat_endpoint(request: ChatRequest):
                 "need_more_info": need_more_info
             }, status_code=200)
 
+    except OrchestratorBusyError as e:
+        logging.warning(f"Chat rejected: {e}")
+        return JSONResponse(
+            content={"error": "The service is busy, please try again shortly."},
+            status_code=503
+        )
+
     except Exception as e:
         logging.error(f"Error in chat endpoint: {e}")
         return JSONResponse(
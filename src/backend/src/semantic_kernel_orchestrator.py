@@ -2,27 +2,108 @@
 # Licensed under the MIT License.
 import os
 import json
+import time
+import random
 import asyncio
 from typing import Callable
+from contextlib import asynccontextmanager
 from semantic_kernel.agents import AzureAIAgent, GroupChatOrchestration, GroupChatManager, BooleanResult, StringResult, MessageResult
 from semantic_kernel.contents import ChatMessageContent, ChatHistory, AuthorRole
-from semantic_kernel.agents.runtime import InProcessRuntime
+from runtime_pool import RuntimePool
+from language_detection import LanguageDetector
+from local_agents import DirectTriageAgent, DirectTranslationAgent
+from translation_service import TranslationService, TranslatorClient
+from agent_envelopes import CUSTOM_AGENTS, TranslationEnvelope, get_envelope
+from agent_context import ContextStats, apply_context_policies
+from agent_cache import AgentDefinitionCache
+from dialog_state import DialogStateStore
+from hook_registry import HookRegistry
+from clu_hooks import get_order_id
 from agents.order_status_plugin import OrderStatusPlugin
 from agents.order_refund_plugin import OrderRefundPlugin
 from agents.order_cancel_plugin import OrderCancellationPlugin
 from azure.ai.projects import AIProjectClient
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # Define the confidence threshold for CLU intent recognition
 confidence_threshold = float(os.environ.get("CLU_CONFIDENCE_THRESHOLD", "0.5"))
 cqa_confidence = float(os.environ.get("CQA_CONFIDENCE", "0.5"))
 
+# Skip the TranslationAgent hops when the user message is already in English
+translation_fast_path = os.environ.get("SK_TRANSLATION_FAST_PATH", "true").lower() == "true"
+
+# Triage mode: AGENT uses the Foundry TriageAgent, DIRECT calls the CLU/CQA runtimes from python
+triage_mode = os.environ.get("SK_TRIAGE_MODE", "AGENT").upper()
+
+# Translation mode: AGENT uses the Foundry TranslationAgent, DIRECT calls Azure AI Translator through a translation cache
+translation_mode = os.environ.get("SK_TRANSLATION_MODE", "AGENT").upper()
+
+# Concurrent group chats per worker, and how many more may wait for a slot before requests are rejected
+max_concurrent_orchestrations = int(os.environ.get("SK_MAX_CONCURRENT_ORCHESTRATIONS", "16"))
+max_queued_orchestrations = int(os.environ.get("SK_MAX_QUEUED_ORCHESTRATIONS", "64"))
+
+# Exponential backoff with jitter between retries of a failed stage
+retry_base_delay = float(os.environ.get("SK_RETRY_BASE_DELAY", "0.5"))
+retry_max_delay = float(os.environ.get("SK_RETRY_MAX_DELAY", "8"))
+
+# End-to-end request deadline and per-agent time budgets (seconds); a hop is only started if its budget fits
+request_deadline = float(os.environ.get("SK_REQUEST_DEADLINE", "60"))
+default_agent_budget = float(os.environ.get("SK_DEFAULT_AGENT_BUDGET", "15"))
+AGENT_BUDGETS = json.loads(os.environ.get("SK_AGENT_BUDGETS", json.dumps({
+    "TranslationAgent": 15,
+    "TriageAgent": 20,
+    "HeadSupportAgent": 10,
+    "OrderStatusAgent": 15,
+    "OrderCancelAgent": 15,
+    "OrderRefundAgent": 15
+})))
+
+# Deterministic CLU intent -> custom agent table; intents not listed are routed by the HeadSupportAgent
+INTENT_AGENT_MAP = json.loads(os.environ.get("SK_INTENT_AGENT_MAP", json.dumps({
+    "OrderStatus": "OrderStatusAgent",
+    "CancelOrder": "OrderCancelAgent",
+    "RefundStatus": "OrderRefundAgent"
+})))
+
+
+# Foundry agent IDs (config.json keys) and the local cache of their definitions
+AGENT_ID_KEYS = [
+    "TRANSLATION_AGENT_ID",
+    "TRIAGE_AGENT_ID",
+    "HEAD_SUPPORT_AGENT_ID",
+    "ORDER_STATUS_AGENT_ID",
+    "ORDER_CANCEL_AGENT_ID",
+    "ORDER_REFUND_AGENT_ID"
+]
+agent_cache_file = os.environ.get(
+    "SK_AGENT_CACHE_FILE",
+    os.path.join(os.environ.get("CONFIG_DIR", "."), "agent_cache.json")
+)
+
 
 class ChatMessage(BaseModel):
     role: str
     content: str
 
 
+class OrchestratorBusyError(Exception):
+    """
+    Raised when the orchestration queue is full.
+    """
+
+
+class DeadlineExceededError(Exception):
+    """
+    Raised when the remaining request time cannot fit the next agent hop.
+    """
+
+
+class RoutingError(ValueError):
+    """
+    Raised when no next agent can be selected from the last agent response.
+    """
+
+
 # Custom functions to route messages from specific roles / agents
 def route_user_message(participant_descriptions: dict) -> StringResult:
     try:
@@ -39,9 +120,8 @@ def route_user_message(participant_descriptions: dict) -> StringResult:
 
 def route_translation_message(last_message: ChatMessageContent, participant_descriptions: dict) -> StringResult:
     try:
-        parsed = json.loads(last_message.content)
-        response = parsed['response']
-        print("[TranslationAgent] Translated message:", response)
+        envelope = get_envelope(last_message)
+        print("[TranslationAgent] Translated message:", envelope.response.current_question)
 
         return StringResult(
             result=next((agent for agent in participant_descriptions.keys() if agent == "TriageAgent"), None),
@@ -54,13 +134,20 @@ def route_translation_message(last_message: ChatMessageContent, participant_desc
         )
 
 
-def route_triage_message(last_message: ChatMessageContent, participant_descriptions: dict) -> StringResult:
+def route_triage_message(
+    last_message: ChatMessageContent,
+    participant_descriptions: dict,
+    intent_agent_map: dict = None
+) -> StringResult:
     try:
-        parsed = json.loads(last_message.content)
+        envelope = get_envelope(last_message)
+        if envelope is None:
+            raise ValueError("TriageAgent response is not a valid triage envelope.")
+
         # Handle CQA results
-        if parsed.get("type") == "cqa_result":
+        if envelope.type == "cqa_result":
             print("[SYSTEM]: CQA result received, checking confidence...")
-            confidence = parsed["response"]["answers"][0]["confidenceScore"]
+            confidence = envelope.answer["confidenceScore"]
 
             if confidence >= cqa_confidence:
                 return StringResult(
@@ -71,9 +158,19 @@ def route_triage_message(last_message: ChatMessageContent, participant_descripti
                 raise ValueError(f"[TriageAgent] CQA result returned low confidence score: {confidence}. Expected at least {cqa_confidence}.")
 
         # Handle CLU results
-        if parsed.get("type") == "clu_result":
+        if envelope.type == "clu_result":
             print("[SYSTEM]: CLU result received, checking intent and entities...")
-            intent = parsed["response"]["result"]["conversations"][0]["intents"][0]["name"]
+            intent = envelope.intent
+
+            # Known intents go straight to their custom agent, skipping the HeadSupportAgent hop
+            target_agent = (intent_agent_map or {}).get(intent)
+            if target_agent in participant_descriptions:
+                print("[TriageAgent]: detected intent ", intent, ", routing directly to", target_agent)
+                return StringResult(
+                    result=target_agent,
+                    reason=f"Routing intent {intent} to mapped custom agent: {target_agent}."
+                )
+
             print("[TriageAgent]: detected intent ", intent, ", routing to HeadSupportAgent for custom agent selection...")
             return StringResult(
                 result=next((agent for agent in participant_descriptions.keys() if agent == "HeadSupportAgent"), None),
@@ -92,8 +189,7 @@ def route_triage_message(last_message: ChatMessageContent, participant_descripti
 def route_head_support_message(last_message: ChatMessageContent, participant_descriptions: dict) -> StringResult:
     try:
         # Grab the target agent from the parsed content
-        parsed = json.loads(last_message.content)
-        route = parsed.get("target_agent")
+        route = get_envelope(last_message).target_agent
 
         print("[HeadSupportAgent] Routing to target custom agent:", route)
         return StringResult(
@@ -110,7 +206,7 @@ def route_head_support_message(last_message: ChatMessageContent, participant_des
 
 def route_custom_agent_message(last_message: ChatMessageContent, participant_descriptions: dict) -> StringResult:
     try:
-        response = json.loads(last_message.content)["response"]
+        response = get_envelope(last_message).response
         print(f"[{last_message.name}]: Response content: {response}")
         print(f"[TranslationAgent]: Translating {response}")
         return StringResult(
@@ -125,11 +221,115 @@ def route_custom_agent_message(last_message: ChatMessageContent, participant_des
         )
 
 
+def get_origin_language(chat_history: ChatHistory) -> str:
+    """
+    Get the user's language from the initial TranslationAgent message, if any.
+    """
+    for message in chat_history:
+        if message.name == "TranslationAgent":
+            envelope = get_envelope(message)
+            return envelope.origin_language if envelope else None
+    return None
+
+
+def is_english(language: str) -> bool:
+    if not language:
+        return False
+    language = language.lower()
+    return language in ["en", "english"] or language.startswith("en-")
+
+
+def get_untranslated_answer(last_message: ChatMessageContent) -> tuple[str, str]:
+    """
+    Get the final (English) answer and need_more_info flag from a custom agent or confident CQA triage message.
+    Returns None if the message is not a final answer.
+    """
+    envelope = get_envelope(last_message)
+    try:
+        if last_message.name in CUSTOM_AGENTS and envelope:
+            return envelope.response, envelope.need_more_info
+
+        if last_message.name == "TriageAgent" and envelope and envelope.type == "cqa_result":
+            answer = envelope.answer
+            if answer["confidenceScore"] >= cqa_confidence:
+                return answer["answer"], "False"
+    except (KeyError, IndexError, TypeError):
+        return None
+    return None
+
+
+def get_clu_result(messages: list[ChatMessageContent]) -> tuple[str, list[dict]]:
+    """
+    Get the top intent and entities of the latest CLU triage result, if any.
+    """
+    for message in reversed(messages):
+        envelope = get_envelope(message) if message.name == "TriageAgent" else None
+        if envelope and envelope.type == "clu_result":
+            try:
+                return envelope.intent, envelope.response["result"]["conversations"][0].get("entities", [])
+            except (KeyError, IndexError, TypeError):
+                return None
+    return None
+
+
+def is_need_more_info(need_more_info) -> bool:
+    return str(need_more_info).lower() == "true"
+
+
+def get_partial_answer(messages: list[ChatMessageContent]) -> tuple[str, str]:
+    """
+    Get the latest untranslated final answer from the messages, if any.
+    """
+    for message in reversed(messages):
+        answer = get_untranslated_answer(message)
+        if answer:
+            return answer
+    return None
+
+
+def create_translation_message(task_content: str, language: str) -> ChatMessageContent:
+    """
+    Create the structured message the TranslationAgent would return for an input already in the target language.
+    """
+    return ChatMessageContent(
+        role=AuthorRole.ASSISTANT,
+        name="TranslationAgent",
+        content=json.dumps({
+            "origin_language": language,
+            "response": {
+                "current_question": task_content
+            },
+            "target_language": "en"
+        })
+    )
+
+
+def is_final_translation(chat_history: ChatHistory) -> bool:
+    """
+    Check if the last message is the TranslationAgent translating the answer back (not the initial translation).
+    """
+    if not chat_history or chat_history[-1].name != "TranslationAgent":
+        return False
+    return any(message.name and message.name != "TranslationAgent" for message in chat_history[:-1])
+
+
+def validate_agent_message(message: ChatMessageContent) -> bool:
+    """
+    Check that an agent response is a complete, well-formed output for its stage, so it can be checkpointed.
+    """
+    return get_envelope(message) is not None
+
+
 class CustomGroupChatManager(GroupChatManager):
     """
     Custom group chat manager for Semantic Kernel Group Chat Orchestration.
     You must override the methods to implement custom logic for agent selection, termination, and message filtering.
     """
+    # CLU intent -> custom agent name, used to bypass the HeadSupportAgent
+    intent_agent_map: dict[str, str] = Field(default_factory=lambda: dict(INTENT_AGENT_MAP))
+    # Request deadline (time.monotonic) and per-agent time budgets
+    deadline: float | None = None
+    agent_budgets: dict[str, float] = Field(default_factory=lambda: dict(AGENT_BUDGETS))
     # Filtering results in the group chat
     async def filter_results(self, chat_history: ChatHistory) -> MessageResult:
         if not chat_history:
@@ -141,8 +341,25 @@ class CustomGroupChatManager(GroupChatManager):
         # Get the last message from the chat history
         last_message = chat_history[-1]
 
+        # Final translation was skipped: wrap the English answer in the TranslationAgent output format
+        if last_message.name != "TranslationAgent" and is_english(get_origin_language(chat_history)):
+            answer = get_untranslated_answer(last_message)
+            if answer:
+                final_answer, need_more_info = answer
+                return MessageResult(
+                    result=ChatMessageContent(role="assistant", name="TranslationAgent", content=json.dumps({
+                        "origin_language": "en",
+                        "source_language": "en",
+                        "response": {
+                            "final_answer": final_answer,
+                            "need_more_info": need_more_info
+                        }
+                    })),
+                    reason="Returning the last agent's response without translation."
+                )
+
         return MessageResult(
-            result=ChatMessageContent(role="assistant", content=last_message.content),
+            result=ChatMessageContent(role="assistant", name=last_message.name, content=last_message.content),
             reason="Returning the last agent's response."
         )
 
@@ -155,6 +372,29 @@ class CustomGroupChatManager(GroupChatManager):
         """
         Multi-agent orchestration method for Semantic Kernel Agent Group Chat.
         This method decides how to select the next agent based on the current message and agent with custom logic based on agent responses.
+        Raises if no agent can be selected, so the failed stage is retried right away instead of waiting for a timeout.
+        """
+        try:
+            next_agent = self.route_next_agent(chat_history, participant_descriptions)
+        except Exception as e:
+            # Routers report failures as StringResult(result=None), which fails validation
+            raise RoutingError(f"No next agent selected: {e}") from e
+        if next_agent.result is None:
+            raise RoutingError(f"No next agent selected: {next_agent.reason}")
+
+        # Do not start a hop that cannot finish before the request deadline
+        if self.deadline is not None:
+            remaining = self.deadline - time.monotonic()
+            budget = self.agent_budgets.get(next_agent.result, default_agent_budget)
+            if remaining < budget:
+                raise DeadlineExceededError(
+                    f"{remaining:.1f}s left before the deadline, {next_agent.result} needs {budget:.1f}s."
+                )
+        return next_agent
+
+    def route_next_agent(self, chat_history: ChatHistory, participant_descriptions: dict) -> StringResult:
+        """
+        Route to the next agent with custom logic based on the last agent response.
         """
         last_message = chat_history[-1] if chat_history else None
         format_agent_response(last_message)
@@ -171,7 +411,7 @@ class CustomGroupChatManager(GroupChatManager):
         # Process triage agent messages
         elif last_message.name == "TriageAgent":
             print("[SYSTEM]: Last message is from TriageAgent, checking if agent returned a CQA or CLU result...")
-            return route_triage_message(last_message, participant_descriptions)
+            return route_triage_message(last_message, participant_descriptions, self.intent_agent_map)
 
         # Process head support agent messages
         elif last_message.name == "HeadSupportAgent":
@@ -179,7 +419,7 @@ class CustomGroupChatManager(GroupChatManager):
             return route_head_support_message(last_message, participant_descriptions)
 
         # Process custom agent messages - customize as needed
-        elif last_message.name in ["OrderStatusAgent", "OrderRefundAgent", "OrderCancelAgent"]:
+        elif last_message.name in CUSTOM_AGENTS:
             print(f"[SYSTEM]: Last message is from {last_message.name}, translate back to original language if needed.")
             return route_custom_agent_message(last_message, participant_descriptions)
 
@@ -205,7 +445,7 @@ class CustomGroupChatManager(GroupChatManager):
             )
 
         # Check if message is from the translation agent and is not the initial translation
-        if last_message.name == "TranslationAgent" and len(chat_history) > 3:
+        if is_final_translation(chat_history):
             print(last_message.name)
             print(last_message.content)
             return BooleanResult(
@@ -213,6 +453,14 @@ class CustomGroupChatManager(GroupChatManager):
                 reason="Chat terminated due to TranslationAgent response."
             )
 
+        # Skip the final translation hop when the user's language is English
+        if is_english(get_origin_language(chat_history)) and get_untranslated_answer(last_message):
+            print("[SYSTEM]: Origin language is English, skipping final translation.")
+            return BooleanResult(
+                result=True,
+                reason="Chat terminated with an answer that needs no translation."
+            )
+
         return BooleanResult(
             result=False,
             reason="No termination flags found in last message."
@@ -228,11 +476,13 @@ class SemanticKernelOrchestrator:
         project_endpoint: str,
         agent_ids: dict,
         fallback_function: Callable[[str, str, str], dict],
-        max_retries: int = 3
+        max_retries: int = 3,
+        runtime_pool: RuntimePool = None,
+        intent_agent_map: dict = None
     ):
         """
         Initialize the semantic kernel orchestrator with the AI Project client, model name, project endpoint,
-        agent IDs, fallback function, and maximum retries.
+        agent IDs, fallback function, maximum retries, the shared runtime pool, and the intent -> agent table.
         """
         self.client = client
         self.model_name = model_name
@@ -240,62 +490,141 @@ class SemanticKernelOrchestrator:
         self.agent_ids = agent_ids
         self.fallback_function = fallback_function
         self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.request_deadline = request_deadline
+        self.agent_budgets = dict(AGENT_BUDGETS)
+        self.intent_agent_map = INTENT_AGENT_MAP if intent_agent_map is None else intent_agent_map
+
+        # Long-lived runtimes shared by concurrent orchestrations:
+        if runtime_pool is None:
+            runtime_pool = RuntimePool()
+            runtime_pool.start()
+        self.runtime_pool = runtime_pool
+
+        # Concurrency limit and queueing for per-request group chats
+        self.agents = []
+        self.concurrency = asyncio.Semaphore(max_concurrent_orchestrations)
+        self.max_queued = max_queued_orchestrations
+        self.queued = 0
+
+        # Pending slot-filling intents per session, answered directly by the custom agent plugins
+        self.dialog_states = DialogStateStore()
+        self.plugin_hooks = self.create_plugin_hooks()
+
+        # Prompt token statistics of the per-agent context policies
+        self.context_stats = ContextStats()
+
+        # Local cache of the Foundry agent definitions, for fast restarts
+        self.agent_cache = AgentDefinitionCache(agent_cache_file)
+        self.agents_source = None
+        self.refresh_task = None
+        self.pretranslate_task = None
+        self.ready = False
+
+        # Cached Azure AI Translator layer, used in the DIRECT translation mode
+        self.translation_service = None
+
+        # Local-first language detection for the translation fast path
+        self.language_detector = LanguageDetector()
 
         # Initialize plugins for custom agents
         self.order_status_plugin = OrderStatusPlugin()
         self.order_refund_plugin = OrderRefundPlugin()
         self.order_cancel_plugin = OrderCancellationPlugin()
 
+    def get_agent_keys(self) -> list[str]:
+        """
+        Agent ID keys of the Foundry agents used by the group chat.
+        """
+        keys = list(AGENT_ID_KEYS)
+        if triage_mode == "DIRECT":
+            keys.remove("TRIAGE_AGENT_ID")
+        if translation_mode == "DIRECT":
+            keys.remove("TRANSLATION_AGENT_ID")
+        return keys
+
+    async def fetch_agent_definitions(self) -> dict:
+        """
+        Fetch the agent definitions from AI Foundry concurrently.
+        """
+        keys = self.get_agent_keys()
+        definitions = await asyncio.gather(*[self.client.agents.get_agent(self.agent_ids[key]) for key in keys])
+        return dict(zip(keys, definitions))
+
+    async def load_agent_definitions(self) -> tuple[dict, str]:
+        """
+        Load the agent definitions from the local cache, or from AI Foundry if any is missing.
+        Returns the definitions and their source ("cache" or "service").
+        """
+        cached = {key: self.agent_cache.get(self.agent_ids[key])[0] for key in self.get_agent_keys()}
+        if all(definition is not None for definition in cached.values()):
+            return cached, "cache"
+
+        definitions = await self.fetch_agent_definitions()
+        for definition in definitions.values():
+            self.agent_cache.put(definition)
+        self.agent_cache.save()
+        return definitions, "service"
+
     async def initialize_agents(self) -> list:
         """
         Initialize the Semantic Kernel Azure AI agents for the semantic kernel orchestrator.
-        This method retrieves the agent definitions from AI Foundry and creates AzureAIAgent instances for each foundry agent.
+        This method loads the agent definitions (from the local cache when available) and creates AzureAIAgent instances for each foundry agent.
         """
-        # Grab the agent definition from AI Foundry
-        triage_agent_definition = await self.client.agents.get_agent(self.agent_ids["TRIAGE_AGENT_ID"])
-        triage_agent = AzureAIAgent(
-            client=self.client,
-            definition=triage_agent_definition,
-            description="A triage agent that routes inquiries to the proper custom agent."
-        )
+        definitions, self.agents_source = await self.load_agent_definitions()
+        return self.build_agents(definitions)
+
+    def build_agents(self, definitions: dict) -> list:
+        """
+        Create the group chat agents from the Foundry agent definitions.
+        """
+        if triage_mode == "DIRECT":
+            # Python triage agent calling the CLU/CQA runtimes directly, no LLM run
+            triage_agent = self.create_direct_triage_agent()
+        else:
+            triage_agent = AzureAIAgent(
+                client=self.client,
+                definition=definitions["TRIAGE_AGENT_ID"],
+                description="A triage agent that routes inquiries to the proper custom agent."
+            )
 
-        order_status_agent_definition = await self.client.agents.get_agent(self.agent_ids["ORDER_STATUS_AGENT_ID"])
         order_status_agent = AzureAIAgent(
             client=self.client,
-            definition=order_status_agent_definition,
+            definition=definitions["ORDER_STATUS_AGENT_ID"],
             description="An agent that checks order status",
             plugins=[OrderStatusPlugin()],
         )
 
-        order_cancel_agent_definition = await self.client.agents.get_agent(self.agent_ids["ORDER_CANCEL_AGENT_ID"])
         order_cancel_agent = AzureAIAgent(
             client=self.client,
-            definition=order_cancel_agent_definition,
+            definition=definitions["ORDER_CANCEL_AGENT_ID"],
             description="An agent that checks on cancellations",
             plugins=[OrderCancellationPlugin()],
         )
 
-        order_refund_agent_definition = await self.client.agents.get_agent(self.agent_ids["ORDER_REFUND_AGENT_ID"])
         order_refund_agent = AzureAIAgent(
             client=self.client,
-            definition=order_refund_agent_definition,
+            definition=definitions["ORDER_REFUND_AGENT_ID"],
             description="An agent that checks on refunds",
             plugins=[OrderRefundPlugin()],
         )
 
-        head_support_agent_definition = await self.client.agents.get_agent(self.agent_ids["HEAD_SUPPORT_AGENT_ID"])
         head_support_agent = AzureAIAgent(
             client=self.client,
-            definition=head_support_agent_definition,
+            definition=definitions["HEAD_SUPPORT_AGENT_ID"],
             description="A head support agent that routes inquiries to the proper custom agent.",
         )
 
-        translation_agent_definition = await self.client.agents.get_agent(self.agent_ids["TRANSLATION_AGENT_ID"])
-        translation_agent = AzureAIAgent(
-            client=self.client,
-            definition=translation_agent_definition,
-            description="A translation agent that translates to English",
-        )
+        if translation_mode == "DIRECT":
+            # Python translation agent calling Azure AI Translator through the translation cache
+            translation_agent = self.create_direct_translation_agent()
+        else:
+            translation_agent = AzureAIAgent(
+                client=self.client,
+                definition=definitions["TRANSLATION_AGENT_ID"],
+                description="A translation agent that translates to English",
+            )
         # Set the translation agent for the orchestrator to handle fallback translations
         self.translation_agent = translation_agent
 
@@ -309,79 +638,345 @@ class SemanticKernelOrchestrator:
 
         return [translation_agent, triage_agent, head_support_agent, order_status_agent, order_cancel_agent, order_refund_agent]
 
-    async def create_agent_group_chat(self) -> None:
+    def create_direct_triage_agent(self) -> DirectTriageAgent:
         """
-        Create an agent group chat with the specified chat ID after all agents have been initialized.
-        This method initializes the agents and sets up the agent group chat with custom selection and termination strategies
+        Create the direct-triage TriageAgent from the existing CLU/CQA runtime routers.
         """
-        created_agents = await self.initialize_agents()
-        print("Agents initialized:", [agent.name for agent in created_agents])
+        # Imported here so the AGENT mode does not require CLU/CQA runtime settings
+        from router.clu_router import create_clu_router
+        from router.cqa_router import create_cqa_router
+
+        return DirectTriageAgent(
+            name="TriageAgent",
+            description="A triage agent that calls CLU and CQA directly and returns the result.",
+            clu_router=create_clu_router(),
+            cqa_router=create_cqa_router()
+        )
 
-        self.orchestration = GroupChatOrchestration(
-            members=created_agents,
-            manager=CustomGroupChatManager(),
+    def create_direct_translation_agent(self) -> DirectTranslationAgent:
+        """
+        Create the direct-translation TranslationAgent over the shared translation service.
+        """
+        if self.translation_service is None:
+            self.translation_service = TranslationService(TranslatorClient())
+
+        return DirectTranslationAgent(
+            name="TranslationAgent",
+            description="A translation agent that translates with Azure AI Translator and a translation cache.",
+            translation_service=self.translation_service
         )
 
+    async def create_agent_group_chat(self) -> None:
+        """
+        Initialize the agents shared by all agent group chats.
+        Each message gets its own GroupChatOrchestration and CustomGroupChatManager (see create_orchestration),
+        while the expensive agent definitions and client are created once here.
+        Agents built from cached definitions are refreshed from AI Foundry in the background.
+        """
+        self.agents = apply_context_policies(await self.initialize_agents(), self.context_stats)
+        self.ready = True
+        print("Agents initialized:", [agent.name for agent in self.agents], "from", self.agents_source)
         print("Agent group chat created successfully.")
 
-    async def process_message(self, task_content: str) -> str:
+        if self.agents_source == "cache":
+            self.refresh_task = asyncio.create_task(self.refresh_agents())
+
+        if self.translation_service is not None:
+            # Pre-translate the canned answers for the configured languages
+            self.pretranslate_task = asyncio.create_task(asyncio.to_thread(self.translation_service.pretranslate))
+
+    async def refresh_agents(self) -> None:
+        """
+        Re-fetch the agent definitions and swap in new agents if any definition changed.
+        In-flight group chats keep the agents they started with.
+        """
+        try:
+            definitions = await self.fetch_agent_definitions()
+            changed = [key for key, definition in definitions.items() if self.agent_cache.put(definition)]
+            if changed:
+                self.agent_cache.save()
+                self.agents = apply_context_policies(self.build_agents(definitions), self.context_stats)
+                print(f"[SYSTEM]: Refreshed changed agent definitions: {changed}")
+            self.agents_source = "service"
+
+        except Exception as e:
+            print(f"[EXCEPTION]: Agent definition refresh failed, keeping cached agents: {e}")
+
+    def create_orchestration(self, agent_response_callback: Callable = None, deadline: float = None) -> GroupChatOrchestration:
+        """
+        Create a per-request agent group chat over the shared agents, with custom selection and termination strategies.
+        """
+        return GroupChatOrchestration(
+            members=self.agents,
+            manager=CustomGroupChatManager(
+                intent_agent_map=self.intent_agent_map,
+                deadline=deadline,
+                agent_budgets=self.agent_budgets
+            ),
+            agent_response_callback=agent_response_callback,
+        )
+
+    @asynccontextmanager
+    async def admission(self):
+        """
+        Limit concurrent group chats; queue up to max_queued requests and reject the rest.
+        """
+        if self.queued >= self.max_queued:
+            raise OrchestratorBusyError(f"Orchestration queue is full ({self.queued} waiting).")
+
+        self.queued += 1
+        try:
+            await self.concurrency.acquire()
+        finally:
+            self.queued -= 1
+
+        try:
+            yield
+        finally:
+            self.concurrency.release()
+
+    def create_plugin_hooks(self) -> HookRegistry:
+        """
+        Intent -> custom agent plugin function, for follow-up turns resolved without the group chat.
+        """
+        registry = HookRegistry()
+        registry.register("OrderStatus", lambda entities: self.order_status_plugin.check_order_status(get_order_id(entities)))
+        registry.register("CancelOrder", lambda entities: self.order_cancel_plugin.process_cancellation(get_order_id(entities)))
+        registry.register("RefundStatus", lambda entities: self.order_refund_plugin.process_refund(get_order_id(entities)))
+        return registry
+
+    async def answer_follow_up(self, session_id: str, message: str) -> tuple:
+        """
+        Answer a follow-up turn that supplies the missing slots of the session's pending intent,
+        by extracting the entities locally and calling the custom agent plugin directly.
+        Returns None if the turn must go through the agent group chat.
+        """
+        state = self.dialog_states.get(session_id)
+        if state is None or not (is_english(state.language) or (state.language and self.translation_service)):
+            return None
+
+        resolved = self.dialog_states.resolve(session_id, message)
+        if resolved is None:
+            return None
+
+        intent, entities = resolved
+        response = await self.plugin_hooks.dispatch(intent, entities)
+        if response is None:
+            return None
+
+        if not is_english(state.language):
+            response = await asyncio.to_thread(self.translation_service.translate_answer, response, state.language)
+
+        print(f"[SYSTEM]: Follow-up resolved locally for intent {intent}: {response}")
+        return response, "False"
+
+    def update_dialog_state(self, session_id: str, messages: list[ChatMessageContent], need_more_info, language: str) -> None:
+        """
+        Remember the intent of a session when its answer asks for more information.
+        """
+        if not session_id:
+            return
+
+        clu_result = get_clu_result(messages) if is_need_more_info(need_more_info) else None
+        if clu_result is None:
+            self.dialog_states.clear(session_id)
+            return
+
+        intent, entities = clu_result
+        self.dialog_states.set_pending(session_id, intent, entities, get_origin_language(messages) or language)
+
+    def get_translation_stats(self) -> dict:
+        """
+        Get translation cache statistics of the DIRECT translation mode.
+        """
+        if self.translation_service is None:
+            return {"mode": translation_mode}
+        return {"mode": translation_mode, **self.translation_service.cache.get_stats()}
+
+    def get_context_stats(self) -> dict:
+        """
+        Get prompt tokens per request with and without the per-agent context policies.
+        """
+        return self.context_stats.as_dict()
+
+    async def detect_language(self, text: str) -> str:
+        """
+        Detect the language of the user message, or None if it cannot be determined.
+        """
+        return await asyncio.to_thread(self.language_detector.detect, text)
+
+    def create_task(self, task_content: str, language: str = None) -> str | list[ChatMessageContent]:
+        """
+        Create the group chat task.
+        When the user message is already in English, inject the TranslationAgent's structured output
+        so routing continues at the TriageAgent and both translation hops are skipped.
+        """
+        if translation_fast_path and is_english(language):
+            print("[SYSTEM]: Message is in English, skipping TranslationAgent hops.")
+            return [
+                ChatMessageContent(role=AuthorRole.USER, content=task_content),
+                create_translation_message(task_content, language)
+            ]
+        return task_content
+
+    async def process_message(
+        self,
+        task_content: str,
+        language: str = None,
+        deadline: float = None,
+        session_id: str = None
+    ) -> str:
         """
         Process a message in the agent group chat.
-        This method creates a new agent group chat and processes the message.
+        This method invokes the agent group chat on a runtime from the shared runtime pool.
+        The optional language of the user message enables the translation fast path, and the optional
+        deadline (time.monotonic) bounds the whole request, including time spent waiting for a slot.
+        With a session ID, answers asking for more information remember the pending intent (see answer_follow_up).
+        Raises OrchestratorBusyError when too many messages are already waiting.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + self.request_deadline
+        task = self.create_task(task_content, language)
+        self.context_stats.requests += 1
+
+        # Wait for a free group chat slot
+        async with self.admission():
+            return await self.invoke_with_retries(task, deadline, session_id, language)
+
+    async def invoke_with_retries(
+        self,
+        task: str | list[ChatMessageContent],
+        deadline: float,
+        session_id: str = None,
+        language: str = None
+    ) -> tuple:
+        """
+        Invoke agent group chats for the task, retrying on failure until the deadline.
+        Every well-formed agent response is checkpointed, so a retry resumes the group chat at the failed stage
+        instead of re-running the stages that already succeeded. A response that cannot be routed is dropped
+        from the checkpoint, so its stage runs again.
         """
         retry_count = 0
         last_exception = None
         need_more_info = False
+        checkpoint = list(task) if isinstance(task, list) else [ChatMessageContent(role=AuthorRole.USER, content=task)]
+        last_checkpointed = False
+        stage_timings = []
+        start = last_mark = time.monotonic()
+
+        def checkpoint_message(message: ChatMessageContent) -> None:
+            nonlocal last_mark, last_checkpointed
+            if not message.content:
+                # Intermediate tool call messages
+                return
+
+            now = time.monotonic()
+            valid = validate_agent_message(message)
+            stage_timings.append((message.name if valid else f"{message.name} (invalid)", now - last_mark))
+            last_mark = now
+
+            last_checkpointed = valid
+            if valid:
+                checkpoint.append(ChatMessageContent(role=message.role, name=message.name, content=message.content))
 
         # Use retry logic to handle potential errors during chat invocation
-        while retry_count < self.max_retries:
-            print(f"\n[RETRY ATTEMPT {retry_count}] Starting new runtime...")
-            runtime = InProcessRuntime()
-            runtime.start()
-
-            try:
-                orchestration_result = await self.orchestration.invoke(
-                    task=task_content,
+        while retry_count < self.max_retries and time.monotonic() < deadline:
+            stage = checkpoint[-1].name or "USER"
+            print(f"\n[RETRY ATTEMPT {retry_count}] Invoking orchestration after stage {stage} on shared runtime...")
+            last_mark = time.monotonic()
+            last_checkpointed = False
+
+            async with self.runtime_pool.acquire() as runtime:
+                orchestration_result = await self.create_orchestration(checkpoint_message, deadline).invoke(
+                    task=list(checkpoint),
                     runtime=runtime,
                 )
 
                 try:
-                    # Timeout to avoid indefinite hangs
-                    value = await orchestration_result.get(timeout=120)
+                    # Wait no longer than the remaining request time
+                    value = await orchestration_result.get(timeout=max(0, deadline - time.monotonic()))
                     print(f"\n***** Result *****\n{value.content}")
 
-                    final_response = json.loads(value.content)
+                    # Parsed like every other agent message (the final translation was already parsed when checkpointed)
+                    envelope = get_envelope(value)
+                    if not isinstance(envelope, TranslationEnvelope):
+                        raise ValueError("Final response is not a well-formed TranslationAgent response.")
+                    final_response = envelope.response
+                    if final_response.final_answer is None:
+                        raise ValueError("Final response has no final_answer.")
 
-                    print("[SYSTEM]: Final response is ", final_response['response']['final_answer'])
-                    need_more_info = final_response['response']['need_more_info']
-                    return final_response['response']['final_answer'], need_more_info
+                    print("[SYSTEM]: Final response is ", final_response.final_answer)
+                    need_more_info = final_response.need_more_info
+                    self.report_timings(stage_timings, start)
+                    self.update_dialog_state(session_id, checkpoint, need_more_info, language)
+                    return final_response.final_answer, need_more_info
 
                 except Exception as e:
                     print(f"[EXCEPTION]: Orchestration failed with exception: {e}")
                     last_exception = {"type": "exception", "message": str(e)}
                     retry_count += 1
 
-            finally:
-                try:
-                    await runtime.stop_when_idle()
-                except Exception as e:
-                    print(f"[SHUTDOWN ERROR]: Runtime failed to shut down cleanly: {e}")
+                    # Stop the failed invocation so it does not keep running on the shared runtime
+                    if not orchestration_result.event.is_set():
+                        orchestration_result.cancel()
+
+                    # A final message that could not be used is re-generated on retry
+                    if checkpoint[-1].name and is_final_translation(checkpoint):
+                        checkpoint.pop()
+
+                    # So is a well-formed response that could not be routed (e.g. a low-confidence CQA result)
+                    elif isinstance(e, RoutingError) and last_checkpointed:
+                        checkpoint.pop()
+
+                    if isinstance(e, (DeadlineExceededError, asyncio.TimeoutError)):
+                        print("[SYSTEM]: Request deadline cannot fit the next hop, stopping retries.")
+                        break
+
+            if retry_count < self.max_retries:
+                delay = self.retry_delay(retry_count)
+                if time.monotonic() + delay >= deadline:
+                    break
+                await asyncio.sleep(delay)
+                stage_timings.append(("retry_wait", delay))
 
-            # Short delay before retry
-            await asyncio.sleep(1)
+        self.report_timings(stage_timings, start)
+
+        # Return the untranslated answer if only the final translation did not fit
+        partial_answer = get_partial_answer(checkpoint)
+        if partial_answer:
+            print("[SYSTEM]: Returning partial (untranslated) answer.")
+            return partial_answer
 
         if last_exception:
             return {
                 "error": f"An error occurred: {last_exception}"
             }, need_more_info
 
+        return {
+            "error": "An error occurred: request deadline exceeded"
+        }, need_more_info
+
+    def report_timings(self, stage_timings: list[tuple[str, float]], start: float) -> None:
+        """
+        Report time spent per stage of the request.
+        """
+        timings = ", ".join(f"{stage}={seconds:.2f}s" for stage, seconds in stage_timings)
+        print(f"[SYSTEM]: Stage timings: {timings}, total={time.monotonic() - start:.2f}s")
+
+    def retry_delay(self, retry_count: int) -> float:
+        """
+        Exponential backoff with full jitter.
+        """
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** (retry_count - 1)))
+
 
 def format_agent_response(response):
-    try:
-        # Pretty print the JSON response
-        formatted_content = json.dumps(json.loads(response.content), indent=2)
+    envelope = get_envelope(response)
+    if envelope is not None:
+        # Pretty print the parsed response
+        formatted_content = envelope.model_dump_json(indent=2, exclude_none=True)
         print(f"[{response.name if response.name else 'USER'}]: \n{formatted_content}\n")
-    except json.JSONDecodeError:
-        # Fallback to regular print if content is not JSON
+    else:
+        # Fallback to regular print if content is not an agent envelope
         print(f"[{response.name}]: {response.content}\n")
     return response.content
@@ -0,0 +1,200 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+"""
+Speculative RAG retrieval.
+
+The fallback search is started in parallel with the router call, so a fallback answer costs
+max(router, search) + completion instead of router + search + completion. Results are dropped
+when the router succeeds. A policy decides when to speculate: ALWAYS, NEVER, or ADAPTIVE (only
+while the recent fallback rate is high enough for the saved latency to outweigh wasted searches).
+"""
+
+_logger = logging.getLogger(__name__)
+
+# ALWAYS | ADAPTIVE | NEVER
+RAG_SPECULATION_POLICY = os.environ.get("RAG_SPECULATION_POLICY", "ADAPTIVE").upper()
+# Recent routing outcomes considered by the ADAPTIVE policy:
+RAG_SPECULATION_WINDOW = int(os.environ.get("RAG_SPECULATION_WINDOW", "50"))
+# Minimum recent fallback rate for ADAPTIVE speculation:
+RAG_SPECULATION_THRESHOLD = float(os.environ.get("RAG_SPECULATION_THRESHOLD", "0.3"))
+RAG_SPECULATION_MAX_WORKERS = int(os.environ.get("RAG_SPECULATION_MAX_WORKERS", "4"))
+
+# Outcomes needed before ADAPTIVE stops speculating on a low fallback rate
+MIN_ADAPTIVE_SAMPLES = 10
+
+
+class Speculation():
+    """
+    Search started ahead of the routing decision.
+
+    A speculation is consumed once, either collected by the fallback or discarded.
+    """
+
+    def __init__(self):
+        self.future = None
+        self.search_time = None
+        self.consumed = False
+
+
+class SpeculativeRetriever():
+    """
+    Runs search(query, language, id) -> documents speculatively, gated by a policy.
+    """
+
+    def __init__(
+        self,
+        search: Callable[[str, str, str], list[dict]],
+        policy: str = RAG_SPECULATION_POLICY,
+        window: int = RAG_SPECULATION_WINDOW,
+        threshold: float = RAG_SPECULATION_THRESHOLD,
+        max_workers: int = RAG_SPECULATION_MAX_WORKERS
+    ):
+        self.search = search
+        self.policy = policy
+        self.threshold = threshold
+        self.outcomes = deque(maxlen=window)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.lock = threading.Lock()
+
+        # Stats:
+        self.speculated = 0
+        self.used = 0
+        self.wasted = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.saved_time = 0.0
+        self.wasted_time = 0.0
+
+    def get_fallback_rate(self) -> float:
+        with self.lock:
+            return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def should_speculate(self) -> bool:
+        if self.policy == "ALWAYS":
+            return True
+        if self.policy == "NEVER":
+            return False
+
+        with self.lock:
+            samples = len(self.outcomes)
+        return samples < MIN_ADAPTIVE_SAMPLES or self.get_fallback_rate() >= self.threshold
+
+    def start(
+        self,
+        query: str,
+        language: str,
+        id: str
+    ) -> Speculation:
+        """
+        Start the fallback search for query if the policy allows it.
+        """
+        if not self.should_speculate():
+            return None
+
+        speculation = Speculation()
+
+        def run() -> list[dict]:
+            start = time.perf_counter()
+            try:
+                return self.search(query, language, id)
+            finally:
+                speculation.search_time = time.perf_counter() - start
+
+        with self.lock:
+            self.speculated += 1
+        speculation.future = self.executor.submit(run)
+        return speculation
+
+    def record_route(
+        self,
+        fallback: bool
+    ) -> None:
+        """
+        Record a routing outcome for the ADAPTIVE policy.
+        """
+        with self.lock:
+            self.outcomes.append(1 if fallback else 0)
+
+    def consume(
+        self,
+        speculation: Speculation
+    ) -> bool:
+        """
+        Mark a speculation consumed, returning False if it already was.
+        """
+        with self.lock:
+            if speculation.consumed:
+                return False
+            speculation.consumed = True
+            return True
+
+    def collect(
+        self,
+        speculation: Speculation
+    ) -> list[dict]:
+        """
+        Get the documents of a speculation for the fallback, or None if the search failed or was discarded.
+        """
+        if speculation is None or not self.consume(speculation):
+            return None
+
+        waited_from = time.perf_counter()
+        try:
+            documents = speculation.future.result()
+        except Exception as e:
+            _logger.warning(f"Speculative search failed: {e}")
+            with self.lock:
+                self.failed += 1
+            return None
+
+        # Search time hidden behind the router call:
+        waited = time.perf_counter() - waited_from
+        with self.lock:
+            self.used += 1
+            self.saved_time += max(0.0, speculation.search_time - waited)
+        return documents
+
+    def discard(
+        self,
+        speculation: Speculation
+    ) -> None:
+        """
+        Drop a speculation that was not collected (the router succeeded or failed).
+        """
+        if speculation is None or not self.consume(speculation):
+            return
+
+        if speculation.future.cancel():
+            # Never started, nothing wasted:
+            with self.lock:
+                self.cancelled += 1
+            return
+
+        def record_waste(future: Future) -> None:
+            with self.lock:
+                self.wasted += 1
+                self.wasted_time += speculation.search_time or 0.0
+
+        speculation.future.add_done_callback(record_waste)
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "policy": self.policy,
+                "fallback_rate": round(sum(self.outcomes) / len(self.outcomes), 3) if self.outcomes else 0.0,
+                "speculated": self.speculated,
+                "used": self.used,
+                "wasted": self.wasted,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+                "saved_seconds": round(self.saved_time, 3),
+                "wasted_search_seconds": round(self.wasted_time, 3)
+            }
@@ -0,0 +1,19 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+import pytest
+
+# Make backend modules importable when running pytest from any directory:
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+@pytest.fixture(autouse=True)
+def reset_shared_rate_limiters():
+    """
+    Rate limiters are shared per process: do not let one test's pauses or buckets slow down the next.
+    """
+    from rate_limiter import reset_rate_limiters
+    reset_rate_limiters()
+    yield
+    reset_rate_limiters()
@@ -0,0 +1,175 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import re
+import json
+import asyncio
+from typing import Callable
+from semantic_kernel.contents import AuthorRole, ChatMessageContent
+from local_agents import LocalAgent
+from agents.order_status_plugin import OrderStatusPlugin
+from agents.order_refund_plugin import OrderRefundPlugin
+from agents.order_cancel_plugin import OrderCancellationPlugin
+
+"""
+Offline stand-ins for the Foundry agents used by the Semantic Kernel orchestrator.
+
+Each fake agent answers with the same JSON envelopes the Foundry agents are instructed to return,
+so the group chat routing can be exercised without any Azure resources.
+"""
+
+NEED_MORE_INFO = "Please provide more information about your order so I can better assist you."
+RETURN_POLICY = "Contoso Outdoors is proud to offer a 30 day refund policy."
+
+INTENT_KEYWORDS = {
+    "cancel": "CancelOrder",
+    "refund": "RefundStatus",
+    "status": "OrderStatus"
+}
+
+
+class FakeAgent(LocalAgent):
+    """
+    Local agent answering through a python responder(messages) function.
+    """
+    responder: Callable = None
+    delay: float = 0.0
+    invocations: int = 0
+    last_messages: list = []
+    threads: list = []
+
+    async def respond(self, messages: list[ChatMessageContent]) -> str:
+        self.invocations += 1
+        self.last_messages = messages
+        await asyncio.sleep(self.delay)
+        return self.responder(messages)
+
+    async def _invoke(self, messages, thread):
+        message, thread = await super()._invoke(messages, thread)
+        self.threads.append(thread)
+        return message, thread
+
+
+def last_content(messages: list[ChatMessageContent]) -> ChatMessageContent:
+    """
+    Last message that is not a group chat transfer notice.
+    """
+    return [m for m in messages if not str(m.content).startswith("Transferred to")][-1]
+
+
+def translation_response(messages: list[ChatMessageContent]) -> str:
+    last = last_content(messages)
+    if last.role == AuthorRole.USER:
+        return json.dumps({
+            "origin_language": "en",
+            "response": {"current_question": last.content},
+            "target_language": "en"
+        })
+
+    parsed = json.loads(last.content)
+    if parsed.get("type") == "cqa_result":
+        answer, need_more_info = parsed["response"]["answers"][0]["answer"], "False"
+    else:
+        answer, need_more_info = parsed["response"], parsed["need_more_info"]
+
+    return json.dumps({
+        "origin_language": "en",
+        "source_language": "en",
+        "response": {"final_answer": answer, "need_more_info": need_more_info}
+    })
+
+
+def get_question(messages: list[ChatMessageContent]) -> str:
+    for message in messages:
+        try:
+            return json.loads(message.content)["response"]["current_question"]
+        except Exception:
+            continue
+    return str(messages[0].content)
+
+
+def triage_response(messages: list[ChatMessageContent]) -> str:
+    question = get_question(messages)
+    if "policy" in question.lower():
+        return json.dumps({
+            "type": "cqa_result",
+            "response": {"answers": [{"answer": RETURN_POLICY, "confidenceScore": 0.9, "id": 1, "questions": [question]}]},
+            "terminated": "True"
+        })
+
+    intent = next((i for k, i in INTENT_KEYWORDS.items() if k in question.lower()), "None")
+    entities = [
+        {"name": "OrderId", "category": "OrderId", "text": m.group(), "offset": m.start(), "length": len(m.group()),
+         "confidenceScore": 1.0}
+        for m in re.finditer(r"\d{3,}", question)
+    ]
+    # Full ranked intent list, as returned by the CLU runtime:
+    intents = [{"name": intent, "type": "intent", "confidenceScore": 0.9}] + [
+        {"name": other, "type": "intent", "confidenceScore": 0.05}
+        for other in list(INTENT_KEYWORDS.values()) + ["None"] if other != intent
+    ]
+    return json.dumps({
+        "type": "clu_result",
+        "response": {
+            "kind": "ConversationalAIResult",
+            "result": {
+                "conversations": [{
+                    "id": "order",
+                    "intents": intents,
+                    "entities": entities,
+                    "topIntent": intent,
+                    "projectKind": "Conversation"
+                }],
+                "warnings": []
+            }
+        },
+        "terminated": "False"
+    }, indent=2)
+
+
+def get_clu_result(messages: list[ChatMessageContent]) -> dict:
+    for message in messages:
+        try:
+            parsed = json.loads(message.content)
+        except Exception:
+            continue
+        if parsed.get("type") == "clu_result":
+            return parsed["response"]["result"]["conversations"][0]
+    return None
+
+
+def head_support_response(messages: list[ChatMessageContent]) -> str:
+    conversation = get_clu_result(messages)
+    intent = conversation["intents"][0]["name"]
+    agents = {"OrderStatus": "OrderStatusAgent", "CancelOrder": "OrderCancelAgent", "RefundStatus": "OrderRefundAgent"}
+    return json.dumps({
+        "target_agent": agents.get(intent),
+        "intent": intent,
+        "entities": conversation["entities"],
+        "terminated": "False"
+    })
+
+
+def create_custom_response(plugin_function: Callable[[str], str]) -> Callable:
+    def custom_response(messages: list[ChatMessageContent]) -> str:
+        entities = get_clu_result(messages)["entities"]
+        if not entities:
+            return json.dumps({"response": NEED_MORE_INFO, "terminated": "True", "need_more_info": "True"})
+        return json.dumps({"response": plugin_function(entities[0]["text"]), "terminated": "True", "need_more_info": "False"})
+    return custom_response
+
+
+def create_fake_agents(delay: float = 0.0) -> list[FakeAgent]:
+    """
+    Create fake agents in the same order as SemanticKernelOrchestrator.initialize_agents.
+    """
+    return [
+        FakeAgent(name="TranslationAgent", description="translation", responder=translation_response, delay=delay),
+        FakeAgent(name="TriageAgent", description="triage", responder=triage_response, delay=delay),
+        FakeAgent(name="HeadSupportAgent", description="head support", responder=head_support_response, delay=delay),
+        FakeAgent(name="OrderStatusAgent", description="order status",
+                  responder=create_custom_response(OrderStatusPlugin().check_order_status), delay=delay),
+        FakeAgent(name="OrderCancelAgent", description="order cancel",
+                  responder=create_custom_response(OrderCancellationPlugin().process_cancellation), delay=delay),
+        FakeAgent(name="OrderRefundAgent", description="order refund",
+                  responder=create_custom_response(OrderRefundPlugin().process_refund), delay=delay),
+    ]
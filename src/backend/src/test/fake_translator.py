@@ -0,0 +1,31 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+from language_detection import detect_english_locally
+
+"""
+Offline stand-in for the Azure AI Translator REST client.
+"""
+
+
+class StubTranslatorClient():
+    """
+    Translator returning known translations, or the text tagged with the target language.
+    """
+
+    def __init__(self, translations: dict = None):
+        # text -> (translation, source language)
+        self.translations = translations or {}
+        self.calls = 0
+        self.texts = 0
+
+    def translate(self, texts: list[str], target: str, source: str = None, text_type: str = "plain") -> list[tuple[str, str]]:
+        self.calls += 1
+        self.texts += len(texts)
+        results = []
+        for text in texts:
+            if text in self.translations:
+                results.append(self.translations[text])
+            else:
+                language = source or ("en" if detect_english_locally(text) else "fr")
+                results.append((text if language == target else f"[{target}] {text}", language))
+        return results
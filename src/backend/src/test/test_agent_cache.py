@@ -0,0 +1,85 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import time
+import asyncio
+from types import SimpleNamespace
+from azure.ai.agents.models import Agent as AgentDefinition
+from semantic_kernel_orchestrator import SemanticKernelOrchestrator, AGENT_ID_KEYS
+from agent_cache import AgentDefinitionCache
+from runtime_pool import RuntimePool
+from fake_agents import FakeAgent
+
+"""
+This module contains offline test cases for the parallel, cached agent initialization.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_agent_cache.py -s -v
+"""
+
+AGENT_IDS = {key: f"asst_{key.lower()}" for key in AGENT_ID_KEYS}
+
+
+class FakeAgentsClient():
+    """
+    Foundry agents client returning definitions after a delay.
+    """
+
+    def __init__(self, instructions: str = "v1", delay: float = 0.1):
+        self.instructions = instructions
+        self.delay = delay
+        self.calls = 0
+
+    async def get_agent(self, agent_id: str) -> AgentDefinition:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return AgentDefinition(id=agent_id, object="assistant", name=agent_id, model="gpt-4o", instructions=self.instructions)
+
+
+def create_orchestrator(agents_client: FakeAgentsClient, cache_file: str) -> SemanticKernelOrchestrator:
+    runtime_pool = RuntimePool(size=1, max_uses=0)
+    orchestrator = SemanticKernelOrchestrator(
+        client=SimpleNamespace(agents=agents_client),
+        model_name="test",
+        project_endpoint="test",
+        agent_ids=AGENT_IDS,
+        fallback_function=None,
+        runtime_pool=runtime_pool
+    )
+    orchestrator.agent_cache = AgentDefinitionCache(cache_file)
+    # Record the definitions instead of creating Foundry-backed agents
+    orchestrator.build_agents = lambda definitions: [
+        FakeAgent(id=d.id, name=d.name, description=d.instructions) for d in definitions.values()
+    ]
+    return orchestrator
+
+
+def test_parallel_then_cached_initialization(tmp_path):
+    """Test definitions are fetched concurrently, cached, and refreshed in the background on restart"""
+    cache_file = str(tmp_path / "agent_cache.json")
+
+    async def test():
+        # Cold start: fetch all definitions concurrently
+        client = FakeAgentsClient()
+        orchestrator = create_orchestrator(client, cache_file)
+        start = time.perf_counter()
+        definitions, source = await orchestrator.load_agent_definitions()
+        assert time.perf_counter() - start < 0.3
+        assert (source, client.calls, len(definitions)) == ("service", 6, 6)
+
+        # Warm start: definitions from disk, refreshed in the background
+        client = FakeAgentsClient(instructions="v2")
+        orchestrator = create_orchestrator(client, cache_file)
+        definitions, source = await orchestrator.load_agent_definitions()
+        assert (source, client.calls) == ("cache", 0)
+        assert definitions["TRIAGE_AGENT_ID"].instructions == "v1"
+
+        orchestrator.build_agents(definitions)
+        orchestrator.agents_source = source
+        await orchestrator.refresh_agents()
+        assert client.calls == 6
+        assert orchestrator.agents_source == "service"
+        assert {agent.description for agent in orchestrator.agents} == {"v2"}
+        assert AgentDefinitionCache(cache_file).get(AGENT_IDS["TRIAGE_AGENT_ID"])[0].instructions == "v2"
+
+    asyncio.run(test())
@@ -0,0 +1,53 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import json
+from semantic_kernel.contents import AuthorRole, ChatMessageContent
+from agent_envelopes import TriageEnvelope, get_envelope, parse_envelope
+
+"""
+This module contains test cases for the typed agent response envelopes.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_agent_envelopes.py -s -v
+"""
+
+
+def create_message(name: str, content: str) -> ChatMessageContent:
+    return ChatMessageContent(role=AuthorRole.ASSISTANT, name=name, content=content)
+
+
+def test_parse_envelopes():
+    """Test each agent's envelope is parsed and validated"""
+    triage = get_envelope(create_message("TriageAgent", json.dumps({
+        "type": "clu_result",
+        "response": {"result": {"conversations": [{"intents": [{"name": "OrderStatus"}], "entities": []}]}},
+        "terminated": "False"
+    })))
+    assert isinstance(triage, TriageEnvelope)
+    assert triage.intent == "OrderStatus"
+
+    translation = get_envelope(create_message(
+        "TranslationAgent",
+        '```json\n{"origin_language": "fr", "response": {"current_question": "Where is my order?"}}\n```'
+    ))
+    assert translation.response.current_question == "Where is my order?"
+
+    refund = get_envelope(create_message("OrderRefundAgent", '{"response": "Refunded.", "terminated": "True"}'))
+    assert (refund.response, refund.need_more_info) == ("Refunded.", "False")
+
+
+def test_malformed_envelopes():
+    """Test malformed or incomplete responses have no envelope"""
+    assert get_envelope(create_message("TranslationAgent", '{"origin_language": "fr", "response": {}}')) is None
+    assert get_envelope(create_message("TriageAgent", '{"type": "other", "response": {}}')) is None
+    assert get_envelope(create_message("HeadSupportAgent", "Routing to OrderStatusAgent")) is None
+    assert get_envelope(ChatMessageContent(role=AuthorRole.USER, content='{"response": "hi"}')) is None
+
+
+def test_envelope_parsed_once():
+    """Test repeated lookups of a message reuse the cached envelope"""
+    message = create_message("OrderStatusAgent", '{"response": "Shipped.", "terminated": "True", "need_more_info": "False"}')
+    hits = parse_envelope.cache_info().hits
+    assert get_envelope(message) is get_envelope(message)
+    assert parse_envelope.cache_info().hits == hits + 1
@@ -0,0 +1,105 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import httpx
+import pytest
+from collections import Counter
+from types import SimpleNamespace
+from openai import InternalServerError, RateLimitError, BadRequestError
+from deployment_pool import Deployment, DeploymentPool
+
+"""
+This module contains test cases for Azure OpenAI multi-deployment load balancing.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_deployment_pool.py -s -v
+"""
+
+
+def create_error(error_type, status_code: int, headers: dict = None):
+    request = httpx.Request("POST", "https://aoai.example.com")
+    response = httpx.Response(status_code, headers=headers or {}, request=request)
+    return error_type("error", response=response, body=None)
+
+
+def create_response(headers: dict = None):
+    return SimpleNamespace(headers=headers or {}, parse=lambda: "ok")
+
+
+def create_pool(*weights):
+    deployments = [Deployment(f"https://aoai{i}.example.com", "gpt-4o", weight) for i, weight in enumerate(weights)]
+    return DeploymentPool(deployments, rate_limit_cooldown=10, error_cooldown=5)
+
+
+def test_weighted_round_robin():
+    """Test requests are spread over deployments by weight"""
+    pool = create_pool(3, 1)
+    counts = Counter()
+    for _ in range(400):
+        counts[pool.select().endpoint] += 1
+
+    assert counts["https://aoai0.example.com"] == 300
+    assert counts["https://aoai1.example.com"] == 100
+
+
+def test_rate_limit_failover():
+    """Test a 429 fails over to the next deployment and puts the deployment on cooldown"""
+    pool = create_pool(1, 1)
+    throttled = pool.deployments[0]
+    calls = []
+
+    def request(deployment):
+        calls.append(deployment)
+        if deployment is throttled:
+            raise create_error(RateLimitError, 429, {"retry-after": "30"})
+        return create_response()
+
+    for _ in range(4):
+        assert pool.call(request) == "ok"
+
+    # Only the first request hits the throttled deployment:
+    assert calls.count(throttled) == 1
+    health = pool.get_health()
+    assert not health[0]["healthy"]
+    assert health[0]["cooldown_seconds"] > 25
+    assert health[0]["rate_limited"] == 1
+
+
+def test_server_error_failover_and_client_error():
+    """Test 5xx errors fail over while 4xx errors are raised"""
+    pool = create_pool(1, 1)
+
+    def failing(deployment):
+        raise create_error(InternalServerError, 500)
+
+    with pytest.raises(InternalServerError):
+        pool.call(failing)
+    assert all(not d["healthy"] for d in pool.get_health())
+
+    pool = create_pool(1, 1)
+    calls = []
+
+    def bad_request(deployment):
+        calls.append(deployment)
+        raise create_error(BadRequestError, 400)
+
+    with pytest.raises(BadRequestError):
+        pool.call(bad_request)
+    assert len(calls) == 1
+    assert all(d["healthy"] for d in pool.get_health())
+
+
+def test_headroom_weighting():
+    """Test deployments close to their quota get fewer requests"""
+    pool = create_pool(1, 1)
+
+    pool.record_success(pool.deployments[0], {"x-ratelimit-remaining-requests": "100", "x-ratelimit-remaining-tokens": "10000"})
+    pool.record_success(pool.deployments[0], {"x-ratelimit-remaining-requests": "90", "x-ratelimit-remaining-tokens": "1000"})
+    pool.record_success(pool.deployments[1], {"x-ratelimit-remaining-requests": "100", "x-ratelimit-remaining-tokens": "10000"})
+    assert pool.deployments[0].get_headroom() == pytest.approx(0.1)
+
+    counts = Counter()
+    for _ in range(110):
+        counts[pool.select().endpoint] += 1
+    assert counts["https://aoai0.example.com"] == 10
+    assert counts["https://aoai1.example.com"] == 100
@@ -0,0 +1,87 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import time
+from dialog_state import DialogStateStore, extract_order_id, get_missing_slots
+
+"""
+This module contains test cases for the slot-filling dialog state store.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_dialog_state.py -s -v
+"""
+
+
+def test_extract_order_id():
+    """Test local order number extraction"""
+    assert extract_order_id("My order number is 12345") == "12345"
+    assert extract_order_id("0984") == "0984"
+    assert extract_order_id("It was 2 days ago") is None
+
+
+def test_missing_slots():
+    """Test required slots are checked against CLU and triage agent entities"""
+    assert get_missing_slots("CancelOrder", []) == ["OrderId"]
+    assert get_missing_slots("CancelOrder", [{"category": "OrderId", "text": "1"}]) == []
+    assert get_missing_slots("CancelOrder", [{"name": "OrderId", "text": "1"}]) == []
+    assert get_missing_slots("None", []) == []
+
+
+def test_pending_intent_resolution():
+    """Test a pending intent is resolved by a follow-up that fills its slots"""
+    store = DialogStateStore()
+    assert store.set_pending("s1", "RefundStatus", [], "en") is not None
+    assert store.set_pending("s2", "RefundStatus", [{"category": "OrderId", "text": "1"}]) is None
+    assert store.get("s2") is None
+
+    # Other turns drop the pending intent:
+    assert store.resolve("s1", "no idea") is None
+    assert store.get("s1") is None
+
+    store.set_pending("s1", "RefundStatus", [], "en")
+    intent, entities = store.resolve("s1", "it is 0984")
+    assert intent == "RefundStatus"
+    assert [(e["category"], e["text"]) for e in entities] == [("OrderId", "0984")]
+    assert store.get("s1") is None
+
+
+def test_new_request_with_order_number_is_routed():
+    """Test a new request mentioning an order number does not fill the pending slot"""
+    store = DialogStateStore()
+    store.set_pending("s1", "CancelOrder", [], "en")
+    assert store.resolve("s1", "Actually, what is the status of order 12345?") is None
+    assert store.get("s1") is None
+
+    for reply in ["12345", "My order number is 12345", "it's #12345.", "Sure, order 12345 please"]:
+        store.set_pending("s1", "CancelOrder", [], "en")
+        intent, entities = store.resolve("s1", reply)
+        assert intent == "CancelOrder" and entities[0]["text"] == "12345"
+
+
+def test_first_pending_intent_of_a_message_is_kept():
+    """Test later utterances of a message do not clear or replace an earlier pending intent"""
+    store = DialogStateStore()
+    # "Cancel my order. What's the status of order 123?"
+    store.set_first_pending("s1", [("CancelOrder", []), ("OrderStatus", [{"category": "OrderId", "text": "123"}])])
+    assert store.get("s1").intent == "CancelOrder"
+
+    store.set_first_pending("s1", [("CancelOrder", []), ("RefundStatus", [])])
+    assert store.get("s1").intent == "CancelOrder"
+    intent, entities = store.resolve("s1", "12345")
+    assert intent == "CancelOrder" and entities[0]["text"] == "12345"
+
+    store.set_pending("s1", "CancelOrder", [])
+    assert store.set_first_pending("s1", [("OrderStatus", [{"category": "OrderId", "text": "123"}])]) is None
+    assert store.get("s1") is None
+
+
+def test_expiry_and_capacity():
+    """Test dialog states expire after the TTL and the oldest sessions are evicted"""
+    store = DialogStateStore(ttl=0.05, max_sessions=2)
+    for session_id in ["s1", "s2", "s3"]:
+        store.set_pending(session_id, "OrderStatus", [])
+    assert store.get("s1") is None
+    assert store.get("s3") is not None
+
+    time.sleep(0.06)
+    assert store.resolve("s3", "12345") is None
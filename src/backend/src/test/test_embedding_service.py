@@ -0,0 +1,69 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+from embedding_service import EmbeddingService, LocalEmbedder, cosine_similarity
+
+"""
+This module contains test cases for the embedding service.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_embedding_service.py -s -v
+"""
+
+
+class CountingEmbedder(LocalEmbedder):
+    """
+    Local embedder recording its batches.
+    """
+
+    def __init__(self):
+        super().__init__(dimensions=64)
+        self.batches = []
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(list(texts))
+        return super().embed_batch(texts)
+
+
+def test_local_embedder_is_deterministic():
+    """Test local embeddings are stable and similar for similar texts"""
+    embedder = LocalEmbedder(dimensions=256)
+    vector = embedder.embed_text("What is the return policy?")
+
+    assert len(vector) == 256
+    assert vector == LocalEmbedder(dimensions=256).embed_text("What is the return policy?")
+    assert abs(cosine_similarity(vector, vector) - 1.0) < 1e-9
+
+    similar = cosine_similarity(vector, embedder.embed_text("what's your return policy"))
+    different = cosine_similarity(vector, embedder.embed_text("Cancel order 12345"))
+    assert similar > different
+
+
+def test_embedding_cache_and_batching():
+    """Test repeated texts are served from the cache and misses are batched"""
+    embedder = CountingEmbedder()
+    service = EmbeddingService(embedder, cache_size=10, batch_size=2)
+
+    first = service.embed("What is the return policy?")
+    assert service.embed(" What is the return policy? ") == first
+    assert embedder.batches == [["What is the return policy?"]]
+
+    vectors = service.embed_batch(["a tent", "a stove", "a tent", "What is the return policy?", "a lamp"])
+    assert vectors[0] == vectors[2]
+    assert vectors[3] == first
+    # Three distinct misses in batches of two:
+    assert embedder.batches[1:] == [["a tent", "a stove"], ["a lamp"]]
+
+    stats = service.get_stats()
+    assert stats["embedding_requests"] == 3
+    assert stats["hits"] == 2
+
+
+def test_cached_vectors_are_float32():
+    """Test cached vectors take 4 bytes per dimension and are returned as lists of floats"""
+    service = EmbeddingService(LocalEmbedder(dimensions=1536))
+    vector = service.embed("What is the return policy?")
+
+    assert isinstance(vector, list) and len(vector) == 1536
+    assert service.embed("What is the return policy?") == vector
+    assert service.get_stats()["cache_bytes"] == 4 * 1536
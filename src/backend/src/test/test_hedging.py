@@ -0,0 +1,80 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import time
+import pytest
+from hedging import RouterHedge
+from utils import get_percentile
+
+"""
+This module contains test cases for the hedged router fallback.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_hedging.py -s -v
+"""
+
+ROUTED = {"kind": "clu_result", "error": None, "intent": "OrderStatus"}
+NOT_ROUTED = {"kind": "clu_result", "error": "No intent recognized"}
+
+
+def is_confident(result: dict) -> bool:
+    return result is not None and result["error"] is None
+
+
+def delayed(seconds: float, result=None, error: Exception = None):
+    def call():
+        time.sleep(seconds)
+        if error:
+            raise error
+        return result
+    return call
+
+
+def test_fast_router_is_not_hedged():
+    """Test routers answering within the hedge delay never start the fallback"""
+    hedge = RouterHedge(initial_delay=0.2)
+    fallback_calls = []
+
+    result = hedge.run(delayed(0.01, ROUTED), lambda: fallback_calls.append(1), is_confident)
+    assert result == (ROUTED, None)
+    assert fallback_calls == []
+    assert hedge.get_stats()["hedged"] == 0
+
+
+def test_slow_router_is_hedged():
+    """Test the fallback answers when the router exceeds the hedge delay"""
+    hedge = RouterHedge(initial_delay=0.05)
+
+    start = time.perf_counter()
+    routing_result, fallback_result = hedge.run(delayed(1.0, ROUTED), delayed(0.05, "fallback answer"), is_confident)
+    elapsed = time.perf_counter() - start
+
+    assert fallback_result == "fallback answer"
+    assert elapsed < 0.5
+    assert hedge.get_stats()["fallback_won"] == 1
+
+
+def test_confident_router_wins_race():
+    """Test a confident routing result arriving before the hedged fallback wins"""
+    hedge = RouterHedge(initial_delay=0.05)
+    assert hedge.run(delayed(0.1, ROUTED), delayed(1.0, "fallback answer"), is_confident) == (ROUTED, None)
+    assert hedge.get_stats()["router_won"] == 1
+
+    # An unconfident routing result waits for the fallback:
+    routing_result, fallback_result = hedge.run(delayed(0.1, NOT_ROUTED), delayed(0.2, "fallback answer"), is_confident)
+    assert routing_result == NOT_ROUTED
+    assert fallback_result == "fallback answer"
+
+    with pytest.raises(RuntimeError):
+        hedge.run(delayed(0.1, NOT_ROUTED), delayed(0.2, error=RuntimeError("fallback failed")), is_confident)
+
+
+def test_hedge_delay_follows_percentile():
+    """Test the hedge delay is the configured percentile of recent router latencies"""
+    assert get_percentile([float(i) for i in range(1, 101)], 95) == 95.0
+
+    hedge = RouterHedge(percentile=90, initial_delay=3, min_delay=0.01)
+    assert hedge.get_delay() == 3
+    for i in range(1, 21):
+        hedge.record_latency(i / 10)
+    assert hedge.get_delay() == pytest.approx(1.8)
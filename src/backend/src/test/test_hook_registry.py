@@ -0,0 +1,70 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import time
+import asyncio
+import clu_hooks
+from hook_registry import HookRegistry, create_hook_registry
+
+"""
+This module contains offline test cases for the CLU hook registry used by the unified app.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_hook_registry.py -s -v
+"""
+
+ORDER_ENTITIES = [{"category": "OrderId", "text": "12345"}]
+
+
+def test_registered_hooks():
+    """Test hooks are dispatched by intent"""
+    registry = create_hook_registry(clu_hooks)
+
+    response = asyncio.run(registry.dispatch("OrderStatus", ORDER_ENTITIES))
+    assert response == "Order 12345 has shipped."
+
+    response = asyncio.run(registry.dispatch("CancelOrder", []))
+    assert response == "Please specify order ID in order to cancel order."
+
+
+def test_unknown_intent_uses_default_hook():
+    """Test unknown intents fall back to the default hook instead of failing"""
+    registry = create_hook_registry(clu_hooks)
+
+    response = asyncio.run(registry.dispatch("TrackPackage", ORDER_ENTITIES))
+    assert response == clu_hooks.default_hook([])
+    assert registry.get_stats()["TrackPackage"]["defaulted"] == 1
+
+
+def test_hook_timeout_uses_default_hook():
+    """Test slow hooks are bounded by their timeout"""
+    async def slow_hook(entities: list[dict]) -> str:
+        await asyncio.sleep(1)
+        return "too late"
+
+    registry = HookRegistry(default_hook=lambda entities: "default")
+    registry.register("Slow", slow_hook, timeout=0.05)
+
+    assert asyncio.run(registry.dispatch("Slow", [])) == "default"
+    assert registry.get_stats()["Slow"]["timeouts"] == 1
+
+
+def test_sync_hooks_run_concurrently():
+    """Test blocking hooks do not serialize on the event loop"""
+    def blocking_hook(entities: list[dict]) -> str:
+        time.sleep(0.2)
+        return "done"
+
+    registry = HookRegistry()
+    registry.register("Blocking", blocking_hook)
+
+    async def dispatch_many() -> list[str]:
+        return await asyncio.gather(*[registry.dispatch("Blocking", []) for _ in range(5)])
+
+    start = time.perf_counter()
+    responses = asyncio.run(dispatch_many())
+    elapsed = time.perf_counter() - start
+
+    assert responses == ["done"] * 5
+    assert elapsed < 0.2 * 5 / 2
+    assert registry.get_stats()["Blocking"]["calls"] == 5
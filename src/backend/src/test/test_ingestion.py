@@ -0,0 +1,164 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+from chunking import load_documents
+from embedding_service import EmbeddingService, LocalEmbedder
+from ingestion import IngestionPipeline
+from retrieval_cache import RetrievalCache
+
+"""
+This module contains test cases for incremental push-mode ingestion.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_ingestion.py -s -v
+"""
+
+PRODUCT_INFO_DIR = os.path.join(os.path.dirname(__file__), "../../../../infra/data/product_info")
+
+
+class IndexingResult():
+    def __init__(self, key: str):
+        self.key = key
+        self.succeeded = True
+
+
+class FakeSearchClient():
+    """
+    In-memory index with the SearchClient methods used by ingestion.
+    """
+
+    def __init__(self):
+        self.documents = {}
+        self.uploaded = 0
+        self.upload_calls = 0
+        self.fail_uploads = False
+
+    def search(self, search_text: str, select: list[str]) -> list[dict]:
+        return [{"chunk_id": chunk_id} for chunk_id in self.documents]
+
+    def upload_documents(self, documents: list[dict]) -> list[IndexingResult]:
+        if self.fail_uploads:
+            results = [IndexingResult(document["chunk_id"]) for document in documents]
+            for result in results:
+                result.succeeded = False
+            return results
+        self.upload_calls += 1
+        self.uploaded += len(documents)
+        for document in documents:
+            self.documents[document["chunk_id"]] = document
+        return [IndexingResult(document["chunk_id"]) for document in documents]
+
+    def delete_documents(self, documents: list[dict]) -> list[IndexingResult]:
+        for document in documents:
+            del self.documents[document["chunk_id"]]
+        return [IndexingResult(document["chunk_id"]) for document in documents]
+
+
+class CountingEmbedder(LocalEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.texts = 0
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        self.texts += len(texts)
+        return super().embed_batch(texts)
+
+
+def create_pipeline() -> tuple[IngestionPipeline, FakeSearchClient, CountingEmbedder]:
+    search_client = FakeSearchClient()
+    embedder = CountingEmbedder()
+    # No embedding cache, to count re-embedded chunks:
+    pipeline = IngestionPipeline(search_client, EmbeddingService(embedder, cache_size=0), batch_size=10)
+    return pipeline, search_client, embedder
+
+
+def test_initial_ingestion():
+    """Test every chunk is embedded and uploaded in batches"""
+    pipeline, search_client, embedder = create_pipeline()
+    documents = load_documents(PRODUCT_INFO_DIR)
+
+    result = pipeline.run(documents)
+    assert result["documents"] == 20
+    assert result["uploaded"] == result["chunks"] == len(search_client.documents) == embedder.texts
+    assert search_client.upload_calls == -(-result["chunks"] // 10)
+    assert all(len(doc["text_vector"]) == embedder.dimensions for doc in search_client.documents.values())
+
+
+def test_unchanged_ingestion():
+    """Test re-running on unchanged documents embeds and uploads nothing"""
+    pipeline, search_client, embedder = create_pipeline()
+    documents = load_documents(PRODUCT_INFO_DIR)
+    pipeline.run(documents)
+    embedded, uploaded = embedder.texts, search_client.uploaded
+
+    result = pipeline.run(documents)
+    assert result["uploaded"] == result["deleted"] == 0
+    assert embedder.texts == embedded and search_client.uploaded == uploaded
+
+
+def test_one_file_change():
+    """Test a changed file only re-embeds its changed chunks and deletes their old versions"""
+    pipeline, search_client, embedder = create_pipeline()
+    documents = load_documents(PRODUCT_INFO_DIR)
+    pipeline.run(documents)
+    embedded = embedder.texts
+
+    changed = documents[0]
+    changed["content"] = changed["content"].replace("price $250", "price $225", 1)
+    result = pipeline.run(documents)
+
+    assert 0 < result["uploaded"] < 5
+    assert result["deleted"] == result["uploaded"]
+    assert embedder.texts - embedded == result["uploaded"]
+    assert any("price $225" in doc["chunk"] for doc in search_client.documents.values())
+    assert not any("price $250" in doc["chunk"] for doc in search_client.documents.values())
+
+
+def test_removed_file():
+    """Test chunks of removed documents are deleted"""
+    pipeline, search_client, _ = create_pipeline()
+    documents = load_documents(PRODUCT_INFO_DIR)
+    pipeline.run(documents)
+
+    result = pipeline.run(documents[1:])
+    assert result["deleted"] > 0 and result["uploaded"] == 0
+    assert not any(doc["title"] == documents[0]["title"] for doc in search_client.documents.values())
+
+
+def test_failed_upload_keeps_old_chunks():
+    """Test orphaned chunks are not deleted when uploads of their replacements failed"""
+    pipeline, search_client, _ = create_pipeline()
+    documents = load_documents(PRODUCT_INFO_DIR)
+    pipeline.run(documents)
+
+    documents[0]["content"] = documents[0]["content"].replace("price $250", "price $225", 1)
+    search_client.fail_uploads = True
+    result = pipeline.run(documents)
+    assert result["failed"] > 0 and result["deleted"] == 0
+    assert any("price $250" in doc["chunk"] for doc in search_client.documents.values())
+
+    # The next run replaces them:
+    search_client.fail_uploads = False
+    result = pipeline.run(documents)
+    assert result["failed"] == 0 and result["deleted"] > 0
+    assert not any("price $250" in doc["chunk"] for doc in search_client.documents.values())
+
+
+def test_pushed_changes_clear_retrieval_cache():
+    """Test runs that upload or delete chunks clear the retrieval cache, even with the same document count"""
+    retrieval_cache = RetrievalCache()
+    pipeline, search_client, _ = create_pipeline()
+    pipeline.retrieval_cache = retrieval_cache
+    documents = load_documents(PRODUCT_INFO_DIR)
+    pipeline.run(documents)
+    count = len(search_client.documents)
+
+    retrieval_cache.put("price", {}, [{"chunk": "price $250"}])
+    pipeline.run(documents)
+    assert retrieval_cache.get("price", {}) is not None
+
+    documents[0]["content"] = documents[0]["content"].replace("price $250", "price $225", 1)
+    pipeline.run(documents)
+    assert len(search_client.documents) == count
+    assert retrieval_cache.get("price", {}) is None
@@ -0,0 +1,73 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+from rag_context import RagContextAssembler, estimate_tokens, merge_overlap
+
+"""
+This module contains test cases for RAG context assembly.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_rag_context.py -s -v
+"""
+
+PRODUCT_INFO = os.path.join(os.path.dirname(__file__), "../../../../infra/data/product_info/product_info_1.md")
+
+
+def get_chunks(text: str, length: int = 2000, overlap: int = 500) -> list[str]:
+    """
+    Fixed-size overlapping pages, like the index's split skill.
+    """
+    return [text[i:i + length] for i in range(0, max(1, len(text) - overlap), length - overlap)]
+
+
+def get_search_results() -> list[dict]:
+    with open(PRODUCT_INFO, "r", encoding="utf-8") as f:
+        chunks = get_chunks(f.read())
+    # Adjacent overlapping pages of one manual rank highest, plus a duplicate from another copy:
+    return [
+        {"parent_id": "p1", "chunk_id": "c1", "title": "product_info_1.md", "chunk": chunks[0], "score": 0.9},
+        {"parent_id": "p1", "chunk_id": "c2", "title": "product_info_1.md", "chunk": chunks[1], "score": 0.8},
+        {"parent_id": "p2", "chunk_id": "c9", "title": "product_info_1_copy.md", "chunk": chunks[0] + " ", "score": 0.7},
+        {"parent_id": "p1", "chunk_id": "c3", "title": "product_info_1.md", "chunk": chunks[2], "score": 0.6}
+    ]
+
+
+def test_merge_overlap():
+    """Test overlapping chunk boundaries are merged once"""
+    text = "".join(f"Sentence number {i}. " for i in range(200))
+    first, second = text[:2000], text[1500:3500]
+    assert merge_overlap(first, second) == text[:3500]
+    assert merge_overlap(second, first) is None
+    assert merge_overlap(text, first) == text
+
+
+def test_assembly_reduces_tokens_without_losing_content():
+    """Test merged and deduplicated sources cost fewer tokens and keep every sentence"""
+    documents = get_search_results()
+    assembler = RagContextAssembler(max_tokens=4000, dedup_threshold=0.8)
+    sources = assembler.assemble(documents)
+
+    assert [source["chunk_id"] for source in sources] == ["c1"]
+    tokens_before = sum(estimate_tokens(d["chunk"]) for d in documents)
+    tokens_after = sum(estimate_tokens(s["chunk"]) for s in sources)
+    print(f"Source tokens: {tokens_before} -> {tokens_after}")
+    assert tokens_after < 0.7 * tokens_before
+
+    # All distinct text is still in the context:
+    context = "".join(source["chunk"] for source in sources)
+    for document in documents:
+        assert document["chunk"].strip() in context
+
+
+def test_token_budget():
+    """Test sources are packed in score order within the budget"""
+    documents = [
+        {"parent_id": "a", "title": "A", "chunk": "tent " * 400, "score": 0.5},
+        {"parent_id": "b", "title": "B", "chunk": "stove " * 300, "score": 0.9},
+        {"parent_id": "c", "title": "C", "chunk": "lamp " * 200, "score": 0.7}
+    ]
+    sources = RagContextAssembler(max_tokens=900).assemble(documents)
+
+    assert [source["title"] for source in sources] == ["B", "C", "A"]
+    assert sum(estimate_tokens(source["chunk"]) for source in sources) <= 900
@@ -0,0 +1,86 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import time
+import httpx
+import pytest
+import threading
+from types import SimpleNamespace
+from openai import RateLimitError
+from rate_limiter import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_HIGH,
+    DeploymentRateLimiter,
+    estimate_request_tokens
+)
+
+"""
+This module contains test cases for the client-side AOAI rate limiter.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_rate_limiter.py -s -v
+"""
+
+
+def create_rate_limit_error(headers: dict):
+    request = httpx.Request("POST", "https://aoai.example.com")
+    return RateLimitError("throttled", response=httpx.Response(429, headers=headers, request=request), body=None)
+
+
+def test_estimate_request_tokens():
+    """Test token estimation of dict and message object prompts"""
+    messages = [{"role": "user", "content": "a" * 40}, SimpleNamespace(content="b" * 20)]
+    assert estimate_request_tokens(messages, max_tokens=100) == (10 + 4) + (5 + 4) + 100
+
+
+def test_token_bucket_queues_calls():
+    """Test calls beyond the TPM budget wait for the bucket to refill"""
+    limiter = DeploymentRateLimiter("test", tpm=6000)  # 100 tokens per second
+    assert limiter.acquire(6000) < 0.01
+
+    waited = limiter.acquire(20)
+    assert 0.15 < waited < 0.5
+    assert limiter.get_stats()["queued"] == 1
+
+
+def test_priority_order():
+    """Test high priority calls are served before earlier background calls"""
+    limiter = DeploymentRateLimiter("test", rpm=600)  # 10 requests per second
+    limiter.acquire(0)
+    limiter.buckets["requests"].available = 0
+
+    order = []
+
+    def call(name, priority):
+        limiter.acquire(0, priority)
+        order.append(name)
+
+    background = threading.Thread(target=call, args=("background", PRIORITY_BACKGROUND))
+    background.start()
+    time.sleep(0.02)
+    high = threading.Thread(target=call, args=("high", PRIORITY_HIGH))
+    high.start()
+    background.join()
+    high.join()
+
+    assert order == ["high", "background"]
+
+
+def test_retry_after_pause():
+    """Test a 429 pauses the deployment for its retry-after before retrying"""
+    limiter = DeploymentRateLimiter("test")
+    attempts = []
+
+    def request():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise create_rate_limit_error({"retry-after-ms": "200"})
+        return "ok"
+
+    assert limiter.call(request, tokens=10) == "ok"
+    assert attempts[1] - attempts[0] >= 0.2
+    assert limiter.get_stats()["rate_limited"] == 1
+
+    limiter = DeploymentRateLimiter("test", default_retry_after=0.01)
+    with pytest.raises(RateLimitError):
+        limiter.call(lambda: (_ for _ in ()).throw(create_rate_limit_error({})), tokens=10, max_retries=1)
@@ -0,0 +1,55 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import pytest
+from chunking import load_documents
+from retrieval_benchmark import PRODUCT_INFO_DIR, check_dimensions, format_report, load_queries, run_benchmark
+
+"""
+This module contains test cases for the retrieval benchmark.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_retrieval_benchmark.py -s -v
+"""
+
+
+def test_labeled_queries():
+    """Test every labeled answer appears in its expected document"""
+    documents = {document["title"]: document["content"] for document in load_documents(PRODUCT_INFO_DIR)}
+    queries = load_queries()
+    assert len(queries) >= 20
+    assert all(query["answer"] in documents[query["title"]] for query in queries)
+
+
+def test_benchmark_sweep():
+    """Test a sweep reports every setting, with index_setup.py settings retrieving most answers"""
+    rows = run_benchmark(
+        load_documents(PRODUCT_INFO_DIR),
+        load_queries(),
+        max_lengths=[500, 2000],
+        overlaps=[500],
+        dimensions=[256],
+        quantizations=["float32", "int8"]
+    )
+    print(format_report(rows))
+
+    # Overlaps not shorter than the page length are skipped:
+    assert [(row["max_length"], row["quantization"]) for row in rows] == [(2000, "float32"), (2000, "int8")]
+    full, quantized = rows
+    assert full["recall@5"] >= 0.9
+    assert full["recall@1"] <= full["recall@3"] <= full["recall@5"]
+    assert quantized["vector_kb"] < full["vector_kb"] / 3
+    # Index memory includes the BM25 postings, which quantization does not shrink:
+    assert quantized["keyword_kb"] == full["keyword_kb"] > 0
+    assert full["index_kb"] == pytest.approx(full["vector_kb"] + full["keyword_kb"], abs=0.1)
+    assert 0 < full["prompt_tokens"] <= 2000
+
+
+def test_unsupported_dimensions_are_rejected():
+    """Test AOAI sweeps only use dimensions the embedding model can produce"""
+    check_dimensions("AOAI", [256, 1536], model_name="text-embedding-3-small")
+    check_dimensions("AOAI", [1536], model_name="text-embedding-ada-002", native_dimensions=1536)
+    check_dimensions("LOCAL", [128], model_name="text-embedding-ada-002")
+
+    with pytest.raises(ValueError, match="256"):
+        check_dimensions("AOAI", [256, 1536], model_name="text-embedding-ada-002", native_dimensions=1536)
@@ -0,0 +1,130 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import time
+from retrieval_cache import RetrievalCache, normalize_query
+
+"""
+This module contains test cases for the retrieval result cache.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_retrieval_cache.py -s -v
+"""
+
+PARAMS = {"k_nearest_neighbors": 50, "top": 5, "vectorizer": "service"}
+
+
+class FakeSearch():
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self) -> list[dict]:
+        self.calls += 1
+        return [{"title": "product_info_1.md", "chunk": f"result {self.calls}", "score": 1.0}]
+
+
+def test_normalize_query():
+    """Test case, punctuation and whitespace are ignored"""
+    assert normalize_query("  How do I return my TrailMaster tent?? ") == "how do i return my trailmaster tent"
+    assert normalize_query("how do I return my trailmaster   tent") == "how do i return my trailmaster tent"
+
+
+def test_cache_hits():
+    """Test normalized repeats hit the cache and different parameters do not"""
+    cache = RetrievalCache()
+    search = FakeSearch()
+
+    first = cache.get_or_search("What is the warranty?", PARAMS, search)
+    assert cache.get_or_search("what is the warranty", PARAMS, search) == first
+    cache.get_or_search("what is the warranty", {**PARAMS, "top": 10}, search)
+
+    assert search.calls == 2
+    stats = cache.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+    assert stats["hit_rate"] == 0.333
+
+
+def test_cached_results_are_copies():
+    """Test callers modifying results do not modify the cache"""
+    cache = RetrievalCache()
+    search = FakeSearch()
+
+    cache.get_or_search("warranty", PARAMS, search)[0]["chunk"] = "merged"
+    assert cache.get_or_search("warranty", PARAMS, search)[0]["chunk"] == "result 1"
+
+
+def test_ttl():
+    """Test expired results are searched again"""
+    cache = RetrievalCache(ttl=0.05)
+    search = FakeSearch()
+
+    cache.get_or_search("warranty", PARAMS, search)
+    time.sleep(0.1)
+    assert cache.get_or_search("warranty", PARAMS, search)[0]["chunk"] == "result 2"
+
+
+def test_lru_eviction():
+    """Test the least recently used query is evicted"""
+    cache = RetrievalCache(max_size=2)
+    search = FakeSearch()
+
+    cache.get_or_search("a", PARAMS, search)
+    cache.get_or_search("b", PARAMS, search)
+    cache.get_or_search("a", PARAMS, search)
+    cache.get_or_search("c", PARAMS, search)
+    assert search.calls == 3
+
+    cache.get_or_search("b", PARAMS, search)
+    assert search.calls == 4
+
+
+def test_index_version_invalidation():
+    """Test a new indexer run or document count clears the cache"""
+    version = {"last_run": "run-1", "documents": 10}
+    cache = RetrievalCache(
+        get_index_version=lambda: f"{version['last_run']}|{version['documents']}",
+        version_interval=3600
+    )
+    search = FakeSearch()
+
+    cache.get_or_search("warranty", PARAMS, search)
+    cache.check_index_version()
+    cache.get_or_search("warranty", PARAMS, search)
+    assert search.calls == 1
+
+    version["last_run"] = "run-2"
+    cache.check_index_version()
+    cache.get_or_search("warranty", PARAMS, search)
+    assert search.calls == 2
+
+    version["documents"] = 12
+    cache.check_index_version()
+    cache.get_or_search("warranty", PARAMS, search)
+    assert search.calls == 3
+    assert cache.get_stats()["invalidations"] == 2
+    cache.close()
+
+
+def test_version_checked_in_background():
+    """Test the index version is checked by the background thread, not on lookups"""
+    checks = []
+    version = {"last_run": "run-1"}
+    cache = RetrievalCache(
+        get_index_version=lambda: checks.append(1) or version["last_run"],
+        version_interval=0.05
+    )
+    search = FakeSearch()
+    cache.close()
+    time.sleep(0.1)
+
+    checked = len(checks)
+    for _ in range(5):
+        cache.get_or_search("warranty", PARAMS, search)
+    assert len(checks) == checked
+
+    cache = RetrievalCache(get_index_version=lambda: version["last_run"], version_interval=0.05)
+    cache.get_or_search("warranty", PARAMS, search)
+    version["last_run"] = "run-2"
+    time.sleep(0.3)
+    assert cache.get_stats()["entries"] == 0 and cache.get_stats()["index_version"] == "run-2"
+    cache.close()
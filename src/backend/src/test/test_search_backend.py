@@ -0,0 +1,109 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import gc
+import pytest
+import numpy as np
+from chunking import chunk_document, load_documents, split_pages
+from embedding_service import EmbeddingService, LocalEmbedder
+from local_index import LocalSearchIndex
+from search_backend import create_local_search_backend
+from rag_context import merge_chunks
+
+"""
+This module contains test cases for local chunking and the in-process search backend.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_search_backend.py -s -v
+"""
+
+PRODUCT_INFO_DIR = os.path.join(os.path.dirname(__file__), "../../../../infra/data/product_info")
+
+
+def test_split_pages():
+    """Test pages fit the page length, overlap, and cover the document"""
+    with open(os.path.join(PRODUCT_INFO_DIR, "product_info_1.md"), "r", encoding="utf-8") as f:
+        text = f.read()
+    pages = split_pages(text, max_length=2000, overlap=500)
+
+    assert len(pages) > 1
+    assert all(len(page) <= 2000 for page in pages)
+    assert all(page in text for page in pages)
+    for first, second in zip(pages, pages[1:]):
+        # The next page starts inside the previous one:
+        assert second[:50] in first
+
+    # Overlapping pages merge back into the document:
+    chunks = chunk_document("product_info_1.md", text)
+    assert merge_chunks(chunks)[0]["chunk"] == text.strip()
+
+
+def test_split_long_sentence():
+    """Test sentences longer than a page are split at word boundaries"""
+    text = " ".join(["word"] * 1000)
+    pages = split_pages(text, max_length=200, overlap=50)
+    assert all(len(page) <= 200 for page in pages)
+    assert all(page.startswith("word") and page.endswith("word") for page in pages)
+
+
+def test_local_backend_search(tmp_path):
+    """Test hybrid queries over the product_info corpus"""
+    backend = create_local_search_backend(path=str(tmp_path), data_dir=PRODUCT_INFO_DIR)
+
+    results = backend.search("What is the warranty of the TrailMaster X4 Tent?")
+    assert len(results) == 5
+    assert results[0]["title"] == "product_info_1.md"
+    assert set(results[0]) == {"parent_id", "chunk_id", "title", "chunk", "score"}
+
+    results = backend.search("CozyNights sleeping bag temperature rating")
+    assert results[0]["title"] == "product_info_7.md"
+
+    stats = backend.get_stats()
+    assert stats["queries"] == 2
+    assert stats["average_query_ms"] < 100
+
+
+def test_int8_quantization(tmp_path):
+    """Test int8 vectors take a quarter of the memory and rank like float32"""
+    embedding_service = EmbeddingService(LocalEmbedder())
+    chunks = [
+        chunk
+        for document in load_documents(PRODUCT_INFO_DIR)
+        for chunk in chunk_document(document["title"], document["content"])
+    ]
+    full = LocalSearchIndex.build(chunks, embedding_service, "float32", str(tmp_path / "float32"))
+    quantized = LocalSearchIndex.build(chunks, embedding_service, "int8", str(tmp_path / "int8"))
+
+    assert isinstance(quantized.vectors, np.memmap)
+    assert quantized.vectors.nbytes * 4 == full.vectors.nbytes
+    query = "Alpine Explorer Tent waterproof rating"
+    assert [r["chunk_id"] for r in quantized.search(query)][:3] == [r["chunk_id"] for r in full.search(query)][:3]
+
+
+def test_load_index(tmp_path):
+    """Test a built index can be reopened from its directory"""
+    embedding_service = EmbeddingService(LocalEmbedder())
+    chunks = chunk_document("product_info_5.md", "BaseCamp Folding Table. " * 200)
+    built = LocalSearchIndex.build(chunks, embedding_service, path=str(tmp_path))
+    loaded = LocalSearchIndex.load(str(tmp_path), embedding_service)
+
+    assert loaded.version == built.version
+    assert loaded.search("folding table") == built.search("folding table")
+
+
+def test_empty_data_dir_is_rejected(tmp_path):
+    """Test the local backend fails at startup when there are no documents to index"""
+    with pytest.raises(ValueError, match="No documents"):
+        create_local_search_backend(data_dir=str(tmp_path))
+
+
+def test_temporary_index_is_removed():
+    """Test an index built without a path removes its temporary directory"""
+    index = LocalSearchIndex.build(chunk_document("product_info_5.md", "BaseCamp Folding Table."), EmbeddingService(LocalEmbedder()))
+    path = index.path
+    assert os.path.exists(os.path.join(path, "vectors.npy"))
+
+    del index
+    gc.collect()
+    assert not os.path.exists(path)
@@ -291,14 +291,15 @@ def uvicorn_server() -> Generator:
         "--reload"
     ], env=env)
 
-    # Wait for server to start
+    # Wait for server to start and the orchestrator to be ready
     url = "http://127.0.0.1:7000"
     for _ in range(30):
         try:
-            requests.get(url)
-            break
+            if requests.get(f"{url}/ready").status_code == 200:
+                break
         except requests.ConnectionError:
-            time.sleep(1)
+            pass
+        time.sleep(1)
 
     yield url  # Return the server URL for tests to use
 
@@ -0,0 +1,76 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import time
+import asyncio
+from runtime_pool import RuntimePool
+from semantic_kernel_orchestrator import OrchestratorBusyError
+from test_sk_orchestrator import create_orchestrator
+
+"""
+This module contains an offline load test for concurrent Semantic Kernel group chats.
+Each fake agent hop takes a fixed delay, standing in for a Foundry agent run.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_sk_load.py -s -v
+"""
+
+AGENT_DELAY = 0.05
+REQUESTS = 16
+
+
+async def measure_throughput(concurrent_users: int) -> float:
+    """
+    Run REQUESTS messages from concurrent_users users and return messages per second.
+    """
+    runtime_pool = RuntimePool(size=1, max_uses=0)
+    runtime_pool.start()
+    orchestrator = create_orchestrator(runtime_pool, delay=AGENT_DELAY)
+    orchestrator.concurrency = asyncio.Semaphore(concurrent_users)
+    orchestrator.max_queued = REQUESTS
+
+    try:
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            orchestrator.process_message(f"What is the status of order {i}000?", "en") for i in range(REQUESTS)
+        ])
+        elapsed = time.perf_counter() - start
+    finally:
+        await runtime_pool.drain()
+
+    assert [r[0] for r in results] == [
+        f"Order {i}000 is shipped and will arrive in 2-3 days." for i in range(REQUESTS)
+    ]
+    return REQUESTS / elapsed
+
+
+def test_throughput_scales_with_concurrent_users():
+    """Test group chats run concurrently instead of serializing on one orchestration"""
+    throughput = {users: asyncio.run(measure_throughput(users)) for users in [1, 4, 16]}
+    for users, rate in throughput.items():
+        print(f"{users:>3} concurrent users: {rate:.1f} messages/s")
+
+    assert throughput[4] > 2 * throughput[1]
+    assert throughput[16] > 1.5 * throughput[4]
+
+
+def test_full_queue_rejects_requests():
+    """Test requests beyond the concurrency limit and queue are rejected"""
+    async def test():
+        runtime_pool = RuntimePool(size=1, max_uses=0)
+        runtime_pool.start()
+        orchestrator = create_orchestrator(runtime_pool, delay=AGENT_DELAY)
+        orchestrator.concurrency = asyncio.Semaphore(1)
+        orchestrator.max_queued = 1
+
+        try:
+            results = await asyncio.gather(*[
+                orchestrator.process_message("What is the status of order 12345?", "en") for _ in range(3)
+            ], return_exceptions=True)
+        finally:
+            await runtime_pool.drain()
+
+        assert sum(isinstance(r, OrchestratorBusyError) for r in results) == 1
+        assert sum(isinstance(r, tuple) for r in results) == 2
+
+    asyncio.run(test())
@@ -0,0 +1,368 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import time
+import asyncio
+from semantic_kernel.contents import AuthorRole, ChatMessageContent
+from semantic_kernel_orchestrator import SemanticKernelOrchestrator
+from runtime_pool import RuntimePool
+from language_detection import detect_english_locally
+from local_agents import DirectTriageAgent, DirectTranslationAgent
+from translation_service import TranslationCache, TranslationService
+from fake_translator import StubTranslatorClient
+from agent_context import apply_context_policies
+from fake_agents import create_fake_agents, NEED_MORE_INFO, RETURN_POLICY
+
+"""
+This module contains offline test cases for the Semantic Kernel orchestrator.
+Foundry agents are replaced with local fake agents returning the same JSON envelopes.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_sk_orchestrator.py -s -v
+"""
+
+TRANSLATED_RETURN_POLICY = "Les retours sont acceptés sous 30 jours."
+
+
+def create_orchestrator(
+    runtime_pool: RuntimePool,
+    delay: float = 0.0,
+    intent_agent_map: dict = None,
+    triage_agent=None
+) -> SemanticKernelOrchestrator:
+    orchestrator = SemanticKernelOrchestrator(
+        client=None,
+        model_name="test",
+        project_endpoint="test",
+        agent_ids={},
+        fallback_function=lambda query, language, id: "fallback",
+        max_retries=1,
+        runtime_pool=runtime_pool,
+        intent_agent_map=intent_agent_map
+    )
+    orchestrator.fake_agents = {agent.name: agent for agent in create_fake_agents(delay=delay)}
+    if triage_agent is not None:
+        orchestrator.fake_agents["TriageAgent"] = triage_agent
+    orchestrator.agents = list(orchestrator.fake_agents.values())
+    return orchestrator
+
+
+def run_with_pool(test: callable, size: int = 1, max_uses: int = 0):
+    async def run():
+        runtime_pool = RuntimePool(size=size, max_uses=max_uses)
+        runtime_pool.start()
+        try:
+            return await test(runtime_pool)
+        finally:
+            await runtime_pool.drain()
+    return asyncio.run(run())
+
+
+def test_single_turn():
+    """Test CLU and CQA routes through the group chat"""
+    async def test(runtime_pool):
+        orchestrator = create_orchestrator(runtime_pool)
+        assert await orchestrator.process_message("What is the status of order 12345?") == \
+            ("Order 12345 is shipped and will arrive in 2-3 days.", "False")
+        assert await orchestrator.process_message("I want to cancel my order") == (NEED_MORE_INFO, "True")
+        assert await orchestrator.process_message("What is the return policy") == (RETURN_POLICY, "False")
+
+    run_with_pool(test)
+
+
+def test_shared_runtime_concurrent_requests():
+    """Test concurrent orchestrations share one long-lived runtime"""
+    async def test(runtime_pool):
+        orchestrator = create_orchestrator(runtime_pool)
+        runtime = runtime_pool.runtimes[0].runtime
+        results = await asyncio.gather(*[
+            orchestrator.process_message(f"I want to refund order {i}00") for i in range(1, 6)
+        ])
+        assert [r[0] for r in results] == [
+            f"Refund for order {i}00 has been processed successfully." for i in range(1, 6)
+        ]
+        assert runtime_pool.runtimes[0].runtime is runtime
+        assert runtime_pool.runtimes[0].uses == 5
+
+    run_with_pool(test)
+
+
+def test_runtime_recycled_after_max_uses():
+    """Test runtimes are swapped out after max uses"""
+    async def test(runtime_pool):
+        orchestrator = create_orchestrator(runtime_pool)
+        runtime = runtime_pool.runtimes[0].runtime
+        await orchestrator.process_message("What is the status of order 12345?")
+        await orchestrator.process_message("What is the status of order 12345?")
+        assert runtime_pool.runtimes[0].runtime is not runtime
+
+    run_with_pool(test, max_uses=2)
+
+
+def test_detect_english_locally():
+    """Test the local English heuristic only accepts confidently English text"""
+    assert detect_english_locally("What is the status of order 12345?")
+    assert detect_english_locally("I want to cancel my order")
+    assert not detect_english_locally("Quiero cancelar mi pedido")
+    assert not detect_english_locally("Mi número de pedido es 091428")
+    assert not detect_english_locally("12345")
+    # Other languages sharing English words are confirmed by the service:
+    assert not detect_english_locally("Wat is de status van mijn order")
+    assert not detect_english_locally("Ik wil mijn order cancel")
+    assert not detect_english_locally("Wo ist meine Bestellung")
+    assert not detect_english_locally("Je veux annuler ma commande")
+    assert not detect_english_locally("Vorrei il refund del mio ordine")
+    # So are messages too short to tell:
+    assert not detect_english_locally("Order status")
+    assert not detect_english_locally("Hi")
+
+
+def test_english_fast_path_skips_translation():
+    """Test English messages skip both TranslationAgent hops with the same final response"""
+    async def test(runtime_pool):
+        orchestrator = create_orchestrator(runtime_pool)
+        translation_agent = orchestrator.fake_agents["TranslationAgent"]
+
+        assert await orchestrator.process_message("Please cancel my order 56789", "en") == \
+            ("Cancellation for order 56789 has been processed successfully.", "False")
+        assert await orchestrator.process_message("What is the return policy", "en") == (RETURN_POLICY, "False")
+        assert translation_agent.invocations == 0
+
+        # Unknown language goes through the TranslationAgent; once it reports English,
+        # the final translation hop is still skipped:
+        await orchestrator.process_message("Please cancel my order 56789", None)
+        assert translation_agent.invocations == 1
+
+    run_with_pool(test)
+
+
+def test_intent_agent_map_bypasses_head_support():
+    """Test mapped intents skip the HeadSupportAgent and unknown intents still use it"""
+    async def test(runtime_pool):
+        orchestrator = create_orchestrator(runtime_pool)
+        assert await orchestrator.process_message("I want to refund order 0984", "en") == \
+            ("Refund for order 0984 has been processed successfully.", "False")
+        assert orchestrator.fake_agents["HeadSupportAgent"].invocations == 0
+
+        orchestrator = create_orchestrator(runtime_pool, intent_agent_map={"OrderStatus": "OrderStatusAgent"})
+        assert await orchestrator.process_message("I want to refund order 0984", "en") == \
+            ("Refund for order 0984 has been processed successfully.", "False")
+        assert orchestrator.fake_agents["HeadSupportAgent"].invocations == 1
+
+    run_with_pool(test)
+
+
+def stub_clu_router(utterance: str, language: str, id: str) -> dict:
+    time.sleep(0.2)
+    if "order" not in utterance:
+        return {"kind": "clu_result", "error": "No intent recognized", "intent": "None", "entities": [], "confidence": 0.2}
+    return {
+        "kind": "clu_result",
+        "error": None,
+        "intent": "OrderStatus",
+        "entities": [{"category": "OrderId", "text": "12345"}],
+        "confidence": 0.95
+    }
+
+
+def stub_cqa_router(question: str, language: str, id: str) -> dict:
+    time.sleep(0.2)
+    if "policy" not in question:
+        return {"kind": "cqa_result", "error": "No answer found", "answer": "", "question": None, "confidence": 0.0}
+    return {"kind": "cqa_result", "error": None, "answer": RETURN_POLICY, "question": question, "confidence": 0.9}
+
+
+def test_direct_triage():
+    """Test the direct-triage agent produces the TriageAgent envelopes from parallel CLU/CQA calls"""
+    async def test(runtime_pool):
+        triage_agent = DirectTriageAgent(
+            name="TriageAgent",
+            description="direct triage",
+            clu_router=stub_clu_router,
+            cqa_router=stub_cqa_router
+        )
+        orchestrator = create_orchestrator(runtime_pool, triage_agent=triage_agent)
+
+        start = time.perf_counter()
+        assert await orchestrator.process_message("What is the status of order 12345?", "en") == \
+            ("Order 12345 is shipped and will arrive in 2-3 days.", "False")
+        assert time.perf_counter() - start < 0.4
+
+        assert await orchestrator.process_message("What is the return policy", "en") == (RETURN_POLICY, "False")
+
+    run_with_pool(test)
+
+
+def test_retry_resumes_from_failed_stage():
+    """Test a malformed agent reply only re-runs the failing stage"""
+    async def test(runtime_pool):
+        orchestrator = create_orchestrator(runtime_pool)
+        orchestrator.retry_base_delay = 0.01
+        orchestrator.max_retries = 3
+
+        refund_agent = orchestrator.fake_agents["OrderRefundAgent"]
+        responder = refund_agent.responder
+        replies = iter(["Sure! Here is your refund status..."])
+        refund_agent.responder = lambda messages: next(replies, None) or responder(messages)
+
+        assert await orchestrator.process_message("I want to refund order 0984", None) == \
+            ("Refund for order 0984 has been processed successfully.", "False")
+        assert orchestrator.fake_agents["TranslationAgent"].invocations == 1
+        assert orchestrator.fake_agents["TriageAgent"].invocations == 1
+        assert refund_agent.invocations == 2
+
+    run_with_pool(test)
+
+
+def test_retry_reruns_stage_that_cannot_be_routed():
+    """Test a well-formed but unroutable reply (low-confidence CQA) is not checkpointed, so its stage re-runs"""
+    async def test(runtime_pool):
+        orchestrator = create_orchestrator(runtime_pool)
+        orchestrator.retry_base_delay = 0.01
+        orchestrator.max_retries = 3
+
+        triage_agent = orchestrator.fake_agents["TriageAgent"]
+        responder = triage_agent.responder
+        replies = iter([responder([ChatMessageContent(role=AuthorRole.USER, content="What is the return policy")])
+                        .replace('"confidenceScore": 0.9', '"confidenceScore": 0.1')])
+        triage_agent.responder = lambda messages: next(replies, None) or responder(messages)
+
+        assert await orchestrator.process_message("What is the return policy", None) == (RETURN_POLICY, "False")
+        assert orchestrator.fake_agents["TranslationAgent"].invocations == 1
+        assert triage_agent.invocations == 2
+
+    run_with_pool(test)
+
+
+def test_deadline_skips_hops_that_cannot_fit():
+    """Test the request deadline returns a partial answer, or an error, instead of starting a hop that cannot fit"""
+    async def test(runtime_pool):
+        orchestrator = create_orchestrator(runtime_pool)
+        orchestrator.agent_budgets = {name: 0.01 for name in orchestrator.fake_agents}
+        orchestrator.agent_budgets["TranslationAgent"] = 0.25
+
+        translation_agent = orchestrator.fake_agents["TranslationAgent"]
+        responder = translation_agent.responder
+        translation_agent.responder = \
+            lambda messages: responder(messages).replace('"origin_language": "en"', '"origin_language": "fr"')
+        orchestrator.fake_agents["OrderRefundAgent"].delay = 0.3
+
+        # The final translation no longer fits after the slow refund agent:
+        start = time.perf_counter()
+        assert await orchestrator.process_message("I want to refund order 0984", None, time.monotonic() + 0.5) == \
+            ("Refund for order 0984 has been processed successfully.", "False")
+        assert time.perf_counter() - start < 0.5
+        assert translation_agent.invocations == 1
+
+        # Nothing fits:
+        response, _ = await orchestrator.process_message("I want to refund order 0984", None, time.monotonic() + 0.1)
+        assert "error" in response
+        assert translation_agent.invocations == 1
+
+    run_with_pool(test)
+
+
+def test_final_translation_in_code_block_is_accepted():
+    """Test the final answer is parsed like every other envelope, salvaging a markdown code block"""
+    async def test(runtime_pool):
+        orchestrator = create_orchestrator(runtime_pool)
+        translation_agent = orchestrator.fake_agents["TranslationAgent"]
+        responder = translation_agent.responder
+        translation_agent.responder = lambda messages: "```json\n" + responder(messages) \
+            .replace('"origin_language": "en"', '"origin_language": "fr"') \
+            .replace(RETURN_POLICY, TRANSLATED_RETURN_POLICY) + "\n```"
+
+        assert await orchestrator.process_message("What is the return policy") == (TRANSLATED_RETURN_POLICY, "False")
+        # Initial and final translation, without a retry:
+        assert translation_agent.invocations == 2
+
+    run_with_pool(test)
+
+
+def test_context_policies_reduce_prompt_tokens():
+    """Test per-agent context policies keep answers unchanged and reduce prompt tokens"""
+    questions = ["I want to refund order 0984", "What is the return policy", "What is the status of order 12345?"]
+
+    async def test(runtime_pool):
+        answers, stats = {}, {}
+        for policy in ["FULL", "FILTERED"]:
+            orchestrator = create_orchestrator(runtime_pool)
+            orchestrator.agents = apply_context_policies(orchestrator.agents, orchestrator.context_stats, policy)
+            answers[policy] = [await orchestrator.process_message(question, None) for question in questions]
+            stats[policy] = orchestrator.get_context_stats()
+
+        assert answers["FILTERED"] == answers["FULL"]
+        print(f"\nPrompt tokens per request: full {stats['FULL']['tokens_per_request_after']}, "
+              f"filtered {stats['FILTERED']['tokens_per_request_after']}")
+        assert stats["FILTERED"]["tokens_per_request_before"] == stats["FULL"]["tokens_per_request_after"]
+        assert stats["FILTERED"]["tokens_per_request_after"] < 0.7 * stats["FULL"]["tokens_per_request_after"]
+
+        # The custom agent only sees the question and the triage result:
+        status_agent = orchestrator.fake_agents["OrderStatusAgent"]
+        assert [m.name for m in status_agent.last_messages] == ["TranslationAgent", "TriageAgent"]
+
+        # Every hop's thread of the wrapped agents is deleted after the response:
+        threads = [thread for agent in orchestrator.fake_agents.values() for thread in agent.threads]
+        assert threads and all(thread._is_deleted for thread in threads)
+
+    run_with_pool(test)
+
+
+def test_follow_up_resolved_without_group_chat():
+    """Test a follow-up supplying the missing order number is answered by the plugin directly"""
+    async def test(runtime_pool):
+        orchestrator = create_orchestrator(runtime_pool)
+        assert await orchestrator.process_message("I want to cancel my order", "en", session_id="s1") == \
+            (NEED_MORE_INFO, "True")
+        invocations = {name: agent.invocations for name, agent in orchestrator.fake_agents.items()}
+
+        # Unrelated sessions go through the group chat:
+        assert await orchestrator.answer_follow_up("s2", "My order number is 12345") is None
+
+        assert await orchestrator.answer_follow_up("s1", "My order number is 12345") == \
+            ("Cancellation for order 12345 has been processed successfully.", "False")
+        assert {name: agent.invocations for name, agent in orchestrator.fake_agents.items()} == invocations
+
+        # The pending intent is cleared once answered:
+        assert await orchestrator.answer_follow_up("s1", "My order number is 12345") is None
+
+    run_with_pool(test)
+
+
+def test_follow_up_with_new_request_is_routed():
+    """Test a new request mentioning an order number goes through the group chat and drops the pending intent"""
+    async def test(runtime_pool):
+        orchestrator = create_orchestrator(runtime_pool)
+        await orchestrator.process_message("I want to cancel my order", "en", session_id="s1")
+
+        assert await orchestrator.answer_follow_up("s1", "Actually, what is the status of order 12345?") is None
+        assert orchestrator.dialog_states.get("s1") is None
+
+        await orchestrator.process_message("I want to cancel my order", "en", session_id="s1")
+        assert await orchestrator.answer_follow_up("s1", "I am not sure") is None
+        assert orchestrator.dialog_states.get("s1") is None
+
+    run_with_pool(test)
+
+
+def test_direct_translation():
+    """Test the direct-translation agent translates through the cache, and canned answers need no Translator call"""
+    async def test(runtime_pool):
+        client = StubTranslatorClient({"Je veux annuler ma commande 12345": ("I want to cancel my order 12345", "fr")})
+        translation_service = TranslationService(client, TranslationCache(path=None))
+        translation_service.pretranslate(["fr"])
+        translation_agent = DirectTranslationAgent(
+            name="TranslationAgent",
+            description="direct translation",
+            translation_service=translation_service
+        )
+        orchestrator = create_orchestrator(runtime_pool)
+        orchestrator.agents = [translation_agent] + orchestrator.agents[1:]
+
+        for _ in range(2):
+            assert await orchestrator.process_message("Je veux annuler ma commande 12345", None) == \
+                ("[fr] Cancellation for order 12345 has been processed successfully.", "False")
+        # Pre-translation and the first user message:
+        assert client.calls == 2
+
+    run_with_pool(test)
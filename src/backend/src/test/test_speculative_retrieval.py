@@ -0,0 +1,125 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import time
+import pytest
+
+# The orchestrator creates a Language client (not called by these tests):
+os.environ.setdefault("LANGUAGE_ENDPOINT", "https://localhost")
+
+from router.router_type import RouterType  # noqa: E402
+from speculative_retrieval import SpeculativeRetriever  # noqa: E402
+from unified_conversation_orchestrator import UnifiedConversationOrchestrator  # noqa: E402
+
+"""
+This module contains test cases for speculative RAG retrieval.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_speculative_retrieval.py -s -v
+"""
+
+SEARCH_DELAY = 0.1
+DOCUMENTS = [{"title": "Returns", "chunk": "30 day refund policy"}]
+
+
+def search(query: str, language: str, id: str) -> list[dict]:
+    time.sleep(SEARCH_DELAY)
+    return DOCUMENTS
+
+
+def test_search_overlaps_routing():
+    """Test a fallback reuses the search started in parallel with routing"""
+    retriever = SpeculativeRetriever(search=search, policy="ALWAYS")
+
+    start = time.perf_counter()
+    speculation = retriever.start("What is the return policy", "en", "1")
+    time.sleep(SEARCH_DELAY)  # Router call
+    retriever.record_route(fallback=True)
+    assert retriever.collect(speculation) == DOCUMENTS
+    elapsed = time.perf_counter() - start
+
+    # Router + search ran in max(router, search) instead of router + search:
+    assert elapsed < 1.5 * SEARCH_DELAY
+    stats = retriever.get_stats()
+    assert stats["used"] == 1
+    assert stats["saved_seconds"] > 0.5 * SEARCH_DELAY
+
+
+def test_discarded_search_is_reported_as_waste():
+    """Test searches of routed messages are dropped and reported as wasted"""
+    retriever = SpeculativeRetriever(search=search, policy="ALWAYS", max_workers=1)
+
+    speculation = retriever.start("Cancel order 123", "en", "1")
+    retriever.record_route(fallback=False)
+    retriever.discard(speculation)
+    speculation.future.result()
+
+    # Waste is recorded by a done callback of the search:
+    for _ in range(100):
+        if retriever.get_stats()["wasted"]:
+            break
+        time.sleep(0.01)
+    stats = retriever.get_stats()
+    assert stats["wasted"] == 1
+    assert stats["wasted_search_seconds"] >= SEARCH_DELAY * 0.9
+
+
+def test_adaptive_policy():
+    """Test ADAPTIVE speculation follows the recent fallback rate"""
+    retriever = SpeculativeRetriever(search=search, policy="ADAPTIVE", window=10, threshold=0.3)
+    assert retriever.should_speculate()
+
+    for _ in range(10):
+        retriever.record_route(fallback=False)
+    assert not retriever.should_speculate()
+    assert retriever.start("Cancel order 123", "en", "1") is None
+
+    for _ in range(3):
+        retriever.record_route(fallback=True)
+    assert retriever.should_speculate()
+
+    assert not SpeculativeRetriever(search=search, policy="NEVER").should_speculate()
+
+
+def test_collected_search_is_not_reported_as_waste():
+    """Test a search collected by a hedged fallback is not also wasted when the router wins"""
+    retriever = SpeculativeRetriever(search=search, policy="ALWAYS")
+
+    speculation = retriever.start("What is the return policy", "en", "1")
+    assert retriever.collect(speculation) == DOCUMENTS
+    retriever.discard(speculation)
+
+    stats = retriever.get_stats()
+    assert (stats["used"], stats["wasted"], stats["cancelled"]) == (1, 0, 0)
+
+    # A discarded speculation is not collected:
+    speculation = retriever.start("What is the return policy", "en", "2")
+    retriever.discard(speculation)
+    assert retriever.collect(speculation) is None
+    assert retriever.get_stats()["used"] == 1
+
+
+def test_speculation_is_discarded_when_router_raises():
+    """Test the speculative search is dropped when the router fails"""
+    retriever = SpeculativeRetriever(search=search, policy="ALWAYS", max_workers=1)
+
+    def router(message: str, language: str, id: str) -> dict:
+        raise RuntimeError("Router unavailable")
+
+    orchestrator = UnifiedConversationOrchestrator(
+        router_type=RouterType.CLU,
+        fallback_function=lambda message, language, id, documents=None: "fallback answer",
+        retriever=retriever,
+        router=router
+    )
+    orchestrator.detect_language = lambda text: "en"
+
+    with pytest.raises(RuntimeError):
+        orchestrator.orchestrate("What is the return policy", id="1")
+
+    for _ in range(100):
+        if retriever.get_stats()["wasted"]:
+            break
+        time.sleep(0.01)
+    assert retriever.get_stats()["wasted"] == 1
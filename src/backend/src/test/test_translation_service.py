@@ -0,0 +1,85 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import json
+from concurrent.futures import ThreadPoolExecutor
+from translation_service import RESPONSE_TEMPLATES, TranslationCache, TranslationService
+from fake_translator import StubTranslatorClient
+
+"""
+This module contains test cases for the cached translation layer.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_translation_service.py -s -v
+"""
+
+
+def test_translations_are_cached_and_persisted(tmp_path):
+    """Test repeated translations are cache lookups, also after a restart"""
+    cache_file = str(tmp_path / "translation_cache.json")
+    client = StubTranslatorClient({"Où est ma commande ?": ("Where is my order?", "fr")})
+    service = TranslationService(client, TranslationCache(cache_file, persist_all=True))
+
+    assert service.translate_to_english("Où est ma commande ?") == ("Where is my order?", "fr")
+    assert service.translate_to_english("Où est ma commande ?") == ("Where is my order?", "fr")
+    assert service.translate_answer("We are open 9-5.", "fr") == "[fr] We are open 9-5."
+    assert service.translate_answer("We are open 9-5.", "en") == "We are open 9-5."
+    assert client.calls == 2
+    service.cache.save()
+
+    client = StubTranslatorClient()
+    service = TranslationService(client, TranslationCache(cache_file))
+    assert service.translate_answer("We are open 9-5.", "fr") == "[fr] We are open 9-5."
+    assert client.calls == 0
+
+
+def test_pretranslated_templates(tmp_path):
+    """Test canned answers are pre-translated once per language, keeping order numbers untranslated"""
+    client = StubTranslatorClient()
+    service = TranslationService(client, TranslationCache(str(tmp_path / "translation_cache.json")))
+
+    assert service.pretranslate(["fr", "en"], texts=["Contoso Outdoors is proud to offer a 30 day refund policy."]) == 5
+    assert client.calls == 2
+    assert service.pretranslate(["fr"]) == 0
+
+    assert service.translate_answer("Refund for order 0984 has been processed successfully.", "fr") == \
+        "[fr] Refund for order 0984 has been processed successfully."
+    assert service.translate_answer("Contoso Outdoors is proud to offer a 30 day refund policy.", "fr") == \
+        "[fr] Contoso Outdoors is proud to offer a 30 day refund policy."
+    assert client.calls == 2
+
+
+def test_user_utterances_are_not_persisted(tmp_path):
+    """Test only pre-translated answers are written to the cache file by default"""
+    cache_file = str(tmp_path / "translation_cache.json")
+    client = StubTranslatorClient({"Où est ma commande 0984 ?": ("Where is my order 0984?", "fr")})
+    service = TranslationService(client, TranslationCache(cache_file))
+
+    service.pretranslate(["fr"])
+    assert service.translate_to_english("Où est ma commande 0984 ?") == ("Where is my order 0984?", "fr")
+    service.cache.save()
+
+    with open(cache_file, "r", encoding="utf-8") as f:
+        persisted = json.load(f)
+    assert len(persisted) == len(RESPONSE_TEMPLATES)
+    assert not any("0984" in key for key in persisted)
+
+
+def test_concurrent_puts_while_saving(tmp_path):
+    """Test the cache can be saved while translations are added from worker threads"""
+    cache = TranslationCache(str(tmp_path / "translation_cache.json"), max_size=500, persist_all=True)
+
+    def put(worker: int):
+        for i in range(2000):
+            cache.put(f"text {worker} {i}", "en", "fr", f"texte {worker} {i}", "en")
+            cache.get(f"text {worker} {i // 2}", "en", "fr")
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(put, worker) for worker in range(4)]
+        while not all(future.done() for future in futures):
+            cache.save()
+        for future in futures:
+            future.result()
+
+    cache.save()
+    assert len(TranslationCache(cache.path).entries) == 500
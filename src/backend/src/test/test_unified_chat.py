@@ -25,6 +25,7 @@ Possible values for ROUTER_TYPE:
 - ORCHESTRATION
 - FUNCTION_CALLING
 - TRIAGE_AGENT
+- JOINT_FUNCTION_CALLING
 """
 
 # Test cases for the chat endpoint
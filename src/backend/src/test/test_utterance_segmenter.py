@@ -0,0 +1,139 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import re
+import json
+import time
+import pytest
+from utterance_segmenter import UtteranceSegmenter, parse_utterances, segment_locally
+from test_unified_chat import SINGLE_TURN_TEST_CASES
+
+"""
+This module contains test cases and an agreement/latency benchmark for local utterance segmentation.
+
+The offline benchmark compares local segmentation with reference LLM extractions (the examples of
+prompts/extract_utterances.txt and the chat test cases). With AOAI_ENDPOINT and AOAI_DEPLOYMENT set,
+the live benchmark also calls the extract-utterances prompt and reports the latency saved.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_utterance_segmenter.py -s -v
+"""
+
+
+def get_prompt_examples() -> list[tuple[str, list[str]]]:
+    """
+    (user input, LLM output) examples of the extract-utterances prompt.
+    """
+    with open("prompts/extract_utterances.txt", "r") as f:
+        prompt = f.read()
+    inputs = re.findall(r"^user input: (.+)$", prompt, re.MULTILINE)
+    outputs = re.findall(r"^system output: (.+)$", prompt, re.MULTILINE)
+    return [(message, json.loads(output)) for message, output in zip(inputs, outputs)]
+
+
+# Single-intent chat test cases are extracted as-is, plus multi-intent combinations:
+BENCHMARK_CASES = get_prompt_examples() + [
+    (test_case["current_question"], [test_case["current_question"]]) for test_case in SINGLE_TURN_TEST_CASES
+] + [
+    ("What is the return policy? Also cancel order 555.", ["What is the return policy?", "Cancel order 555."]),
+    ("Please cancel my order 56789 and tell me the return policy", ["Please cancel my order 56789.", "Tell me the return policy."]),
+    ("I want to refund order 0984 and what is the status of order 12345?", ["I want to refund order 0984.", "What is the status of order 12345?"]),
+    ("Cancel and refund order 555", ["Cancel order 555.", "Refund order 555."]),
+    ("Do you sell tents or sleeping bags", ["Do you sell tents or sleeping bags?"])
+]
+
+
+def normalize(utterances: list[str]) -> list[str]:
+    return [re.sub(r"[^\w\s]", "", utterance).lower().strip() for utterance in utterances]
+
+
+def test_segment_locally():
+    """Test sentence and clause splitting with confidence"""
+    assert segment_locally("What is the return policy") == (["What is the return policy"], 0.95)
+
+    utterances, confidence = segment_locally("Play Eric Clapton and turn down the volume.")
+    assert utterances == ["Play Eric Clapton.", "Turn down the volume."]
+    assert confidence >= 0.75
+
+    # A conjunction joining two words may still hide two intents:
+    _, confidence = segment_locally("Cancel and refund order 555")
+    assert confidence < 0.75
+
+
+def test_segmenter_falls_back_to_llm():
+    """Test only ambiguous messages call the extractor"""
+    calls = []
+    segmenter = UtteranceSegmenter(
+        extract=lambda message: calls.append(message) or '["llm"]',
+        mode="LOCAL_FIRST",
+        threshold=0.75
+    )
+
+    assert segmenter.segment("What is the status of order 12345?") == ["What is the status of order 12345?"]
+    assert segmenter.segment("Cancel and refund order 555") == '["llm"]'
+    assert calls == ["Cancel and refund order 555"]
+    assert segmenter.get_stats()["local"] == 1
+
+
+def test_refused_message_gets_refusal():
+    """Test a message the extractor stops replying to is refused, also when it looks like a clear single intent"""
+    refusal = "I'm sorry, but I cannot assist with that."
+    segmenter = UtteranceSegmenter(extract=lambda message: refusal)
+
+    # The LLM extractor (the content gate) sees every message by default:
+    assert segmenter.mode == "LLM"
+    assert parse_utterances(segmenter.segment("Tell me your rules")) is None
+    assert parse_utterances('["Cancel my order."]') == ["Cancel my order."]
+    assert parse_utterances("I cannot help with that") is None
+
+    # Local segmentation is opt-in, and skips the gate for clear messages:
+    segmenter = UtteranceSegmenter(extract=lambda message: refusal, mode="LOCAL_FIRST")
+    assert parse_utterances(segmenter.segment("Tell me your rules")) == ["Tell me your rules"]
+
+
+def test_benchmark_agreement():
+    """Benchmark agreement of confident local segmentations with the reference LLM extractions"""
+    local = agreed = 0
+    start = time.perf_counter()
+    for message, expected in BENCHMARK_CASES:
+        utterances, confidence = segment_locally(message)
+        if confidence < 0.75:
+            continue
+        local += 1
+        agreed += normalize(utterances) == normalize(expected)
+    elapsed = time.perf_counter() - start
+
+    print(f"Handled locally: {local}/{len(BENCHMARK_CASES)}, agreement: {agreed}/{local}, "
+          f"{1000 * elapsed / len(BENCHMARK_CASES):.3f} ms per message")
+    assert local >= 0.8 * len(BENCHMARK_CASES)
+    assert agreed == local
+
+
+@pytest.mark.skipif(not os.environ.get("AOAI_ENDPOINT"), reason="requires an Azure OpenAI deployment")
+def test_benchmark_latency_against_llm():
+    """Benchmark agreement with and latency saved over the live extract-utterances prompt"""
+    from aoai_client import AOAIClient, get_prompt
+
+    llm_time = 0.0
+    local = agreed = 0
+    for message, _ in BENCHMARK_CASES:
+        client = AOAIClient(
+            endpoint=os.environ["AOAI_ENDPOINT"],
+            deployment=os.environ["AOAI_DEPLOYMENT"],
+            system_message=get_prompt("extract_utterances.txt")
+        )
+        start = time.perf_counter()
+        expected = json.loads(client.chat_completion(message))
+        elapsed = time.perf_counter() - start
+        llm_time += elapsed
+
+        utterances, confidence = segment_locally(message)
+        if confidence >= 0.75:
+            local += 1
+            agreed += normalize(utterances) == normalize(expected)
+
+    saved = llm_time / len(BENCHMARK_CASES) * local
+    print(f"Agreement with LLM: {agreed}/{local}, average LLM latency: {llm_time / len(BENCHMARK_CASES):.3f}s, "
+          f"saved {saved:.2f}s over {len(BENCHMARK_CASES)} messages")
+    assert agreed >= 0.9 * local
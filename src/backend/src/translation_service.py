@@ -0,0 +1,397 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import re
+import json
+import time
+import logging
+import requests
+import threading
+from collections import OrderedDict
+from utils import get_azure_credential
+
+"""
+Azure AI Translator layer with an LRU + persisted translation cache.
+
+Translations are looked up by (text, source, target), and the canned custom agent answers
+(and optionally the CQA answers) are pre-translated for the configured languages at startup,
+so translating the same responses again becomes a cache lookup instead of a service call.
+Only the pre-translated answers are persisted, unless TRANSLATION_CACHE_PERSIST_ALL is set:
+runtime translations include user utterances, which may contain PII.
+"""
+
+_logger = logging.getLogger(__name__)
+
+TRANSLATOR_ENDPOINT = os.environ.get("TRANSLATOR_ENDPOINT", "https://api.cognitive.microsofttranslator.com")
+TRANSLATION_LANGUAGES = [lang.strip() for lang in os.environ.get("TRANSLATION_LANGUAGES", "").split(",") if lang.strip()]
+TRANSLATION_CACHE_FILE = os.environ.get(
+    "TRANSLATION_CACHE_FILE",
+    os.path.join(os.environ.get("CONFIG_DIR", "."), "translation_cache.json")
+)
+TRANSLATION_CACHE_SIZE = int(os.environ.get("TRANSLATION_CACHE_SIZE", "10000"))
+TRANSLATION_CACHE_PERSIST_ALL = os.environ.get("TRANSLATION_CACHE_PERSIST_ALL", "false").lower() == "true"
+TRANSLATION_PRETRANSLATE_FILE = os.environ.get("TRANSLATION_PRETRANSLATE_FILE")
+
+# Canned custom agent answers; {order_id} placeholders are kept untranslated
+RESPONSE_TEMPLATES = [
+    "Please provide more information about your order so I can better assist you.",
+    "Order {order_id} is shipped and will arrive in 2-3 days.",
+    "Cancellation for order {order_id} has been processed successfully.",
+    "Refund for order {order_id} has been processed successfully."
+]
+
+PLACEHOLDER_REGEX = re.compile(r"\{(\w+)\}")
+NOTRANSLATE_REGEX = re.compile(r'<span class="notranslate">\s*\{(\w+)\}\s*</span>')
+
+# Maximum elements per Translator request
+TRANSLATOR_BATCH_SIZE = 100
+
+
+class TranslatorClient():
+    """
+    Azure AI Translator REST API (v3.0) client.
+    """
+
+    def __init__(
+        self,
+        endpoint: str = TRANSLATOR_ENDPOINT,
+        resource_id: str = None,
+        region: str = None,
+        key: str = None
+    ):
+        self.endpoint = endpoint.rstrip("/")
+        self.resource_id = resource_id or os.environ.get("TRANSLATOR_RESOURCE_ID")
+        self.region = region or os.environ.get("TRANSLATOR_REGION")
+        self.key = key or os.environ.get("TRANSLATOR_KEY")
+        self.credential = None if self.key else get_azure_credential()
+        self.token = None
+        self.session = requests.Session()
+
+    def get_headers(self) -> dict:
+        headers = {"Content-Type": "application/json"}
+        if self.region:
+            headers["Ocp-Apim-Subscription-Region"] = self.region
+
+        if self.key:
+            headers["Ocp-Apim-Subscription-Key"] = self.key
+            return headers
+
+        # Reuse the Entra ID token until shortly before it expires:
+        if self.token is None or self.token.expires_on - 60 < time.time():
+            self.token = self.credential.get_token("https://cognitiveservices.azure.com/.default")
+        headers["Authorization"] = f"Bearer {self.token.token}"
+        if self.resource_id:
+            headers["Ocp-Apim-ResourceId"] = self.resource_id
+        return headers
+
+    def translate(
+        self,
+        texts: list[str],
+        target: str,
+        source: str = None,
+        text_type: str = "plain"
+    ) -> list[tuple[str, str]]:
+        """
+        Translate texts to target language.
+        Returns (translation, source language) per text; the source language is detected if not given.
+        """
+        results = []
+        for i in range(0, len(texts), TRANSLATOR_BATCH_SIZE):
+            batch = texts[i:i + TRANSLATOR_BATCH_SIZE]
+            params = {"api-version": "3.0", "to": target, "textType": text_type}
+            if source:
+                params["from"] = source
+
+            response = self.session.post(
+                f"{self.endpoint}/translate",
+                params=params,
+                headers=self.get_headers(),
+                json=[{"text": text} for text in batch],
+                timeout=10
+            )
+            response.raise_for_status()
+
+            for item in response.json():
+                language = source or item.get("detectedLanguage", {}).get("language")
+                results.append((item["translations"][0]["text"], language))
+        return results
+
+
+class TranslationCache():
+    """
+    LRU cache of (text, source, target) -> (translation, source language), persisted to a JSON file.
+
+    Entries are [translation, source language, persist]; only entries put with persist=True
+    (or all of them with persist_all) are written to the file.
+    """
+
+    def __init__(
+        self,
+        path: str = TRANSLATION_CACHE_FILE,
+        max_size: int = TRANSLATION_CACHE_SIZE,
+        persist_all: bool = TRANSLATION_CACHE_PERSIST_ALL
+    ):
+        self.path = path
+        self.max_size = max_size
+        self.persist_all = persist_all
+        self.entries = OrderedDict()
+        # Translations run in worker threads:
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        self.load()
+
+    @staticmethod
+    def get_key(
+        text: str,
+        source: str,
+        target: str
+    ) -> str:
+        return f"{source or 'auto'}|{target}|{text}"
+
+    def get(
+        self,
+        text: str,
+        source: str,
+        target: str
+    ) -> tuple[str, str]:
+        key = self.get_key(text, source, target)
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return tuple(value[:2])
+
+    def contains(
+        self,
+        text: str,
+        source: str,
+        target: str
+    ) -> bool:
+        with self.lock:
+            return self.get_key(text, source, target) in self.entries
+
+    def put(
+        self,
+        text: str,
+        source: str,
+        target: str,
+        translation: str,
+        language: str,
+        persist: bool = False
+    ) -> None:
+        key = self.get_key(text, source, target)
+        persist = persist or self.persist_all
+        with self.lock:
+            self.entries[key] = [translation, language, persist]
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+            self.dirty = self.dirty or persist
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = OrderedDict((key, value[:2] + [True]) for key, value in json.load(f).items())
+        except Exception as e:
+            _logger.warning(f"Ignoring unreadable translation cache {self.path}: {e}")
+
+    def save(self) -> None:
+        """
+        Atomically write the cache file if it changed.
+        """
+        with self.lock:
+            if not self.path or not self.dirty:
+                return
+            # Snapshot the persisted entries, so translations can continue while writing:
+            entries = {key: value[:2] for key, value in self.entries.items() if value[2]}
+            self.dirty = False
+
+        try:
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            _logger.warning(f"Could not write translation cache {self.path}: {e}")
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+class ResponseTemplate():
+    """
+    Canned answer with {slot} placeholders, matched against answers to reuse its pre-translations.
+    """
+
+    def __init__(
+        self,
+        template: str
+    ):
+        self.template = template
+        pattern = PLACEHOLDER_REGEX.sub(lambda m: f"(?P<{m.group(1)}>.+?)", re.escape(template).replace(r"\{", "{").replace(r"\}", "}"))
+        self.regex = re.compile(f"^{pattern}$")
+
+    def match(
+        self,
+        text: str
+    ) -> dict:
+        match = self.regex.match(text)
+        return match.groupdict() if match else None
+
+    def to_html(self) -> str:
+        """
+        Template text with the placeholders excluded from translation.
+        """
+        return PLACEHOLDER_REGEX.sub(lambda m: f'<span class="notranslate">{{{m.group(1)}}}</span>', self.template)
+
+    @staticmethod
+    def from_html(
+        text: str
+    ) -> str:
+        return NOTRANSLATE_REGEX.sub(lambda m: f"{{{m.group(1)}}}", text)
+
+
+def fill_template(
+    template: str,
+    slots: dict
+) -> str:
+    for name, value in slots.items():
+        template = template.replace(f"{{{name}}}", value)
+    return template
+
+
+def load_pretranslate_file(
+    path: str
+) -> list[str]:
+    """
+    Load answers to pre-translate: a JSON list of strings, or a CQA import file (assets.qnas[].answer).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        content = json.load(f)
+
+    if isinstance(content, dict):
+        return [qna["answer"] for qna in content.get("assets", {}).get("qnas", []) if qna.get("answer")]
+    return [text for text in content if isinstance(text, str)]
+
+
+class TranslationService():
+    """
+    Cached translation to and from English.
+    """
+
+    def __init__(
+        self,
+        client: TranslatorClient,
+        cache: TranslationCache = None,
+        templates: list[str] = RESPONSE_TEMPLATES
+    ):
+        self.client = client
+        self.cache = cache if cache is not None else TranslationCache()
+        self.templates = [ResponseTemplate(template) for template in templates]
+
+    def translate(
+        self,
+        text: str,
+        target: str,
+        source: str = None
+    ) -> tuple[str, str]:
+        """
+        Translate text to target, returning (translation, source language).
+        """
+        if not text or (source and source == target):
+            return text, source
+
+        cached = self.cache.get(text, source, target)
+        if cached is not None:
+            return cached
+
+        translation, language = self.client.translate([text], target, source)[0]
+        self.cache.put(text, source, target, translation, language)
+        return translation, language
+
+    def translate_to_english(
+        self,
+        text: str
+    ) -> tuple[str, str]:
+        """
+        Translate user input to English, returning (English text, detected language).
+        """
+        return self.translate(text, "en")
+
+    def translate_answer(
+        self,
+        text: str,
+        target: str
+    ) -> str:
+        """
+        Translate an English answer to target, reusing pre-translated templates for canned answers.
+        """
+        if not text or target.lower().startswith("en"):
+            return text
+
+        for template in self.templates:
+            slots = template.match(text)
+            if slots is None:
+                continue
+
+            translated = self.cache.get(template.template, "en", target)
+            if translated is not None:
+                return fill_template(translated[0], slots)
+            break
+
+        return self.translate(text, target, "en")[0]
+
+    def pretranslate(
+        self,
+        languages: list[str] = TRANSLATION_LANGUAGES,
+        texts: list[str] = None
+    ) -> int:
+        """
+        Pre-translate the response templates and texts for each language.
+        Returns the number of new translations.
+        """
+        if texts is None and TRANSLATION_PRETRANSLATE_FILE:
+            texts = load_pretranslate_file(TRANSLATION_PRETRANSLATE_FILE)
+        texts = texts or []
+
+        added = 0
+        for language in languages:
+            if language.lower().startswith("en"):
+                continue
+
+            try:
+                templates = [t for t in self.templates if not self.cache.contains(t.template, "en", language)]
+                if templates:
+                    translations = self.client.translate([t.to_html() for t in templates], language, "en", text_type="html")
+                    for template, (translation, _) in zip(templates, translations):
+                        self.cache.put(template.template, "en", language, ResponseTemplate.from_html(translation), "en", persist=True)
+                    added += len(templates)
+
+                missing = [text for text in texts if not self.cache.contains(text, "en", language)]
+                if missing:
+                    for text, (translation, _) in zip(missing, self.client.translate(missing, language, "en")):
+                        self.cache.put(text, "en", language, translation, "en", persist=True)
+                    added += len(missing)
+
+            except Exception as e:
+                _logger.error(f"Pre-translation to {language} failed: {e}")
+
+        self.cache.save()
+        _logger.info(f"Pre-translated {added} answers for languages: {languages}")
+        return added
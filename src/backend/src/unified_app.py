@@ -1,17 +1,28 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 import os
-import json
-import importlib
+import asyncio
+import itertools
+import clu_hooks
 import pii_redacter
-from json import JSONDecodeError
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from azure.search.documents import SearchClient
 from aoai_client import AOAIClient, get_prompt
+from embedding_service import create_embedding_service
+from rag_context import RagContextAssembler
+from retrieval_cache import RetrievalCache, create_index_version_provider
+from search_backend import SEARCH_BACKEND, create_search_backend
+from rate_limiter import PRIORITY_HIGH, get_rate_limiter_stats
+from hook_registry import create_hook_registry
+from dialog_state import DialogStateStore
+from utterance_segmenter import UtteranceSegmenter, parse_utterances
+from speculative_retrieval import SpeculativeRetriever
+from hedging import ROUTER_HEDGE_POLICY, RouterHedge
+from deployment_pool import get_default_deployment_pool
 from router.router_type import RouterType
-from unified_conversation_orchestrator import UnifiedConversationOrchestrator
+from unified_conversation_orchestrator import REFUSAL_MESSAGE, UnifiedConversationOrchestrator
 from utils import get_azure_credential
 
 
@@ -30,14 +41,28 @@ search_client = SearchClient(
     endpoint=os.environ.get("SEARCH_ENDPOINT"),
     index_name=os.environ.get("SEARCH_INDEX_NAME"),
     credential=get_azure_credential()
+) if SEARCH_BACKEND == "AZURE" else None
+
+
+# Query embeddings, shared by search and any semantic cache or embedding router:
+embedding_service = create_embedding_service()
+# Overlapping chunks are merged and sources packed into RAG_CONTEXT_TOKENS:
+context_assembler = RagContextAssembler()
+# Azure AI Search, or an in-process index of the product_info corpus (SEARCH_BACKEND=LOCAL):
+search_backend = create_search_backend(search_client, embedding_service)
+# Search results cached per normalized query, cleared when the indexer runs or the document count changes:
+retrieval_cache = RetrievalCache(
+    create_index_version_provider(search_client) if search_client else search_backend.get_index_version
 )
 
-
 rag_client = AOAIClient(
     endpoint=os.environ.get("AOAI_ENDPOINT"),
     deployment=os.environ.get("AOAI_DEPLOYMENT"),
     use_rag=True,
-    search_client=search_client
+    search_backend=search_backend,
+    embedding_service=embedding_service,
+    context_assembler=context_assembler,
+    retrieval_cache=retrieval_cache
 )
 
 
@@ -46,9 +71,13 @@ extract_prompt = get_prompt("extract_utterances.txt")
 extract_client = AOAIClient(
     endpoint=os.environ.get("AOAI_ENDPOINT"),
     deployment=os.environ.get("AOAI_DEPLOYMENT"),
-    system_message=extract_prompt
+    system_message=extract_prompt,
+    priority=PRIORITY_HIGH
 )
 
+# Utterance segmentation with the extract client (SEGMENTER_MODE=LOCAL_FIRST only calls it for ambiguous messages):
+segmenter = UtteranceSegmenter(extract=extract_client.chat_completion)
+
 
 # PII:
 PII_ENABLED = os.environ.get("PII_ENABLED", "false").lower() == "true"
@@ -58,10 +87,11 @@ PII_ENABLED = os.environ.get("PII_ENABLED", "false").lower() == "true"
 def fallback_function(
     query: str,
     language: str,
-    id: int
+    id: int,
+    documents: list[dict] = None
 ) -> str:
     """
-    Call RAG client for grounded chat completion.
+    Call RAG client for grounded chat completion (on already retrieved documents, if any).
     """
     if PII_ENABLED:
         # Redact PII:
@@ -72,79 +102,149 @@ def fallback_function(
             cache=True
         )
 
-    return rag_client.chat_completion(query)
+    return rag_client.chat_completion(query, documents=documents)
+
+
+# Fallback search, started speculatively while routing:
+def retrieval_function(
+    query: str,
+    language: str,
+    id: int
+) -> list[dict]:
+    """
+    Retrieve RAG sources for the fallback function.
+    """
+    if PII_ENABLED:
+        # Redact PII:
+        query = pii_redacter.redact(
+            text=query,
+            id=id,
+            language=language,
+            cache=True
+        )
+
+    return rag_client.search(query)
 
 
 # Unified-Conversation-Orchestrator:
 router_type = RouterType(os.environ.get("ROUTER_TYPE", "BYPASS"))
+retriever = SpeculativeRetriever(search=retrieval_function)
+# Routers calling out to a service can be hedged with the fallback (the joint router is not, see README):
+hedge = RouterHedge() if ROUTER_HEDGE_POLICY != "NEVER" and router_type not in (RouterType.BYPASS, RouterType.JOINT_FUNCTION_CALLING) else None
 orchestrator = UnifiedConversationOrchestrator(
     router_type=router_type,
-    fallback_function=fallback_function
+    fallback_function=fallback_function,
+    retriever=retriever,
+    hedge=hedge
 )
-chat_id = 0
-
-
-def orchestrate_chat(message: str) -> list[str]:
-    if PII_ENABLED:
-        # Redact PII:
-        message = pii_redacter.redact(
-            text=message,
-            id=chat_id,
-            cache=True
+# PII mapping id per request (requests are orchestrated concurrently):
+chat_ids = itertools.count()
+
+
+# CLU intent hooks, registered once at startup:
+hook_registry = create_hook_registry(clu_hooks)
+
+# Pending slot-filling intents per session:
+dialog_states = DialogStateStore()
+
+
+async def orchestrate_chat(
+    message: str,
+    session_id: str = None
+) -> list[str]:
+    # Follow-ups that only supply missing slots (e.g. an order number) go straight to the intent hook:
+    resolved = dialog_states.resolve(session_id, message)
+    if resolved is not None:
+        intent, entities = resolved
+        print(f"Follow-up resolved locally for intent {intent}")
+        return [await hook_registry.dispatch(intent, entities)]
+    dialog_states.clear(session_id)
+    chat_id = next(chat_ids)
+
+    if router_type == RouterType.JOINT_FUNCTION_CALLING:
+        # One LLM call extracts and routes every utterance (the router redacts PII itself):
+        orchestration_responses = await asyncio.to_thread(
+            orchestrator.orchestrate_joint,
+            message=message,
+            id=chat_id
         )
 
-    # Break user message into separate utterances:
-    utterances = extract_client.chat_completion(message)
-    print(f"Utterances: {utterances}")
-    if not isinstance(utterances, list):
-        try:
-            utterances = json.loads(utterances)
-        except JSONDecodeError:
+    else:
+        if PII_ENABLED:
+            # Redact PII:
+            message = pii_redacter.redact(
+                text=message,
+                id=chat_id,
+                cache=True
+            )
+
+        # Break user message into separate utterances (off the event loop, as the extract call may wait on the rate limiter):
+        utterances = parse_utterances(await asyncio.to_thread(segmenter.segment, message))
+        print(f"Utterances: {utterances}")
+        if utterances is None:
             # Harmful content case:
             if PII_ENABLED:
                 # Clean up PII memory:
                 pii_redacter.remove(id=chat_id)
-            return ['I am unable to respond or participate in this conversation.']
+            return [REFUSAL_MESSAGE]
+
+        # Orchestrate each utterance:
+        orchestration_responses = []
+        for query in utterances:
+            if PII_ENABLED:
+                # Reconstruct PII:
+                query = pii_redacter.reconstruct(
+                    text=query,
+                    id=chat_id,
+                    cache=True
+                )
+
+            # Orchestrate (off the event loop, so concurrent requests keep being served):
+            orchestration_responses.append(await asyncio.to_thread(
+                orchestrator.orchestrate,
+                message=query,
+                id=chat_id
+            ))
 
     # Process each utterance:
     responses = []
-    for query in utterances:
-        if PII_ENABLED:
-            # Reconstruct PII:
-            query = pii_redacter.reconstruct(
-                text=query,
-                id=chat_id,
-                cache=True
-            )
-
-        # Orchestrate:
-        orchestration_response = orchestrator.orchestrate(
-            message=query,
-            id=chat_id
-        )
-
+    intents = []
+    for orchestration_response in orchestration_responses:
         # Parse response:
         response = None
-        if orchestration_response["route"] == "fallback":
+        if orchestration_response["route"] in ["fallback", "refusal"]:
             response = orchestration_response["result"]
 
         elif orchestration_response["route"] == "clu":
             intent = orchestration_response["result"]["intent"]
             entities = orchestration_response["result"]["entities"]
 
-            # Here, you may call external functions based on recognized intent:
-            hooks_module = importlib.import_module("clu_hooks")
-            hook_func = getattr(hooks_module, intent)
-            response = hook_func(entities)
+            intents.append((intent, entities))
+
+            # Here, you may call external functions based on recognized intent.
+            # Hooks are dispatched concurrently and awaited below:
+            response = asyncio.ensure_future(
+                hook_registry.dispatch(intent, entities)
+            )
 
         elif orchestration_response["route"] == "cqa":
             answer = orchestration_response["result"]["answer"]
             response = answer
 
         print(f"Orchestration response: {orchestration_response}")
-        print(f"Parsed response: {response}")
         responses.append(response)
 
+    # Remember the first intent missing required entities (e.g. "Cancel my order. What's the status of order 123?"):
+    dialog_states.set_first_pending(session_id, intents)
+
+    # Await pending hook dispatches, preserving utterance order:
+    pending = [r for r in responses if isinstance(r, asyncio.Future)]
+    if pending:
+        await asyncio.gather(*pending)
+        responses = [r.result() if isinstance(r, asyncio.Future) else r for r in responses]
+    for response in responses:
+        print(f"Parsed response: {response}")
+
     if PII_ENABLED:
         # Clean up PII memory:
         pii_redacter.remove(id=chat_id)
@@ -163,10 +263,73 @@ async def home_page():
 async def chat(request: Request):
     content = await request.json()
     message = content["message"]
+    session_id = content.get("session_id")
 
-    responses = orchestrate_chat(message)
+    responses = await orchestrate_chat(message, session_id)
 
     print(f"responses: {responses}")
     return JSONResponse({
-        "messages": responses
+        "messages": responses,
+        "need_more_info": dialog_states.get(session_id) is not None
     })
+
+
+@app.get("/stats/hooks")
+async def hook_stats():
+    """Per-intent CLU hook dispatch statistics."""
+    return JSONResponse(hook_registry.get_stats())
+
+
+@app.get("/stats/deployments")
+async def deployment_stats():
+    """Health and quota headroom of the pooled Azure OpenAI deployments."""
+    pool = get_default_deployment_pool()
+    return JSONResponse(pool.get_health() if pool else [])
+
+
+@app.get("/stats/rate_limits")
+async def rate_limit_stats():
+    """Client-side AOAI rate limiter queues and throttling per deployment."""
+    return JSONResponse(get_rate_limiter_stats())
+
+
+@app.get("/stats/segmenter")
+async def segmenter_stats():
+    """Share of messages segmented locally instead of by the extract-utterances LLM call."""
+    return JSONResponse(segmenter.get_stats())
+
+
+@app.get("/stats/speculation")
+async def speculation_stats():
+    """Speculative RAG searches used by the fallback versus wasted on routed messages."""
+    return JSONResponse(retriever.get_stats())
+
+
+@app.get("/stats/hedging")
+async def hedging_stats():
+    """Router latency percentiles and hedged fallbacks."""
+    return JSONResponse(hedge.get_stats() if hedge else {})
+
+
+@app.get("/stats/embeddings")
+async def embedding_stats():
+    """Query embedding cache statistics."""
+    return JSONResponse(embedding_service.get_stats() if embedding_service else {})
+
+
+@app.get("/stats/rag_context")
+async def rag_context_stats():
+    """RAG source tokens per fallback before and after context assembly."""
+    return JSONResponse(context_assembler.get_stats())
+
+
+@app.get("/stats/retrieval_cache")
+async def retrieval_cache_stats():
+    """Retrieval cache hit rate and index version invalidations."""
+    return JSONResponse(retrieval_cache.get_stats())
+
+
+@app.get("/stats/search_backend")
+async def search_backend_stats():
+    """Local search index size and query latency."""
+    return JSONResponse(search_backend.get_stats() if SEARCH_BACKEND == "LOCAL" else {})
@@ -6,8 +6,13 @@ from typing import Callable
 from azure.ai.textanalytics import TextAnalyticsClient
 from router.router_type import RouterType
 from router.router_utils import create_router
+from speculative_retrieval import Speculation, SpeculativeRetriever
+from hedging import RouterHedge
 from utils import get_azure_credential
 
+# Response to messages the extraction prompts refuse (harmful or rule-probing input):
+REFUSAL_MESSAGE = "I am unable to respond or participate in this conversation."
+
 
 class UnifiedConversationOrchestrator():
     """
@@ -19,10 +24,13 @@ class UnifiedConversationOrchestrator():
     def __init__(
         self,
         router_type: RouterType,
-        fallback_function: Callable[[str, str, str], dict]
+        fallback_function: Callable[[str, str, str], dict],
+        retriever: SpeculativeRetriever = None,
+        hedge: RouterHedge = None,
+        router: Callable = None
     ):
         """
-        Initialize orchestrator: create internal TA client and router.
+        Initialize orchestrator: create internal TA client and router (unless one is given).
         """
         self.ta_client = TextAnalyticsClient(
             endpoint=os.environ.get("LANGUAGE_ENDPOINT"),
@@ -31,12 +39,18 @@ class UnifiedConversationOrchestrator():
 
         # Router is Callable[[str, str, str], dict]:
         self.router_type = router_type
-        self.router = create_router(
+        self.router = router or create_router(
             router_type=self.router_type
         )
 
         self.fallback_function = fallback_function
 
+        # Optional speculative fallback search, run in parallel with the router:
+        self.retriever = retriever
+
+        # Optional hedged fallback for slow routers:
+        self.hedge = hedge
+
     def detect_language(
         self,
         text: str
@@ -61,21 +75,128 @@ class UnifiedConversationOrchestrator():
 
         language = self.detect_language(text=message)
 
-        # Router expects a message, language, and id:
-        routing_result = self.router(message, language, id)
+        # Start the fallback search while the router runs:
+        speculation = None
+        if self.retriever is not None:
+            speculation = self.retriever.start(message, language, id)
+
+        try:
+            fallback_result = None
+            if self.hedge is not None:
+                # Start the fallback too if the router is slow, first confident answer wins:
+                routing_result, fallback_result = self.hedge.run(
+                    route=lambda: self.router(message, language, id),
+                    fallback=lambda: self.call_fallback(message, language, id, speculation),
+                    is_confident=lambda result: result is not None and result["error"] is None
+                )
+            else:
+                # Router expects a message, language, and id:
+                routing_result = self.router(message, language, id)
+
+            return self.create_orchestration_response(
+                message=message,
+                routing_result=routing_result,
+                language=language,
+                id=id,
+                speculation=speculation,
+                fallback_result=fallback_result
+            )
+
+        finally:
+            if speculation:
+                # Routed, or the router raised: the search results are not needed (unless collected by the fallback)
+                self.retriever.discard(speculation)
+
+    def orchestrate_joint(
+        self,
+        message: str,
+        id: str = None
+    ) -> list[dict]:
+        """
+        Orchestrate a whole message with the joint extract-and-route router.
+
+        Returns an orchestration response per extracted utterance, or a single "refusal" response
+        when the router refused the message. Speculative retrieval and hedging are not used:
+        the fallback utterances are only known once the router returns.
+        """
+        if id is None:
+            id = str(uuid.uuid4())
+
+        language = self.detect_language(text=message)
+
+        # Joint router splits the message and routes every utterance in one LLM call:
+        routed_utterances = self.router(message, language, id)
+        if not routed_utterances:
+            return [{
+                "id": id,
+                "query": message,
+                "router_type": self.router_type.name,
+                "route": "refusal",
+                "result": REFUSAL_MESSAGE
+            }]
+
+        return [
+            self.create_orchestration_response(
+                message=routed["utterance"],
+                routing_result=routed["result"],
+                language=language,
+                id=id
+            )
+            for routed in routed_utterances
+        ]
+
+    def call_fallback(
+        self,
+        message: str,
+        language: str,
+        id: str,
+        speculation: Speculation = None
+    ):
+        """
+        Call fallback-function, on the speculatively retrieved documents if available.
+        """
+        documents = self.retriever.collect(speculation) if speculation else None
+        if documents is not None:
+            return self.fallback_function(
+                message,
+                language,
+                id,
+                documents=documents)
+
+        # Fallback-function expects a message, language, and message id:
+        return self.fallback_function(
+            message,
+            language,
+            id)
 
+    def create_orchestration_response(
+        self,
+        message: str,
+        routing_result: dict,
+        language: str,
+        id: str,
+        speculation: Speculation = None,
+        fallback_result=None
+    ) -> dict:
+        """
+        Create orchestration response from routing result, calling fallback-function when not routed
+        (unless a hedged fallback already answered).
+        """
         orchestration_response = {
             "id": id,
             "query": message,
             "router_type": self.router_type.name
         }
 
-        if routing_result is None or routing_result["error"] is not None:
-            # Fallback-function expects a message, language, and message id:
-            fallback_result = self.fallback_function(
-                message,
-                language,
-                id)
+        fallback = fallback_result is not None or routing_result is None or routing_result["error"] is not None
+        if self.retriever is not None:
+            self.retriever.record_route(fallback)
+
+        if fallback:
+            if fallback_result is None:
+                fallback_result = self.call_fallback(message, language, id, speculation)
+            else:
+                orchestration_response["hedged"] = True
 
             orchestration_response["route"] = "fallback"
             orchestration_response["result"] = fallback_result
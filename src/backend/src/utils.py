@@ -1,6 +1,7 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 import os
+import math
 from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
 
 
@@ -14,3 +15,15 @@ def get_azure_credential():
         )
 
     return DefaultAzureCredential()
+
+
+def get_percentile(
+    values: list[float],
+    percentile: float
+) -> float:
+    """
+    Nearest-rank percentile of values.
+    """
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percentile / 100 * len(ordered)))
+    return ordered[rank - 1]
@@ -0,0 +1,181 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import re
+import json
+import time
+import logging
+from json import JSONDecodeError
+from typing import Callable
+
+"""
+Local utterance segmentation with an LLM fallback.
+
+Clear single-intent messages and messages made of separate sentences or conjoined clauses
+("Play Eric Clapton and turn down the volume.") are split deterministically with a confidence
+score. Only messages that look ambiguous (e.g. a conjunction that may join two intents or just
+two nouns) are sent to the extract-utterances LLM call.
+
+The extract-utterances prompt is also the content gate of the pipeline: its safety rules make
+the model stop replying (a non-JSON reply) on harmful or rule-probing input, which is refused.
+Messages segmented locally skip that gate, so LOCAL_FIRST is opt-in.
+"""
+
+_logger = logging.getLogger(__name__)
+
+# LLM always calls the extract-utterances prompt; LOCAL_FIRST segments locally when confident,
+# without the prompt's content gate for those messages
+SEGMENTER_MODE = os.environ.get("SEGMENTER_MODE", "LLM").upper()
+SEGMENTER_CONFIDENCE_THRESHOLD = float(os.environ.get("SEGMENTER_CONFIDENCE_THRESHOLD", "0.75"))
+
+# Words that start a new clause (question words, auxiliaries, subjects and imperative verbs):
+CLAUSE_STARTERS = {
+    "what", "when", "where", "why", "how", "which", "who", "whose",
+    "is", "are", "was", "were", "do", "does", "did", "can", "could", "would", "will", "should", "may",
+    "i", "i'd", "i'm", "we", "you", "my", "please", "let",
+    "cancel", "refund", "return", "check", "track", "tell", "show", "give", "find", "send", "get", "help",
+    "update", "change", "play", "turn", "set", "start", "stop", "open", "close", "book", "add", "remove"
+}
+
+# Conjunctions that may join two clauses:
+CONJUNCTION_REGEX = re.compile(r"\s*[,;]?\s*\b(?:and then|and also|and|also|then|but|or)\b\s+|\s*;\s*", re.IGNORECASE)
+AMBIGUOUS_REGEX = re.compile(r"\b(?:and|or)\b|;", re.IGNORECASE)
+SENTENCE_REGEX = re.compile(r"(?<=[.!?])\s+(?=\S)")
+WORD_REGEX = re.compile(r"[\w']+")
+LEADING_CONNECTIVE_REGEX = re.compile(r"^(?:and|also|then|so)\s+", re.IGNORECASE)
+
+# Confidence of each kind of segmentation:
+SINGLE_CLAUSE_CONFIDENCE = 0.95
+SENTENCE_SPLIT_CONFIDENCE = 0.9
+CLAUSE_SPLIT_CONFIDENCE = 0.85
+AMBIGUOUS_CONFIDENCE = 0.4
+
+
+def get_words(text: str) -> list[str]:
+    return WORD_REGEX.findall(text.lower())
+
+
+def starts_clause(text: str) -> bool:
+    words = get_words(text)
+    return bool(words) and words[0] in CLAUSE_STARTERS
+
+
+def format_utterance(text: str) -> str:
+    """
+    Format a split utterance like the LLM extractor: capitalized, with terminal punctuation.
+    """
+    text = LEADING_CONNECTIVE_REGEX.sub("", text.strip().rstrip(",;").strip())
+    text = text[:1].upper() + text[1:]
+    return text if text.endswith((".", "?", "!")) else f"{text}."
+
+
+def split_clauses(sentence: str) -> tuple[list[str], bool]:
+    """
+    Split a sentence on conjunctions followed by a new clause.
+    Returns the clauses and whether a conjunction was left unresolved.
+    """
+    clauses = []
+    ambiguous = False
+    start = 0
+    for match in CONJUNCTION_REGEX.finditer(sentence):
+        left = sentence[start:match.start()]
+        right = sentence[match.end():]
+        if len(get_words(left)) >= 2 and len(get_words(right)) >= 2 and starts_clause(right):
+            clauses.append(left)
+            start = match.end()
+        elif AMBIGUOUS_REGEX.search(match.group()):
+            # "and"/"or" joining something other than a clause (e.g. two nouns) may still join two intents
+            ambiguous = True
+
+    clauses.append(sentence[start:])
+    return clauses, ambiguous
+
+
+def segment_locally(message: str) -> tuple[list[str], float]:
+    """
+    Segment a message into utterances with a confidence score.
+    """
+    message = message.strip()
+    if not message:
+        return [], 0.0
+
+    sentences = [s for s in SENTENCE_REGEX.split(message) if get_words(s)]
+
+    utterances = []
+    confidence = SINGLE_CLAUSE_CONFIDENCE if len(sentences) == 1 else SENTENCE_SPLIT_CONFIDENCE
+    for sentence in sentences:
+        clauses, ambiguous = split_clauses(sentence)
+        if ambiguous:
+            confidence = min(confidence, AMBIGUOUS_CONFIDENCE)
+        elif len(clauses) > 1:
+            confidence = min(confidence, CLAUSE_SPLIT_CONFIDENCE)
+        utterances.extend(clauses)
+
+    if len(utterances) == 1:
+        # Keep single-intent messages verbatim:
+        return [message], confidence
+    return [format_utterance(utterance) for utterance in utterances], confidence
+
+
+def parse_utterances(utterances: list[str] | str) -> list[str]:
+    """
+    Parse segmenter output into utterances, or None if the extractor refused the message.
+    """
+    if isinstance(utterances, list):
+        return utterances
+    try:
+        utterances = json.loads(utterances)
+    except (JSONDecodeError, TypeError):
+        return None
+    return utterances if isinstance(utterances, list) else None
+
+
+class UtteranceSegmenter():
+    """
+    Local-first utterance segmenter, calling extract(message) only for ambiguous messages.
+    """
+
+    def __init__(
+        self,
+        extract: Callable[[str], list[str] | str],
+        mode: str = SEGMENTER_MODE,
+        threshold: float = SEGMENTER_CONFIDENCE_THRESHOLD
+    ):
+        self.extract = extract
+        self.mode = mode
+        self.threshold = threshold
+
+        # Stats:
+        self.local = 0
+        self.llm = 0
+        self.llm_time = 0.0
+
+    def segment(
+        self,
+        message: str
+    ) -> list[str] | str:
+        """
+        Segment message into utterances. LLM results are returned as produced by extract (possibly a JSON string).
+        """
+        if self.mode != "LLM":
+            utterances, confidence = segment_locally(message)
+            if utterances and confidence >= self.threshold:
+                self.local += 1
+                _logger.info(f"Segmented locally ({confidence:.2f}): {utterances}")
+                return utterances
+
+        start = time.perf_counter()
+        utterances = self.extract(message)
+        self.llm += 1
+        self.llm_time += time.perf_counter() - start
+        return utterances
+
+    def get_stats(self) -> dict:
+        total = self.local + self.llm
+        return {
+            "messages": total,
+            "local": self.local,
+            "llm": self.llm,
+            "local_rate": round(self.local / total, 3) if total else 0.0,
+            "avg_llm_seconds": round(self.llm_time / self.llm, 3) if self.llm else 0.0
+        }
@@ -9,6 +9,10 @@ const Chat = () => {
     const [needMoreInfo, setNeedMoreInfo] = useState(false);
 
     const messageEndRef = useRef(null);
+    // Identifies this conversation, so the server can keep pending intents between turns
+    const sessionId = useRef(
+        window.crypto?.randomUUID ? window.crypto.randomUUID() : `${Date.now()}-${Math.random().toString(36).slice(2)}`
+    );
     const welcomeMessage = 'Ask a question...';
 
     const scrollToBottom = () => {
@@ -35,6 +39,7 @@ const Chat = () => {
             body: JSON.stringify({
                 message: userMessageContent,
                 history: historyMessages,
+                session_id: sessionId.current,
             })
         };
     };